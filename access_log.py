@@ -0,0 +1,97 @@
+"""分页模拟的访问日志
+
+每条日志拆成若干个 array 分别存放，容量满后按环形缓冲区覆盖最旧的记录。
+界面只把当前可见的几行转换成 Treeview 行，日志本身不依赖 tkinter。
+"""
+from array import array
+
+ERROR = 2  # 缺页标志取值: 0 命中, 1 缺页, 2 执行出错
+COLUMNS = ("steps", "ops", "pages", "offsets", "physical", "faults", "victims", "frames")
+
+
+class AccessLog:
+    def __init__(self, capacity=1_000_000):
+        self.capacity = capacity
+        self.clear()
+
+    def clear(self):
+        self.steps = array("q")
+        self.ops = array("H")  # 操作名在 op_names 中的下标
+        self.pages = array("q")
+        self.offsets = array("q")
+        self.physical = array("q")
+        self.faults = array("B")
+        self.victims = array("q")  # 被置换页，-1 表示无
+        self.frames = array("q")  # 被置换帧，-1 表示无
+        self.op_names = []
+        self.op_codes = {}
+        self.errors = {}  # 缓冲区位置 → 错误信息
+        self.total = 0  # 累计写入的条数
+
+    def __len__(self):
+        return min(self.total, self.capacity)
+
+    def _op_code(self, op):
+        code = self.op_codes.get(op)
+        if code is None:
+            code = self.op_codes[op] = len(self.op_names)
+            self.op_names.append(op)
+        return code
+
+    def _store(self, values):
+        slot = self.total % self.capacity
+        columns = [getattr(self, name) for name in COLUMNS]
+        if self.total < self.capacity:
+            for column, value in zip(columns, values):
+                column.append(value)
+        else:
+            for column, value in zip(columns, values):
+                column[slot] = value
+            self.errors.pop(slot, None)
+        self.total += 1
+        return slot
+
+    def append(self, step, op, page, offset, physical, fault, victim, frame):
+        self._store((step, self._op_code(op), page, offset, physical, 1 if fault else 0,
+                     -1 if victim is None else victim, -1 if frame is None else frame))
+
+    def append_error(self, step, message):
+        slot = self._store((step, self._op_code("错误"), 0, 0, 0, ERROR, -1, -1))
+        self.errors[slot] = message
+
+    def __getitem__(self, index):
+        """按从旧到新的顺序取第 index 条: (序号, 操作, 页号, 页内地址, 物理地址, 缺页, 被置换页, 被置换帧)
+
+        出错的记录缺页标志为 ERROR，页号位置是错误信息。
+        """
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        if self.total > self.capacity:
+            index = (self.total + index) % self.capacity
+        fault = self.faults[index]
+        victim = self.victims[index]
+        frame = self.frames[index]
+        page = self.errors[index] if fault == ERROR else self.pages[index]
+        return (self.steps[index], self.op_names[self.ops[index]], page, self.offsets[index],
+                self.physical[index], fault,
+                None if victim < 0 else victim, None if frame < 0 else frame)
+
+    def discard_from(self, step):
+        """删除序号不小于 step 的记录（按序号递增写入，这些记录都在最后），跳回较早的状态时用"""
+        keep = len(self)
+        wrapped = self.total > self.capacity
+        while keep and self.steps[(self.total + keep - 1) % self.capacity if wrapped else keep - 1] >= step:
+            keep -= 1
+        if keep == len(self):
+            return
+        if wrapped:
+            # 环形缓冲区已回绕: 先转成从旧到新的顺序
+            first = self.total % self.capacity
+            for name in COLUMNS:
+                column = getattr(self, name)
+                setattr(self, name, column[first:] + column[:first])
+            self.errors = {(slot - first) % self.capacity: message for slot, message in self.errors.items()}
+        for name in COLUMNS:
+            del getattr(self, name)[keep:]
+        self.errors = {slot: message for slot, message in self.errors.items() if slot < keep}
+        self.total = keep
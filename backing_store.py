@@ -0,0 +1,175 @@
+"""换页磁盘与脏页写回的代价模型
+
+Disk: 单个磁盘，每次 I/O 花费 固定延迟 + 寻道时间 + 每块传输时间。寻道时间与磁头
+移动的距离（PageTableEntry.disk_location 之差）成正比，有上限；相邻位置（相差不超过
+stride）的块可以合成一次 I/O 连续读写。
+
+BackingStore: 挂在 PagingManager 上，缺页时读入页面，置换脏页时写回。同步写回时
+缺页要先等脏页写完；异步写回时脏页进入后台队列，攒够 batch_size 个后按磁盘位置
+排序、相邻的合并成一次 I/O 写出，只占用磁盘时间，不直接让作业等待。开启预清洗时
+磁盘空闲就把置换策略下一批要淘汰的脏页提前写回，等真正置换时已经是干净页。
+
+时间单位为微秒，每次访存推进 access_time。作业等待磁盘的时间计入停顿时间。
+"""
+
+
+class Disk:
+    def __init__(self, latency=100.0, seek_per_unit=0.01, max_seek=8000.0, transfer=20.0, stride=1000):
+        self.latency = latency  # 每次 I/O 的固定开销（旋转延迟、控制器等）
+        self.seek_per_unit = seek_per_unit  # 磁头每移动一个位置单位的寻道时间
+        self.max_seek = max_seek
+        self.transfer = transfer  # 每块的传输时间
+        self.stride = stride  # 相邻两块磁盘位置之差
+        self.head = 0
+        self.busy_until = 0.0  # 磁盘完成已提交 I/O 的时刻
+        self.reads = 0
+        self.writes = 0
+        self.busy_time = 0.0
+
+    def service_time(self, location, blocks=1, head=None):
+        distance = abs(location - (self.head if head is None else head))
+        seek = min(self.max_seek, self.seek_per_unit * distance)
+        return self.latency + seek + self.transfer * blocks
+
+    def submit(self, now, location, blocks=1, write=False):
+        """提交一次从 location 开始连续 blocks 块的 I/O，返回完成时刻"""
+        start = max(now, self.busy_until)
+        duration = self.service_time(location, blocks)
+        self.busy_until = start + duration
+        self.busy_time += duration
+        self.head = location + (blocks - 1) * self.stride
+        if write:
+            self.writes += 1
+        else:
+            self.reads += 1
+        return self.busy_until
+
+
+class BackingStore:
+    def __init__(self, disk=None, asynchronous=True, batch_size=16, preclean=0, access_time=0.1):
+        self.disk = Disk() if disk is None else disk
+        self.asynchronous = asynchronous
+        self.batch_size = batch_size
+        self.preclean_count = preclean  # 每次预清洗最多提前写回的页数，0 表示不预清洗
+        self.access_time = access_time
+        self.now = 0.0
+        self.queue = []  # 等待后台写回的磁盘位置
+        self.stall_time = 0.0
+        self.read_stall = 0.0
+        self.write_stall = 0.0
+        self.queued = 0  # 进入后台队列的写回总数
+        self.max_queue = 0
+        self.flushes = 0
+        self.pages_written = 0
+        self.clustered_ios = 0  # 合并后实际发出的写 I/O 数
+        self.clustering_saved = 0.0  # 合并相邻位置节省的磁盘时间
+        self.precleaned = 0
+        self.prefetch_reads = 0
+
+    def tick(self):
+        self.now += self.access_time
+
+    def advance(self, accesses):
+        self.now += self.access_time * accesses
+
+    def _wait(self, completion):
+        stall = max(0.0, completion - self.now)
+        self.now += stall
+        self.stall_time += stall
+        return stall
+
+    def read(self, location):
+        """缺页读入，作业等到读完为止"""
+        self.read_stall += self._wait(self.disk.submit(self.now, location))
+
+    def prefetch_read(self, location):
+        """预取读入只占用磁盘，不让作业等待"""
+        self.disk.submit(self.now, location)
+        self.prefetch_reads += 1
+
+    def write(self, location, background=False):
+        """置换脏页时写回；background 为真时（预清洗）同步写回也不让作业等待"""
+        if not self.asynchronous and background:
+            self.disk.submit(self.now, location, write=True)
+            self.pages_written += 1
+            self.clustered_ios += 1
+            return
+        if not self.asynchronous:
+            self.write_stall += self._wait(self.disk.submit(self.now, location, write=True))
+            self.pages_written += 1
+            self.clustered_ios += 1
+            return
+        self.queue.append(location)
+        self.queued += 1
+        if len(self.queue) > self.max_queue:
+            self.max_queue = len(self.queue)
+        if len(self.queue) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """把后台队列按磁盘位置排序，相邻的合并成一次 I/O 写出"""
+        if not self.queue:
+            return
+        disk = self.disk
+        locations = sorted(set(self.queue))
+        self.pages_written += len(self.queue)
+        self.queue.clear()
+        self.flushes += 1
+        start = 0
+        for i in range(1, len(locations) + 1):
+            if i < len(locations) and locations[i] - locations[i - 1] <= disk.stride:
+                continue
+            first, blocks = locations[start], i - start
+            # 逐块单独写出的时间（按同样的顺序）与合并写出的时间之差
+            separate, head = 0.0, disk.head
+            for location in locations[start:i]:
+                separate += disk.service_time(location, 1, head)
+                head = location
+            self.clustering_saved += separate - disk.service_time(first, blocks)
+            disk.submit(self.now, first, blocks, write=True)
+            self.clustered_ios += 1
+            start = i
+
+    def preclean(self, manager, job_id):
+        """磁盘空闲时把即将被淘汰的脏页提前写回
+
+        预清洗的页与置换时的写回一样进入后台队列，攒够 batch_size 个才成批写出，
+        并计入 manager 的写回次数（置换时它已是干净页，不会再计一次）。
+        """
+        if not self.preclean_count or self.disk.busy_until > self.now:
+            return
+        policy = manager.job_policy[job_id]
+        for frame in policy.candidates(self.preclean_count):
+            owner, page = manager.frame_table[frame]
+            entry = manager.page_tables[owner][page]
+            if entry.modified:
+                entry.modified = False
+                self.precleaned += 1
+                manager.writeback_count += 1
+                self.write(entry.disk_location, background=True)
+
+    def finish(self):
+        """写出队列中剩余的脏页"""
+        self.flush()
+
+    def report(self):
+        disk = self.disk
+        # 后台 I/O 可能在最后一次访问之后才完成
+        end = max(self.now, disk.busy_until)
+        utilization = disk.busy_time / end if end else 0.0
+        lines = [
+            f"模拟时间: {self.now:.1f} us",
+            f"停顿时间: {self.stall_time:.1f} us (读入 {self.read_stall:.1f}, 写回 {self.write_stall:.1f})",
+            f"磁盘 I/O: 读 {disk.reads} 次(其中预取 {self.prefetch_reads}), 写 {disk.writes} 次, "
+            f"磁盘利用率 {utilization:.2%}",
+        ]
+        if self.asynchronous:
+            lines += [
+                f"后台写回: 入队 {self.queued} 页, 最长队列 {self.max_queue}, "
+                f"批次 {self.flushes}, 待写 {len(self.queue)}",
+                f"聚簇写回: {self.pages_written} 页合并为 {self.clustered_ios} 次 I/O, "
+                f"节省 {self.clustering_saved:.1f} us",
+            ]
+        if self.preclean_count:
+            lines.append(f"预清洗: {self.precleaned} 页")
+        return "\n".join(lines)
@@ -0,0 +1,236 @@
+"""分页与分区分配热点路径的基准测试
+
+对 workloads 中每种合成负载分别测量:
+
+- 分页: PagingManager.access_page 的吞吐量和单次延迟，按命中与缺页
+  （含 handle_page_fault）分开统计，覆盖各置换策略。
+- 分区: PartitionAllocator（MemoryManager 界面背后的分配器）各算法的分配、
+  释放（含与相邻空闲区合并）的吞吐量和单次延迟。
+
+吞吐量用整段计时、取 repeat 次中最快的一次；单次延迟另跑一遍逐次计时，
+给出均值和分位数（纳秒）。结果写成 JSON，可以用 --compare 与旧版本的结果比较。
+
+用法: python benchmark.py --output bench.json
+      python benchmark.py --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+from partition_core import ALGORITHMS, PartitionAllocator
+from paging_replay import make_manager
+from workloads import PAGE_WORKLOADS, SIZE_DISTRIBUTIONS, alloc_free_events
+
+PAGING_POLICIES = ("FIFO", "LRU", "CLOCK", "LFU")
+
+
+def latency_summary(samples):
+    """单次延迟（纳秒）的均值与分位数"""
+    if not samples:
+        return {"count": 0}
+    samples = sorted(samples)
+    n = len(samples)
+    return {
+        "count": n,
+        "mean": sum(samples) / n,
+        "p50": samples[n // 2],
+        "p90": samples[min(n - 1, n * 9 // 10)],
+        "p99": samples[min(n - 1, n * 99 // 100)],
+        "max": samples[-1],
+    }
+
+
+def _paging_manager(records, frames, policy):
+    manager = make_manager(frames, policy=policy)
+    for _, page, _ in records:
+        if page not in manager.page_table:
+            manager.add_page(page)
+    return manager
+
+
+def bench_paging(records, frames, policy, repeat=3):
+    seconds = None
+    for _ in range(repeat):
+        access_page = _paging_manager(records, frames, policy).access_page
+        started = time.perf_counter()
+        for op, page, offset in records:
+            access_page("job1", page, op, offset)
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    manager = _paging_manager(records, frames, policy)
+    access_page = manager.access_page
+    clock = time.perf_counter_ns
+    hits, faults = [], []
+    for op, page, offset in records:
+        started = clock()
+        fault = access_page("job1", page, op, offset)[1]
+        elapsed = clock() - started
+        (faults if fault else hits).append(elapsed)
+    return {
+        "operations": len(records),
+        "seconds": seconds,
+        "throughput": len(records) / seconds if seconds else 0.0,
+        "fault_ratio": len(faults) / len(records) if records else 0.0,
+        "latency_ns": {
+            "access_page": latency_summary(hits + faults),
+            "hit": latency_summary(hits),
+            "fault": latency_summary(faults),
+        },
+    }
+
+
+def bench_partition(events, total_size, algorithm, repeat=3):
+    seconds = None
+    for _ in range(repeat):
+        allocator = PartitionAllocator(total_size, algorithm)
+        allocate, release = allocator.allocate, allocator.release
+        started = time.perf_counter()
+        for kind, pid, size in events:
+            if kind == "alloc":
+                allocate(size, pid)
+            else:
+                release(pid)
+        elapsed = time.perf_counter() - started
+        seconds = elapsed if seconds is None else min(seconds, elapsed)
+
+    allocator = PartitionAllocator(total_size, algorithm)
+    allocate, release = allocator.allocate, allocator.release
+    clock = time.perf_counter_ns
+    allocations, failures, releases = [], [], []
+    for kind, pid, size in events:
+        if kind == "alloc":
+            started = clock()
+            placed = allocate(size, pid)
+            elapsed = clock() - started
+            (allocations if placed is not None else failures).append(elapsed)
+        else:
+            started = clock()
+            release(pid)
+            releases.append(clock() - started)
+    return {
+        "operations": len(events),
+        "seconds": seconds,
+        "throughput": len(events) / seconds if seconds else 0.0,
+        "failure_ratio": len(failures) / max(1, len(allocations) + len(failures)),
+        "external_fragmentation": allocator.external_fragmentation(),
+        "latency_ns": {
+            "allocate": latency_summary(allocations),
+            "allocate_failed": latency_summary(failures),
+            "release": latency_summary(releases),
+        },
+    }
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(accesses=100_000, events=50_000, pages=4096, frames=64, memory=1 << 16,
+              seed=0, repeat=3, groups=("paging", "partition"), log=None):
+    """运行基准测试，返回可直接写成 JSON 的字典"""
+    results = {}
+    if "paging" in groups:
+        for name, generate in PAGE_WORKLOADS.items():
+            records = generate(accesses, pages, seed=seed)
+            for policy in PAGING_POLICIES:
+                key = f"paging/{name}/{policy}"
+                if log:
+                    log(key)
+                results[key] = bench_paging(records, frames, policy, repeat)
+    if "partition" in groups:
+        for distribution in SIZE_DISTRIBUTIONS:
+            stream = alloc_free_events(events, distribution, max_size=memory // 256, live=512,
+                                       seed=seed)
+            for algorithm in ALGORITHMS:
+                key = f"partition/{distribution}/{algorithm}"
+                if log:
+                    log(key)
+                results[key] = bench_partition(stream, memory, algorithm, repeat)
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "revision": _git_revision(),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "accesses": accesses,
+            "events": events,
+            "pages": pages,
+            "frames": frames,
+            "memory": memory,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold=0.10):
+    """比较两次结果的吞吐量，返回 (报告行, 退步的项目)"""
+    lines = [f"{'项目':<32} {'旧吞吐量':>14} {'新吞吐量':>14} {'变化':>8}"]
+    regressions = []
+    for key, result in current["results"].items():
+        old = baseline["results"].get(key)
+        if old is None or not old["throughput"]:
+            continue
+        change = result["throughput"] / old["throughput"] - 1
+        mark = ""
+        if change < -threshold:
+            mark = " 退步"
+            regressions.append(key)
+        lines.append(f"{key:<34} {old['throughput']:>16,.0f} {result['throughput']:>16,.0f} "
+                     f"{change:>+9.1%}{mark}")
+    return lines, regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="分页与分区分配热点路径的基准测试")
+    parser.add_argument("--output", default=None, help="结果 JSON 文件，缺省输出到标准输出")
+    parser.add_argument("--compare", default=None, help="与之比较的旧结果 JSON 文件")
+    parser.add_argument("--threshold", type=float, default=0.10, help="吞吐量下降超过该比例视为退步")
+    parser.add_argument("--only", choices=["paging", "partition"], default=None, help="只测一类")
+    parser.add_argument("--accesses", type=int, default=100_000, help="每种分页负载的访问次数")
+    parser.add_argument("--events", type=int, default=50_000, help="每种分区负载的事件数")
+    parser.add_argument("--pages", type=int, default=4096, help="分页负载的地址空间页数")
+    parser.add_argument("--frames", type=int, default=64, help="作业分得的物理块数")
+    parser.add_argument("--memory", type=int, default=1 << 16, help="分区分配的内存总量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--repeat", type=int, default=3, help="吞吐量取几次中最快的一次")
+    args = parser.parse_args(argv)
+
+    groups = (args.only,) if args.only else ("paging", "partition")
+
+    def log(key):
+        print(f"测试 {key} ...", file=sys.stderr)
+
+    report = run_suite(args.accesses, args.events, args.pages, args.frames, args.memory, args.seed,
+                       args.repeat, groups, log)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    elif not args.compare:
+        print(text)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        lines, regressions = compare(baseline, report, args.threshold)
+        print("\n".join(lines))
+        if regressions:
+            print(f"{len(regressions)} 项吞吐量下降超过 {args.threshold:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
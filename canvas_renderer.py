@@ -0,0 +1,89 @@
+"""保留模式的画布绘制
+
+CanvasItems 按键（分区、帧等）保存每个矩形和文字的图元编号，每次刷新只
+重新设置发生变化的图元，新增的创建、消失的删除，而不是 delete("all") 后全部重画。
+"""
+
+
+class CanvasItems:
+    def __init__(self, canvas, tag):
+        self.canvas = canvas
+        self.tag = tag  # 本组图元共用的标签，便于整体删除
+        self.items = {}  # 键 → (矩形编号, 文字编号, 上次的外观)
+
+    def update(self, shapes):
+        """shapes: {键: (矩形坐标, 填充色, 文字, 文字坐标, 文字样式)}
+
+        文字样式为传给 create_text 的关键字参数字典，坐标均为元组。
+        """
+        canvas = self.canvas
+        items = self.items
+        for key, shape in shapes.items():
+            box, fill, text, text_pos, text_style = shape
+            old = items.get(key)
+            if old is None:
+                rect = canvas.create_rectangle(*box, fill=fill, outline="black", tags=self.tag)
+                label = canvas.create_text(*text_pos, text=text, tags=self.tag, **text_style)
+                items[key] = (rect, label, shape)
+                continue
+            rect, label, previous = old
+            if previous == shape:
+                continue
+            if previous[0] != box:
+                canvas.coords(rect, *box)
+            if previous[1] != fill:
+                canvas.itemconfigure(rect, fill=fill)
+            if previous[3] != text_pos:
+                canvas.coords(label, *text_pos)
+            if previous[2] != text or previous[4] != text_style:
+                canvas.itemconfigure(label, text=text, **text_style)
+            items[key] = (rect, label, shape)
+        for key in [key for key in items if key not in shapes]:
+            rect, label, _ = items.pop(key)
+            canvas.delete(rect, label)
+
+    def clear(self):
+        self.canvas.delete(self.tag)
+        self.items.clear()
+
+
+def layout_bars(blocks, scale, min_width=1.0, bridge=False):
+    """把按地址排序的 (键, 起始地址, 大小) 换算成画布上的横条
+
+    宽度不足 min_width 像素、且地址首尾相接的块合并成一个汇总条，返回
+    [(键, x1, x2, 块数, 总大小)]；汇总条的键为 ("合并", 第一个块的键)，
+    只有一个块时仍用它自己的键。中间隔着别的内存的块默认不合并；bridge 为 True
+    时隔着的内存也不足 min_width 像素就照样合并，汇总条跨过这段间隔，总大小
+    只计入各块本身。可变分区的空闲分区总被已分配分区隔开，需要这样才能合并。
+    """
+    bars = []
+    group = None  # [第一个块的键, x1, x2, 块数, 总大小, 结束地址]
+
+    def flush():
+        key, x1, x2, count, total, _ = group
+        bars.append((key if count == 1 else ("合并", key), x1, x2, count, total))
+
+    for key, start, size in blocks:
+        x1 = start * scale
+        x2 = (start + size) * scale
+        if group is not None:
+            gap = start - group[5]  # 与上一个块之间隔着的内存
+            if x2 - x1 >= min_width or (gap and not (bridge and gap * scale < min_width)):
+                flush()
+                group = None
+        if x2 - x1 >= min_width:
+            bars.append((key, x1, x2, 1, size))
+            continue
+        if group is None:
+            group = [key, x1, x2, 1, size, start + size]
+        else:
+            group[2] = x2
+            group[3] += 1
+            group[4] += size
+            group[5] = start + size
+        if group[2] - group[1] >= min_width:
+            flush()
+            group = None
+    if group is not None:
+        flush()
+    return bars
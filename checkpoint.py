@@ -0,0 +1,202 @@
+"""模拟状态的检查点
+
+长时间回放时每隔 every 步把完整的模拟状态（PagingManager 的页表、置换策略队列、
+空闲块池，或 PartitionAllocator 的空闲/已分配分区表）连同回放统计存一份快照。
+要看第 k 步的状态时，恢复不晚于 k 的最近一份快照，只需回放之后剩下的几步。
+
+快照是 pickle 后再经 zlib 压缩的字节串。PagingManager、PartitionAllocator 等类
+自己决定哪些内容进快照: metrics 挂上的包装、OPT 的完整访问序列这类可以重建的
+东西不保存，OPT 恢复时要重新给出 future。
+
+检查点文件格式（小端序）:
+
+    文件头 16 字节: 魔数 b"OSCK" | 版本 u16 | 类型 u16 | 保留 8 字节
+    快照若干份: 步数 u64 | 长度 u64 | 快照数据
+    索引: 每份快照 步数 u64 | 偏移 u64 | 长度 u64
+    文件尾 24 字节: 索引偏移 u64 | 快照数 u64 | 魔数 b"OSCI" | 保留 4 字节
+
+类型沿用 trace_format 的 KIND_PAGING / KIND_PARTITION。文件尾缺失（写到一半被
+中断）时按快照头逐份扫描重建索引。快照用 pickle 保存，只应打开可信的检查点文件。
+"""
+import os
+import pickle
+import struct
+import zlib
+from bisect import bisect_right
+
+from trace_format import KIND_PAGING, KIND_PARTITION
+
+MAGIC = b"OSCK"
+INDEX_MAGIC = b"OSCI"
+VERSION = 1
+
+HEADER = struct.Struct("<4sHH8x")
+SNAPSHOT = struct.Struct("<QQ")
+INDEX_ENTRY = struct.Struct("<QQQ")
+FOOTER = struct.Struct("<QQ4s4x")
+
+KINDS = (KIND_PAGING, KIND_PARTITION)
+
+
+def dumps(state, level=6):
+    return zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL), level)
+
+
+def loads(data, future=None):
+    """还原快照；快照中有 OPT 置换时用 future 重建它的下次访问位置"""
+    state = pickle.loads(zlib.decompress(data))
+    if future is not None:
+        managers = state if isinstance(state, tuple) else (state,)
+        for manager in managers:
+            if hasattr(manager, "attach_future"):
+                manager.attach_future(future)
+    return state
+
+
+class CheckpointWriter:
+    """把快照依次追加到检查点文件，close() 时写出索引"""
+
+    def __init__(self, path, kind=KIND_PAGING, every=100_000):
+        if kind not in KINDS:
+            raise ValueError(f"未知的检查点类型: {kind}")
+        if every <= 0:
+            raise ValueError("检查点间隔必须大于 0")
+        self.path = path
+        self.kind = kind
+        self.every = every
+        self.index = []  # (步数, 快照数据偏移, 长度)
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, kind))
+
+    def save(self, step, state):
+        if self.index and step <= self.index[-1][0]:
+            raise ValueError(f"检查点步数必须递增: {step}")
+        data = dumps(state)
+        self._file.write(SNAPSHOT.pack(step, len(data)))
+        self.index.append((step, self._file.tell(), len(data)))
+        self._file.write(data)
+
+    def close(self):
+        if self._file.closed:
+            return
+        offset = self._file.tell()
+        self._file.write(b"".join(INDEX_ENTRY.pack(*entry) for entry in self.index))
+        self._file.write(FOOTER.pack(offset, len(self.index), INDEX_MAGIC))
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class CheckpointReader:
+    """按步数查找检查点文件中的快照"""
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = os.fstat(self._file.fileno()).st_size
+            header = self._file.read(HEADER.size)
+            if len(header) < HEADER.size:
+                raise ValueError(f"{path} 不是检查点文件")
+            magic, version, self.kind = HEADER.unpack(header)
+            if magic != MAGIC:
+                raise ValueError(f"{path} 不是检查点文件")
+            if version != VERSION:
+                raise ValueError(f"不支持的检查点版本: {version}")
+            self.index = self._read_index(size)
+        except Exception:
+            self._file.close()
+            raise
+        self.steps = [step for step, _, _ in self.index]
+
+    def _read_index(self, size):
+        if size >= HEADER.size + FOOTER.size:
+            self._file.seek(size - FOOTER.size)
+            offset, count, magic = FOOTER.unpack(self._file.read(FOOTER.size))
+            if magic == INDEX_MAGIC and offset + count * INDEX_ENTRY.size + FOOTER.size == size:
+                self._file.seek(offset)
+                data = self._file.read(count * INDEX_ENTRY.size)
+                return list(INDEX_ENTRY.iter_unpack(data))
+        # 没有索引: 从头逐份扫描，丢弃最后一份不完整的快照
+        index = []
+        position = HEADER.size
+        while position + SNAPSHOT.size <= size:
+            self._file.seek(position)
+            step, length = SNAPSHOT.unpack(self._file.read(SNAPSHOT.size))
+            position += SNAPSHOT.size
+            if position + length > size:
+                break
+            index.append((step, position, length))
+            position += length
+        return index
+
+    def __len__(self):
+        return len(self.index)
+
+    def load(self, i, future=None):
+        """第 i 份快照，返回 (步数, 状态)"""
+        step, offset, length = self.index[i]
+        self._file.seek(offset)
+        return step, loads(self._file.read(length), future)
+
+    def nearest(self, step=None, future=None):
+        """不晚于 step 的最近一份快照，step 为 None 时取最后一份；没有时返回 None"""
+        i = len(self.steps) if step is None else bisect_right(self.steps, step)
+        if i == 0:
+            return None
+        return self.load(i - 1, future)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryCheckpoints:
+    """保存在内存中的检查点，供界面来回跳转
+
+    快照按步数保存；从较早的状态重新执行出不同的历史时用 discard_after 丢掉作废的快照。
+    """
+
+    def __init__(self, every=1000):
+        self.every = every
+        self.steps = []
+        self.snapshots = []
+
+    def __len__(self):
+        return len(self.steps)
+
+    def save(self, step, state):
+        i = bisect_right(self.steps, step)
+        if i and self.steps[i - 1] == step:
+            self.snapshots[i - 1] = dumps(state, 1)
+            return
+        self.steps.insert(i, step)
+        self.snapshots.insert(i, dumps(state, 1))
+
+    def due(self, step):
+        """第 step 步是否该存快照（还没有这一步的快照且步数是 every 的倍数）"""
+        return step % self.every == 0 and not (self.steps and self.steps[-1] >= step)
+
+    def nearest(self, step, future=None):
+        i = bisect_right(self.steps, step)
+        if i == 0:
+            return None
+        return self.steps[i - 1], loads(self.snapshots[i - 1], future)
+
+    def discard_after(self, step):
+        i = bisect_right(self.steps, step)
+        del self.steps[i:]
+        del self.snapshots[i:]
+
+    def clear(self):
+        self.steps.clear()
+        self.snapshots.clear()
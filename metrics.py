@@ -0,0 +1,265 @@
+"""运行指标: 计数器、延迟直方图及其导出
+
+instrument_paging(manager) / instrument_partition(allocator) 在对象实例上用计时包装
+替换热点方法（access_page、handle_page_fault、unload_frame，或 allocate、release），
+类本身不改动。不调用它们时没有任何额外开销；uninstrument() 去掉包装后也恢复原状。
+
+计数器:
+
+- paging_hits / paging_faults: 访问命中与缺页
+- paging_evictions / paging_dirty_writebacks: 换出的页及其中需要写回的脏页
+- partition_allocations / partition_allocation_failures / partition_releases
+- partition_coalesces: 释放时与相邻空闲区（伙伴）合并的次数
+- partition_compactions / partition_bytes_moved: 紧凑次数和搬移的总大小
+
+直方图按 2 的幂分桶记录纳秒延迟，分区分配和释放按算法分别统计，
+紧凑的耗时也计入所在的分配或释放。
+导出格式为 JSON（to_json）或 Prometheus 文本格式（to_prometheus）。
+"""
+import json
+import time
+
+from partition_core import BuddyAllocator, SlabAllocator
+
+BUCKETS = 32  # 第 i 桶为 [2^(i-1), 2^i) 纳秒，最后一桶收容更慢的
+
+
+class Histogram:
+    """按 2 的幂分桶的延迟直方图（纳秒）"""
+
+    def __init__(self):
+        self.buckets = [0] * BUCKETS
+        self.count = 0
+        self.sum = 0
+
+    def observe(self, ns):
+        self.buckets[min(ns.bit_length(), BUCKETS - 1)] += 1
+        self.count += 1
+        self.sum += ns
+
+    def quantile(self, q):
+        """分位数的估计值，取所在桶的上界"""
+        if not self.count:
+            return 0
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= target:
+                return 1 << i
+        return 1 << (BUCKETS - 1)
+
+    def to_dict(self):
+        return {
+            "count": self.count,
+            "sum_ns": self.sum,
+            "mean_ns": self.sum / self.count if self.count else 0.0,
+            "p50_ns": self.quantile(0.5),
+            "p90_ns": self.quantile(0.9),
+            "p99_ns": self.quantile(0.99),
+            "buckets": {str(1 << i): n for i, n in enumerate(self.buckets) if n},
+        }
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Metrics:
+    def __init__(self):
+        self.counters = {}
+        self.histograms = {}  # (名称, 标签) → Histogram，标签为 ((键, 值), ...)
+
+    def inc(self, name, amount=1):
+        self.counters[name] = self.counters.get(name, 0) + amount
+
+    def histogram(self, name, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        histogram = self.histograms.get(key)
+        if histogram is None:
+            histogram = self.histograms[key] = Histogram()
+        return histogram
+
+    def to_dict(self):
+        return {
+            "counters": dict(sorted(self.counters.items())),
+            "histograms": {_series(name, labels): histogram.to_dict()
+                           for (name, labels), histogram in sorted(self.histograms.items())},
+        }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+
+    def to_prometheus(self, prefix="oslab"):
+        """Prometheus 文本格式，计数器加 _total 后缀，直方图以秒为单位"""
+        lines = []
+        for name, value in sorted(self.counters.items()):
+            full = f"{prefix}_{name}_total"
+            lines += [f"# TYPE {full} counter", f"{full} {value}"]
+        declared = set()
+        for (name, labels), histogram in sorted(self.histograms.items()):
+            full = f"{prefix}_{name}_seconds"
+            if full not in declared:
+                declared.add(full)
+                lines.append(f"# TYPE {full} histogram")
+            cumulative = 0
+            for i in range(BUCKETS - 1):
+                cumulative += histogram.buckets[i]
+                le = (("le", f"{(1 << i) / 1e9:.9g}"),)
+                lines.append(f"{_series(full + '_bucket', labels + le)} {cumulative}")
+            lines.append(f"{_series(full + '_bucket', labels + (('le', '+Inf'),))} {histogram.count}")
+            lines.append(f"{_series(full + '_sum', labels)} {histogram.sum / 1e9:.9g}")
+            lines.append(f"{_series(full + '_count', labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def export(self, fmt="json"):
+        if fmt == "json":
+            return self.to_json() + "\n"
+        if fmt == "prometheus":
+            return self.to_prometheus()
+        raise ValueError(f"未知的指标格式: {fmt}")
+
+
+EXPORT_FORMATS = ("json", "prometheus")
+
+_WRAPPED = ("access_page", "handle_page_fault", "unload_frame", "allocate", "release", "compact")
+
+
+def instrument_paging(manager, metrics=None):
+    """给 PagingManager 实例挂上计数和计时，返回所用的 Metrics"""
+    if metrics is None:
+        metrics = Metrics()
+    clock = time.perf_counter_ns
+    counters = metrics.counters
+    for name in ("paging_hits", "paging_faults", "paging_evictions", "paging_dirty_writebacks"):
+        counters.setdefault(name, 0)
+    access_page = manager.access_page
+    handle_page_fault = manager.handle_page_fault
+    unload_frame = manager.unload_frame
+    access_histogram = metrics.histogram("paging_access_page")
+    fault_histogram = metrics.histogram("paging_handle_page_fault")
+
+    def timed_access_page(job_id, page_number, operation, offset):
+        started = clock()
+        result = access_page(job_id, page_number, operation, offset)
+        access_histogram.observe(clock() - started)
+        counters["paging_faults" if result[1] else "paging_hits"] += 1
+        return result
+
+    def timed_handle_page_fault(job_id, page_number):
+        started = clock()
+        result = handle_page_fault(job_id, page_number)
+        fault_histogram.observe(clock() - started)
+        return result
+
+    def counted_unload_frame(frame):
+        job_id, page_number = manager.frame_table[frame]
+        if manager.page_tables[job_id][page_number].modified:
+            counters["paging_dirty_writebacks"] += 1
+        counters["paging_evictions"] += 1
+        return unload_frame(frame)
+
+    # access_page 内部经 self.handle_page_fault 等调用，实例属性会优先于类中的方法
+    manager.access_page = timed_access_page
+    manager.handle_page_fault = timed_handle_page_fault
+    manager.unload_frame = counted_unload_frame
+    manager.metrics = metrics
+    return metrics
+
+
+def _free_table_state(allocator):
+    """(空闲分区数, 从空闲分区表划出的块数)，释放前后之差给出合并次数"""
+    backend = allocator.backend
+    if isinstance(backend, BuddyAllocator):
+        return sum(map(len, backend.free)), len(backend.orders)
+    if isinstance(backend, SlabAllocator):
+        # slab 内部的对象不进出后备分区表，只有整块 slab 或大块归还时才可能合并
+        return len(backend.backing), len(backend.slabs) + len(backend.large)
+    return len(backend.memory), len(allocator.allocated)
+
+
+def instrument_partition(allocator, metrics=None):
+    """给 PartitionAllocator 实例挂上计数和计时，返回所用的 Metrics"""
+    if metrics is None:
+        metrics = Metrics()
+    clock = time.perf_counter_ns
+    counters = metrics.counters
+    for name in ("partition_allocations", "partition_allocation_failures", "partition_releases",
+                 "partition_coalesces", "partition_compactions", "partition_bytes_moved"):
+        counters.setdefault(name, 0)
+    allocate = allocator.allocate
+    release = allocator.release
+    compact = allocator.compact
+    compact_histogram = metrics.histogram("partition_compact")
+    compacted_holes = 0  # 本次释放中紧凑合并掉的空闲分区数，不算作释放时的合并
+    allocate_histograms = {}  # 算法 → 直方图，切换算法后分开统计
+    release_histograms = {}
+
+    def histogram_of(histograms, name):
+        histogram = histograms.get(allocator.algorithm)
+        if histogram is None:
+            histogram = histograms[allocator.algorithm] = metrics.histogram(
+                name, algorithm=allocator.algorithm)
+        return histogram
+
+    def timed_allocate(size, pid=None):
+        started = clock()
+        result = allocate(size, pid)
+        histogram_of(allocate_histograms, "partition_allocate").observe(clock() - started)
+        counters["partition_allocation_failures" if result is None else "partition_allocations"] += 1
+        return result
+
+    def timed_release(pid):
+        nonlocal compacted_holes
+        compacted_holes = 0
+        holes, blocks = _free_table_state(allocator)
+        started = clock()
+        result = release(pid)
+        elapsed = clock() - started
+        if result is not None:
+            histogram_of(release_histograms, "partition_release").observe(elapsed)
+            counters["partition_releases"] += 1
+            after_holes, after_blocks = _free_table_state(allocator)
+            # 归还的块先成为一个新空闲分区，每合并一次空闲分区数减一
+            merged = (holes - after_holes) + (blocks - after_blocks) - compacted_holes
+            counters["partition_coalesces"] += merged
+        return result
+
+    def timed_compact(size=None):
+        nonlocal compacted_holes
+        holes = _free_table_state(allocator)[0]
+        started = clock()
+        moves = compact(size)
+        elapsed = clock() - started
+        if moves:
+            compact_histogram.observe(elapsed)
+            counters["partition_compactions"] += 1
+            counters["partition_bytes_moved"] += sum(move[3] for move in moves)
+            compacted_holes += holes - _free_table_state(allocator)[0]
+        return moves
+
+    # allocate / release 内部经 self.compact 调用，同样会走到包装
+    allocator.allocate = timed_allocate
+    allocator.release = timed_release
+    allocator.compact = timed_compact
+    allocator.metrics = metrics
+    return metrics
+
+
+def uninstrument(target):
+    """去掉 instrument_* 挂上的包装"""
+    for name in _WRAPPED:
+        target.__dict__.pop(name, None)
+    target.metrics = None
+
+
+def write_metrics(metrics, path, fmt="json"):
+    """把指标写到文件，path 为 - 时输出到标准输出"""
+    text = metrics.export(fmt)
+    if path == "-":
+        print(text, end="")
+        return
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
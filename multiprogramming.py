@@ -0,0 +1,324 @@
+"""多道程序下的分页模拟
+
+多个作业的访问序列按时间片轮转交替执行，共享同一个 PagingManager 的物理块。
+时间以一次访存为单位: CPU 每个单位执行一次访问；作业缺页时阻塞，由一台分页磁盘
+按先来先服务花 fault_time 个单位调入页面，期间 CPU 运行其他就绪作业，没有就绪
+作业时 CPU 空闲。道数增加到一定程度后每个作业分到的块太少，缺页率陡增，磁盘成为
+瓶颈，CPU 利用率反而下降，即出现抖动。
+
+物理块的分配方式:
+
+- 固定分配: 空闲块平均分给各作业，局部置换；或全局置换，所有作业共用空闲块池。
+- 工作集 (WorkingSetAllocation): 作业最近 window 次访问中用到的页构成工作集，
+  缺页时按工作集大小增加块，页面移出工作集时立即收回其块。
+- 缺页频率 (PFFAllocation): 两次缺页间隔小于 threshold 次访问时增加一块，
+  否则收回自上次缺页以来未被访问的页。
+
+开启负载控制时，作业要增加块而空闲块池已空，就把该作业整个换出挂起，
+等空闲块足够容纳它挂起前的驻留集时再调入，以此避免抖动。
+
+用法: python multiprogramming.py a.txt b.txt --levels 1,2,4,8 --allocation ws --window 500
+"""
+import argparse
+import heapq
+import sys
+from collections import OrderedDict, deque
+
+from page_tables import PAGE_TABLES
+from paging_core import PagingManager
+from paging_replay import read_trace
+from replacement import POLICIES
+
+
+class WorkingSetAllocation:
+    """工作集分配: 块数跟随最近 window 次访问用到的页数"""
+    name = "ws"
+
+    def __init__(self, window=1000):
+        if window <= 0:
+            raise ValueError("工作集窗口必须大于 0")
+        self.window = window
+        self.recent = {}  # 作业 → OrderedDict(页号 → 最近一次访问时刻)，按时刻先后
+        self.clock = {}  # 作业 → 该作业已执行的访问次数（虚拟时间）
+
+    def attach(self, manager, job_id):
+        self.recent[job_id] = OrderedDict()
+        self.clock[job_id] = 0
+
+    def demand(self, job_id):
+        return len(self.recent[job_id])
+
+    def before_fault(self, manager, job_id, page):
+        """缺页前调用，需要增加块但空闲块池已空时返回 False"""
+        if manager.job_free_frames[job_id]:
+            return True
+        recent = self.recent[job_id]
+        size = len(recent) + (page not in recent)
+        if size > manager.job_frame_count(job_id) or not manager.job_frame_count(job_id):
+            return manager.grow_job(job_id)
+        return True
+
+    def after_access(self, manager, job_id, page, fault):
+        now = self.clock[job_id] = self.clock[job_id] + 1
+        recent = self.recent[job_id]
+        recent[page] = now
+        recent.move_to_end(page)
+        table = manager.page_tables[job_id]
+        # 移出工作集的页立即换出，块还给空闲块池
+        while True:
+            oldest, last = next(iter(recent.items()))
+            if last > now - self.window:
+                break
+            del recent[oldest]
+            entry = table[oldest]
+            if entry.present:
+                manager.shrink_job(job_id, entry.frame_number)
+
+
+class PFFAllocation:
+    """缺页频率分配: 缺页太频繁就加块，缺页稀疏就收回最近没用到的页"""
+    name = "pff"
+
+    def __init__(self, threshold=100):
+        if threshold <= 0:
+            raise ValueError("缺页频率阈值必须大于 0")
+        self.threshold = threshold
+        self.clock = {}
+        self.last_fault = {}
+        self.used = {}  # 作业 → 自上次缺页以来访问过的页
+
+    def attach(self, manager, job_id):
+        self.clock[job_id] = 0
+        self.last_fault[job_id] = 0
+        self.used[job_id] = set()
+
+    def demand(self, job_id):
+        return max(1, len(self.used[job_id]))
+
+    def before_fault(self, manager, job_id, page):
+        used = self.used[job_id]
+        interval = self.clock[job_id] - self.last_fault[job_id]
+        self.last_fault[job_id] = self.clock[job_id]
+        if interval >= self.threshold:
+            for frame in list(manager.allocated_frames[job_id]):
+                owner = manager.frame_table.get(frame)
+                if owner is not None and owner[1] not in used:
+                    manager.shrink_job(job_id, frame)
+        used.clear()
+        if manager.job_free_frames[job_id]:
+            return True
+        if interval < self.threshold or not manager.job_frame_count(job_id):
+            return manager.grow_job(job_id)
+        return True
+
+    def after_access(self, manager, job_id, page, fault):
+        self.clock[job_id] += 1
+        self.used[job_id].add(page)
+
+
+ALLOCATIONS = {
+    "fixed": None,
+    "ws": WorkingSetAllocation,
+    "pff": PFFAllocation,
+}
+
+
+class MixStats:
+    def __init__(self, jobs):
+        self.jobs = jobs
+        self.accesses = 0
+        self.faults = 0
+        self.writebacks = 0
+        self.elapsed = 0  # 总时间（访存次数为单位）
+        self.busy = 0  # CPU 执行访问的时间
+        self.suspensions = 0
+        self.job_faults = {}
+
+    @property
+    def utilization(self):
+        return self.busy / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def fault_ratio(self):
+        return self.faults / self.accesses if self.accesses else 0.0
+
+    def report(self):
+        lines = [
+            f"作业道数: {self.jobs}",
+            f"访问次数: {self.accesses}",
+            f"缺页次数: {self.faults}",
+            f"缺页率: {self.fault_ratio:.4%}",
+            f"写回次数: {self.writebacks}",
+            f"总时间: {self.elapsed}",
+            f"CPU 利用率: {self.utilization:.2%}",
+            f"挂起次数: {self.suspensions}",
+        ]
+        lines += [f"  {job}: 缺页 {faults}" for job, faults in self.job_faults.items()]
+        return "\n".join(lines)
+
+
+def run_mix(manager, traces, quantum=100, fault_time=1000, allocation=None, load_control=False):
+    """按时间片轮转交替执行多个作业的访问序列，返回 MixStats
+
+    traces: {作业: [(操作, 页号, 页内地址)]}。作业尚未在 manager 中创建时，固定分配的
+    局部置换把空闲块平均分给各作业，工作集/缺页频率分配从 0 块开始按需增加。
+    """
+    if allocation is not None and manager.scope != "local":
+        raise ValueError("工作集和缺页频率分配只适用于局部置换")
+    jobs = list(traces)
+    share = len(manager.free_frames) // len(jobs)
+    for job in jobs:
+        if job in manager.page_tables:
+            continue
+        if manager.scope == "global":
+            manager.create_job(job)
+        elif allocation is not None:
+            manager.create_job(job, 0, future=[page for _, page, _ in traces[job]])
+        else:
+            if share == 0:
+                raise ValueError(f"物理块不足以分给 {len(jobs)} 个作业")
+            manager.create_job(job, share, future=[page for _, page, _ in traces[job]])
+        if allocation is not None:
+            allocation.attach(manager, job)
+
+    stats = MixStats(len(jobs))
+    stats.job_faults = dict.fromkeys(jobs, 0)
+    position = dict.fromkeys(jobs, 0)
+    ready = deque(jobs)
+    blocked = []  # (I/O 完成时刻, 序号, 作业)
+    suspended = deque()  # (作业, 调入所需块数)
+    active = len(jobs)  # 未挂起且未结束的作业数
+    now = disk_free = sequence = 0
+
+    def can_fault(job, page):
+        if allocation is not None and not allocation.before_fault(manager, job, page):
+            # 需要加块但空闲块池已空: 负载控制时挂起；没有块可置换时只能挂起
+            return not load_control and manager.job_frame_count(job) > 0 or active == 1
+        if manager.scope == "global":
+            return bool(manager.free_frames) or len(manager.frame_table) > 0
+        return manager.job_frame_count(job) > 0
+
+    while ready or blocked or suspended:
+        # 空闲块足够时调入挂起的作业
+        while suspended and (len(manager.free_frames) >= suspended[0][1] or not (ready or blocked)):
+            ready.append(suspended.popleft()[0])
+            active += 1
+        while blocked and blocked[0][0] <= now:
+            ready.append(heapq.heappop(blocked)[2])
+        if not ready:
+            if blocked:
+                now = blocked[0][0]  # CPU 空闲，等待磁盘
+            continue
+
+        job = ready.popleft()
+        trace = traces[job]
+        table = manager.page_tables[job]
+        state = "quantum"
+        for _ in range(quantum):
+            if position[job] == len(trace):
+                state = "done"
+                break
+            op, page, offset = trace[position[job]]
+            if page not in table:
+                manager.add_page(page, None, job)
+            if not table[page].present and not can_fault(job, page):
+                state = "suspend"
+                break
+            fault = manager.access_page(job, page, op, offset)[1]
+            position[job] += 1
+            now += 1
+            stats.busy += 1
+            stats.accesses += 1
+            if allocation is not None:
+                allocation.after_access(manager, job, page, fault)
+            if fault:
+                stats.faults += 1
+                stats.job_faults[job] += 1
+                disk_free = max(disk_free, now) + fault_time
+                sequence += 1
+                heapq.heappush(blocked, (disk_free, sequence, job))
+                state = "blocked"
+                break
+        if state == "quantum":
+            ready.append(job)
+        elif state == "done":
+            manager.release_job(job)
+            active -= 1
+        elif state == "suspend":
+            demand = allocation.demand(job) if allocation is not None else manager.job_frame_count(job)
+            manager.release_job(job)
+            suspended.append((job, max(1, demand)))
+            stats.suspensions += 1
+            active -= 1
+    stats.elapsed = now
+    stats.writebacks = manager.writeback_count
+    return stats
+
+
+def thrashing_curve(traces, levels, total_memory=64 * 1024, block_size=1024, policy="LRU",
+                    scope="local", page_table="dict", allocation="fixed", window=1000,
+                    threshold=100, quantum=100, fault_time=1000, load_control=False):
+    """依次以 levels 中的道数运行作业（访问序列不够时循环使用），返回 [(道数, MixStats)]"""
+    rows = []
+    for level in levels:
+        mix = {f"job{i + 1}": traces[i % len(traces)] for i in range(level)}
+        manager = PagingManager(total_memory, block_size, policy=policy, page_table=page_table,
+                                scope=scope)
+        if allocation == "ws":
+            controller = WorkingSetAllocation(window)
+        elif allocation == "pff":
+            controller = PFFAllocation(threshold)
+        else:
+            controller = None
+        rows.append((level, run_mix(manager, mix, quantum, fault_time, controller, load_control)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多道程序分页模拟，寻找抖动开始的道数")
+    parser.add_argument("traces", nargs="+", help="各作业的访问序列文件（文本或二进制）")
+    parser.add_argument("--levels", default="1,2,3,4,6,8", help="要比较的作业道数，逗号分隔")
+    parser.add_argument("--memory", type=int, default=64 * 1024, help="物理内存总量(字节)")
+    parser.add_argument("--block-size", type=int, default=1024, help="页面/块大小(字节)")
+    parser.add_argument("--policy", default="LRU", type=str.upper, choices=list(POLICIES),
+                        help="页面置换策略")
+    parser.add_argument("--scope", default="local", choices=["local", "global"], help="局部/全局置换")
+    parser.add_argument("--page-table", default="dict", choices=list(PAGE_TABLES), help="页表存储方式")
+    parser.add_argument("--allocation", default="fixed", choices=list(ALLOCATIONS), help="物理块分配方式")
+    parser.add_argument("--window", type=int, default=1000, help="工作集窗口(访问次数)")
+    parser.add_argument("--pff-threshold", type=int, default=100, help="缺页频率阈值(两次缺页间的访问次数)")
+    parser.add_argument("--quantum", type=int, default=100, help="时间片(访问次数)")
+    parser.add_argument("--fault-time", type=int, default=1000, help="调入一页的时间(访存次数)")
+    parser.add_argument("--load-control", action="store_true", help="空闲块不足时挂起作业")
+    args = parser.parse_args(argv)
+
+    try:
+        levels = [int(level) for level in args.levels.split(",")]
+    except ValueError:
+        parser.error(f"无法解析的道数: {args.levels}")
+    if args.window <= 0:
+        parser.error("--window 必须大于 0")
+    if args.pff_threshold <= 0:
+        parser.error("--pff-threshold 必须大于 0")
+    traces = [list(read_trace(path)) for path in args.traces]
+    try:
+        rows = thrashing_curve(traces, levels, args.memory, args.block_size, args.policy, args.scope,
+                               args.page_table, args.allocation, args.window, args.pff_threshold,
+                               args.quantum, args.fault_time, args.load_control)
+    except ValueError as exc:
+        parser.error(str(exc))
+
+    print(f"{'道数':>4} {'访问次数':>10} {'缺页次数':>8} {'缺页率':>8} {'挂起':>5} {'CPU利用率':>9}")
+    for level, stats in rows:
+        print(f"{level:>6} {stats.accesses:>14} {stats.faults:>12} {stats.fault_ratio:>11.2%} "
+              f"{stats.suspensions:>7} {stats.utilization:>12.2%}")
+    best = max(rows, key=lambda row: row[1].utilization)[0]
+    if best != rows[-1][0]:
+        print(f"CPU 利用率在 {best} 道时最高，继续增加道数开始抖动")
+    else:
+        print("CPU 利用率在所测范围内随道数增加而上升，尚未出现抖动")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""页表的几种存储方式
+
+- DictPageTable: 页号 → PageTableEntry 对象的字典，每页一个 Python 对象，
+  最灵活，界面默认使用。
+- ArrayPageTable: 按页号直接下标的紧凑数组，块号 int32、磁盘位置 int64、
+  标志位（已登记/存在/修改）压在一个字节里，每页 13 字节。适合页号连续的地址空间。
+- TwoLevelPageTable: 二级页表，页号高位查目录（字典），低位查叶表；叶表同样是
+  紧凑数组，第一次用到时才分配。适合 32/48 位这类大而稀疏的地址空间。
+
+三种页表对外都像字典一样按页号取页表项，取出的页表项都有 present、frame_number、
+modified、disk_location 属性；数组页表返回的是直接读写数组的视图对象。
+页号不能为负数: 登记时抛出 ValueError，查找时当作不存在。
+"""
+import sys
+from array import array
+
+VALID = 1  # 该页已登记
+PRESENT = 2
+MODIFIED = 4
+
+
+def _check_page_number(page_number):
+    if page_number < 0:
+        raise ValueError(f"页号不能为负数: {page_number}")
+
+
+class PageTableEntry:
+    def __init__(self, page_number, disk_location):
+        self.page_number = page_number
+        self.present = False
+        self.frame_number = -1
+        self.modified = False
+        self.disk_location = disk_location
+
+
+class DictPageTable(dict):
+    def add(self, page_number, disk_location):
+        entry = self[page_number] = PageTableEntry(page_number, disk_location)
+        return entry
+
+    def __setitem__(self, page_number, entry):
+        _check_page_number(page_number)
+        super().__setitem__(page_number, entry)
+
+    def memory_usage(self):
+        """页表占用的字节数（字典本身加上每个页表项对象）"""
+        return sys.getsizeof(self) + sum(
+            sys.getsizeof(entry) + sys.getsizeof(entry.__dict__) for entry in self.values())
+
+
+class _PackedEntries:
+    """一段连续页号的页表项，按字段分别存在数组里"""
+    __slots__ = ("base", "frames", "disks", "flags")
+
+    def __init__(self, base, size=0):
+        self.base = base
+        self.frames = array("i", [-1]) * size
+        self.disks = array("q", [0]) * size
+        self.flags = bytearray(size)
+
+    def grow(self, size):
+        extra = size - len(self.flags)
+        if extra > 0:
+            self.frames.extend(array("i", [-1]) * extra)
+            self.disks.extend(array("q", [0]) * extra)
+            self.flags.extend(bytes(extra))
+
+    def memory_usage(self):
+        return (sys.getsizeof(self.frames) + sys.getsizeof(self.disks)
+                + sys.getsizeof(self.flags) + sys.getsizeof(self))
+
+
+class PackedEntryView:
+    """数组页表中一个页表项的读写视图"""
+    __slots__ = ("_entries", "_index", "page_number")
+
+    def __init__(self, entries, index, page_number):
+        self._entries = entries
+        self._index = index
+        self.page_number = page_number
+
+    def _set_flag(self, flag, value):
+        flags = self._entries.flags
+        if value:
+            flags[self._index] |= flag
+        else:
+            flags[self._index] &= ~flag
+
+    @property
+    def present(self):
+        return bool(self._entries.flags[self._index] & PRESENT)
+
+    @present.setter
+    def present(self, value):
+        self._set_flag(PRESENT, value)
+
+    @property
+    def modified(self):
+        return bool(self._entries.flags[self._index] & MODIFIED)
+
+    @modified.setter
+    def modified(self, value):
+        self._set_flag(MODIFIED, value)
+
+    @property
+    def frame_number(self):
+        return self._entries.frames[self._index]
+
+    @frame_number.setter
+    def frame_number(self, value):
+        self._entries.frames[self._index] = value
+
+    @property
+    def disk_location(self):
+        return self._entries.disks[self._index]
+
+    @disk_location.setter
+    def disk_location(self, value):
+        self._entries.disks[self._index] = value
+
+
+class _PackedPageTable:
+    """数组页表的公共部分，子类实现 _locate(page, create) → (叶表, 下标)，页号已检查过非负"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def _lookup(self, page_number, create):
+        """检查页号后交给子类的 _locate；负页号查找时当作不存在"""
+        if page_number < 0:
+            if create:
+                _check_page_number(page_number)
+            return None, 0
+        return self._locate(page_number, create)
+
+    def __contains__(self, page_number):
+        entries, index = self._lookup(page_number, False)
+        return entries is not None and bool(entries.flags[index] & VALID)
+
+    def __getitem__(self, page_number):
+        entries, index = self._lookup(page_number, False)
+        if entries is None or not entries.flags[index] & VALID:
+            raise KeyError(page_number)
+        return PackedEntryView(entries, index, page_number)
+
+    def get(self, page_number, default=None):
+        try:
+            return self[page_number]
+        except KeyError:
+            return default
+
+    def add(self, page_number, disk_location):
+        entries, index = self._lookup(page_number, True)
+        if not entries.flags[index] & VALID:
+            self.count += 1
+        entries.flags[index] = VALID
+        entries.frames[index] = -1
+        entries.disks[index] = disk_location
+        return PackedEntryView(entries, index, page_number)
+
+    def __setitem__(self, page_number, entry):
+        view = self.add(page_number, entry.disk_location)
+        view.frame_number = entry.frame_number
+        view.present = entry.present
+        view.modified = entry.modified
+
+    def keys(self):
+        return iter(self)
+
+    def values(self):
+        return (self[page] for page in self)
+
+    def items(self):
+        return ((page, self[page]) for page in self)
+
+    def _iter_leaves(self):
+        raise NotImplementedError
+
+    def __iter__(self):
+        for entries in self._iter_leaves():
+            flags = entries.flags
+            base = entries.base
+            for index in range(len(flags)):
+                if flags[index] & VALID:
+                    yield base + index
+
+
+class ArrayPageTable(_PackedPageTable):
+    """按页号直接下标的紧凑数组页表，数组随最大页号增长"""
+
+    def __init__(self):
+        super().__init__()
+        self.entries = _PackedEntries(0)
+
+    def _locate(self, page_number, create):
+        if page_number >= len(self.entries.flags):
+            if not create:
+                return None, 0
+            # 按倍数扩容，摊还 O(1)
+            self.entries.grow(max(page_number + 1, 2 * len(self.entries.flags)))
+        return self.entries, page_number
+
+    def _iter_leaves(self):
+        yield self.entries
+
+    def memory_usage(self):
+        return sys.getsizeof(self) + self.entries.memory_usage()
+
+
+class TwoLevelPageTable(_PackedPageTable):
+    """二级页表: 目录按页号高位索引，叶表（紧凑数组）在第一次用到时分配"""
+
+    def __init__(self, leaf_bits=10):
+        super().__init__()
+        self.leaf_bits = leaf_bits
+        self.leaf_mask = (1 << leaf_bits) - 1
+        self.directory = {}  # 页号高位 → 叶表
+
+    def _locate(self, page_number, create):
+        top = page_number >> self.leaf_bits
+        leaf = self.directory.get(top)
+        if leaf is None:
+            if not create:
+                return None, 0
+            leaf = self.directory[top] = _PackedEntries(top << self.leaf_bits, 1 << self.leaf_bits)
+        return leaf, page_number & self.leaf_mask
+
+    def _iter_leaves(self):
+        for top in sorted(self.directory):
+            yield self.directory[top]
+
+    def memory_usage(self):
+        return (sys.getsizeof(self) + sys.getsizeof(self.directory)
+                + sum(leaf.memory_usage() for leaf in self.directory.values()))
+
+
+PAGE_TABLES = {
+    "dict": DictPageTable,
+    "array": ArrayPageTable,
+    "two-level": TwoLevelPageTable,
+}
+
+
+def make_page_table(kind="dict"):
+    if kind not in PAGE_TABLES:
+        raise ValueError(f"未知的页表类型: {kind}")
+    return PAGE_TABLES[kind]()
@@ -0,0 +1,294 @@
+from collections import deque
+
+from page_tables import PageTableEntry, make_page_table
+from replacement import OPTPolicy, make_policy
+
+
+INITIAL_FRAMES = [5, 8, 9, 1]  # 演示作业手动分配的物理块
+
+
+class PagingManager:
+    """分页存储管理
+
+    每个作业有自己的页表，物理块从公共的空闲块池 free_frames 中分配。
+    scope 为 "local" 时各作业只在自己分得的块中置换（局部置换），
+    为 "global" 时所有作业共用空闲块池和同一个置换策略实例（全局置换）。
+    """
+
+    def __init__(self, total_memory=64 * 1024, block_size=1024, job_blocks=4, policy="FIFO", future=None,
+                 page_table="dict", scope="local"):
+        if scope not in ("local", "global"):
+            raise ValueError(f"未知的置换范围: {scope}")
+        if scope == "global" and policy.upper() == "OPT":
+            raise ValueError("全局置换不支持 OPT")
+        self.block_size = block_size
+        self.num_frames = total_memory // block_size
+        self.job_blocks = job_blocks
+        self.offset_bits = block_size.bit_length() - 1  # 页内地址位数（1024 → 10）
+        self.scope = scope
+
+        self.page_table_kind = page_table  # dict / array / two-level
+        self.page_table = make_page_table(page_table)  # 第一个作业的页表，单作业时即全部页表
+        self.page_tables = {}  # 作业 → 页表
+        self.free_frames = deque(sorted(set(range(self.num_frames)) - set(INITIAL_FRAMES)))
+        self.allocated_frames = {}  # 作业 → 分得的块（局部置换）
+        self.resident = {}  # 作业 → 驻留页数
+        self.policy_name = policy
+        self.future = future  # OPT 置换所需的完整页面访问序列
+        self.job_policy = {}  # 每个作业的置换策略实例，全局置换时都是同一个
+        self.global_policy = make_policy(policy) if scope == "global" else None
+        # 反向页表: 帧号 → (作业, 页号)，只记录已被占用的帧
+        self.frame_table = {}
+        self.job_free_frames = {}  # 作业已分得但尚未装入页面的帧
+
+        self.tlb = None  # 快表，为 None 时不模拟地址变换缓存
+        self.prefetcher = None  # 预调页策略（prefetch.Prefetcher），为 None 时只调入缺页的页
+        self.backing_store = None  # 换页磁盘模型（backing_store.BackingStore），为 None 时不计 I/O 代价
+        self.writeback_count = 0  # 写回磁盘次数
+        self.metrics = None  # 运行指标（metrics.Metrics），由 metrics.instrument_paging 挂上
+
+    def __getstate__(self):
+        # 检查点只保存模拟状态: metrics 挂上的计时包装和 OPT 的完整访问序列都不保存
+        state = dict(self.__dict__)
+        for name in ("access_page", "handle_page_fault", "unload_frame"):
+            state.pop(name, None)
+        state["metrics"] = None
+        state["future"] = None
+        return state
+
+    def attach_future(self, future):
+        """从检查点恢复后重新给出 OPT 所需的完整页面访问序列（OPT 只用于单作业回放）"""
+        self.future = future
+        for policy in self.job_policy.values():
+            if isinstance(policy, OPTPolicy):
+                policy.attach_future(future)
+
+    def _register(self, job_id, frames, future=None):
+        """为新作业建立页表、帧资源和置换策略"""
+        # 第一个作业沿用 self.page_table，单作业的调用方式保持不变
+        table = self.page_table if not self.page_tables else make_page_table(self.page_table_kind)
+        self.page_tables[job_id] = table
+        self.resident[job_id] = 0
+        if self.scope == "global":
+            self.allocated_frames[job_id] = []
+            self.free_frames.extend(frames)
+            self.job_free_frames[job_id] = self.free_frames
+            self.job_policy[job_id] = self.global_policy
+        else:
+            self.allocated_frames[job_id] = frames
+            self.job_free_frames[job_id] = deque(frames)
+            self.job_policy[job_id] = make_policy(self.policy_name,
+                                                  self.future if future is None else future)
+        return table
+
+    def allocate_job(self, job_id, pages):
+        """演示作业: 第一个作业用手动指定的块，其后的作业从空闲块池中取块，页 0~3 预先装入"""
+        if job_id in self.page_tables:
+            return
+        if not self.page_tables:
+            frames = list(INITIAL_FRAMES)  # 手动分配初始页
+        else:
+            frames = self._take_frames(len(INITIAL_FRAMES))
+        table = self._register(job_id, frames)
+
+        disk_loc_map = {0: 0x10, 1: 0x12, 2: 0x13, 3: 0x21,
+                        4: 0x22, 5: 0x23, 6: 0x125}
+        frame_map = dict(enumerate(frames))
+        free_frames = self.job_free_frames[job_id]
+
+        for page in pages:
+            disk_loc = disk_loc_map.get(page, page * 1000)
+            entry = PageTableEntry(page, disk_loc)
+            table[page] = entry
+            if page in [0, 1, 2, 3]:
+                frame = frame_map[page]
+                free_frames.remove(frame)
+                self.load_page(job_id, table[page], frame)
+                self.job_policy[job_id].admit(frame, page)
+
+    def _take_frames(self, count):
+        if len(self.free_frames) < count:
+            raise ValueError(f"空闲块不足: 需要{count}块, 剩余{len(self.free_frames)}块")
+        return [self.free_frames.popleft() for _ in range(count)]
+
+    def create_job(self, job_id, frames=None, future=None):
+        """从空闲块池中为作业分配 frames（默认 job_blocks）个物理块，页面一律按需调入
+
+        全局置换时作业不独占物理块，缺页时直接从公共空闲块池取块。
+        future 为该作业单独的 OPT 访问序列，默认用 self.future。
+        """
+        if job_id in self.page_tables:
+            return
+        if self.scope == "global":
+            self._register(job_id, [])
+            return
+        self._register(job_id, self._take_frames(self.job_blocks if frames is None else frames), future)
+
+    def grow_job(self, job_id):
+        """从空闲块池再给作业一个物理块，池空时返回 False（仅局部置换）"""
+        if not self.free_frames:
+            return False
+        frame = self.free_frames.popleft()
+        self.allocated_frames[job_id].append(frame)
+        self.job_free_frames[job_id].append(frame)
+        return True
+
+    def shrink_job(self, job_id, frame):
+        """收回作业的一个物理块，块中的页面被换出（仅局部置换）"""
+        if frame in self.frame_table:
+            self.job_policy[job_id].discard(frame)
+            self.unload_frame(frame)
+        else:
+            self.job_free_frames[job_id].remove(frame)
+        self.allocated_frames[job_id].remove(frame)
+        self.free_frames.append(frame)
+
+    def release_job(self, job_id):
+        """换出作业的全部页面并收回其所有物理块（作业挂起或结束）"""
+        if self.scope == "global":
+            for frame in [f for f, (job, _) in self.frame_table.items() if job == job_id]:
+                self.global_policy.discard(frame)
+                self.unload_frame(frame)
+                self.free_frames.append(frame)
+            return
+        for frame in list(self.allocated_frames[job_id]):
+            self.shrink_job(job_id, frame)
+
+    def job_frame_count(self, job_id):
+        """作业当前可用的物理块数（局部置换为分得的块数，全局置换为驻留页数）"""
+        if self.scope == "global":
+            return self.resident[job_id]
+        return len(self.allocated_frames[job_id])
+
+    def add_page(self, page_number, disk_location=None, job_id=None):
+        """登记一个尚不在页表中的页（未调入内存），job_id 缺省时登记到第一个作业的页表"""
+        if disk_location is None:
+            disk_location = page_number * 1000
+        table = self.page_table if job_id is None else self.page_tables[job_id]
+        return table.add(page_number, disk_location)
+
+    def access_page(self, job_id, page_number, operation, offset):
+        entry = self.page_tables[job_id][page_number]
+        if self.backing_store is not None:
+            self.backing_store.tick()
+        tlb = self.tlb
+        if tlb is not None and tlb.lookup(job_id, page_number) is None and entry.present:
+            # 快表未命中但页在内存: 查页表后填入快表
+            tlb.insert(job_id, page_number, entry.frame_number)
+        if entry.present:
+            if operation in ["save", "存(save)"]:
+                entry.modified = True
+            self.job_policy[job_id].access(entry.frame_number, page_number)
+            physical = (entry.frame_number << self.offset_bits) | offset
+            # 预取来的页第一次被用到时继续向前预取
+            if self.prefetcher is not None and self.prefetcher.first_use(job_id, page_number):
+                self.prefetch(job_id, page_number)
+            return physical, False, (None, None)
+        else:
+            victim_page, victim_frame = self.handle_page_fault(job_id, page_number)
+            if tlb is not None:
+                tlb.insert(job_id, page_number, entry.frame_number)
+            entry.modified = (operation in ["save", "存(save)"])
+            self.job_policy[job_id].access(entry.frame_number, page_number)
+            physical = (entry.frame_number << self.offset_bits) | offset
+            if self.prefetcher is not None:
+                self.prefetch(job_id, page_number)
+            return physical, True, (victim_page, victim_frame)
+
+    def prefetch(self, job_id, page_number):
+        """按预取器的预测把若干页一并调入空闲块（或置换策略最先淘汰的冷块）"""
+        prefetcher = self.prefetcher
+        table = self.page_tables[job_id]
+        free_frames = self.job_free_frames[job_id]
+        policy = self.job_policy[job_id]
+        current = table[page_number].frame_number
+        cold = None
+        for page in prefetcher.predict(job_id, page_number)[:prefetcher.degree]:
+            if page < 0:
+                continue
+            entry = table.get(page)
+            if entry is None:
+                entry = self.add_page(page, None, job_id)
+            elif entry.present:
+                continue
+            if free_frames:
+                frame = free_frames.popleft()
+            else:
+                if not prefetcher.use_cold:
+                    break
+                if cold is None:
+                    # 只换出预取前就排在最前面的冷块，不会换掉本次刚调入的页
+                    cold = [f for f in policy.candidates(prefetcher.degree) if f != current]
+                if not cold:
+                    break
+                frame = cold.pop(0)
+                policy.discard(frame)
+                self.unload_frame(frame)
+                prefetcher.cold_evictions += 1
+            if self.backing_store is not None:
+                self.backing_store.prefetch_read(entry.disk_location)
+            self.load_page(job_id, entry, frame)
+            policy.admit(frame, page)
+            prefetcher.loaded(job_id, page)
+
+    def handle_page_fault(self, job_id, page_number):
+        """处理缺页中断的核心算法（按作业的置换策略选择被置换页）"""
+        #获取目标页表项和作业的帧资源
+        entry = self.page_tables[job_id][page_number]#获取目标页表项和作业的帧资源
+        free_frames = self.job_free_frames[job_id]
+        policy = self.job_policy[job_id]
+        store = self.backing_store
+
+        # 作业还有空闲帧时直接装入
+        if free_frames:
+            frame = free_frames.popleft()
+            if store is not None:
+                store.read(entry.disk_location)
+            self.load_page(job_id, entry, frame)
+            policy.admit(frame, page_number)
+            return (None, None)
+
+        # 由置换策略选出被置换帧（全局置换时可能属于别的作业）
+        victim_frame = policy.evict()
+        victim_page = self.unload_frame(victim_frame)[1]
+        if store is not None:
+            store.read(entry.disk_location)
+        self.load_page(job_id, entry, victim_frame)
+        policy.admit(victim_frame, page_number)
+        if store is not None:
+            store.preclean(self, job_id)
+        return (victim_page, victim_frame)
+
+    def unload_frame(self, frame):
+        """把帧中的页面换出，返回 (作业, 页号)"""
+        # 通过反向页表直接找到被置换页
+        victim_job, victim_page = self.frame_table.pop(frame)
+        victim = self.page_tables[victim_job][victim_page]
+        if self.prefetcher is not None:
+            self.prefetcher.unloaded(victim_job, victim_page)
+        # 被置换页的快表项必须作废，否则会按旧块号翻译
+        if self.tlb is not None:
+            self.tlb.invalidate(victim_job, victim_page)
+        # 如果被置换页曾被修改，需要写回磁盘
+        if victim.modified:
+            self.writeback_count += 1
+            if self.backing_store is not None:
+                self.backing_store.write(victim.disk_location)
+
+        # 更新被置换页的状态
+        victim.present = False
+        victim.frame_number = -1
+        victim.modified = False
+        self.resident[victim_job] -= 1
+        return victim_job, victim_page
+
+    def load_page(self, job_id, entry, frame):
+        """把页面装入指定帧并登记到反向页表"""
+        entry.frame_number = frame
+        entry.present = True
+        self.frame_table[frame] = (job_id, entry.page_number)
+        self.resident[job_id] += 1
+
+    def is_frame_free(self, frame):
+        # 反向页表中没有记录即表示该帧空闲
+        return frame not in self.frame_table
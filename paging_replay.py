@@ -0,0 +1,360 @@
+"""无界面的分页访问序列回放
+
+逐条读取 (操作, 页号, 页内地址) 记录并交给 PagingManager 处理，只累计汇总
+结果，不保存逐步状态，因此可以用常数内存回放上千万条访问。
+
+用法: python paging_replay.py trace.txt --frames 4 --block-size 1024 --policy LRU
+
+文本格式每行一条记录: ``操作 页号 页内地址``，也兼容 ``序号 操作 页号 页内地址``，
+以 # 开头的行为注释。文件名为 - 时从标准输入读取。也可以直接读取
+trace_format 定义的二进制访问序列文件，--start/--stop 只回放其中一段。
+
+--checkpoint 每隔若干条记录把模拟状态存入检查点文件；之后用 --resume 指定该文件、
+--stop 指定要看的步数，就只需从最近的检查点回放剩下的几步:
+
+    python paging_replay.py trace.bin --policy LRU --checkpoint ck.bin --checkpoint-every 1000000
+    python paging_replay.py trace.bin --resume ck.bin --stop 5000000
+"""
+import argparse
+import sys
+from array import array
+from itertools import islice
+
+from backing_store import BackingStore, Disk
+from checkpoint import CheckpointReader, CheckpointWriter
+from metrics import EXPORT_FORMATS, instrument_paging, write_metrics
+from page_tables import PAGE_TABLES, TwoLevelPageTable
+from paging_batch import access_batch, records_to_arrays
+from paging_core import PagingManager
+from prefetch import PREFETCHERS, make_prefetcher
+from replacement import POLICIES, OPTPolicy
+from tlb import TLB
+from trace_format import KIND_PAGING, PagingTrace, is_binary_trace
+
+
+class ReplayStats:
+    def __init__(self):
+        self.accesses = 0
+        self.faults = 0
+        self.writebacks = 0
+        self.page_table_bytes = 0
+        self.tlb = None  # 启用快表时为回放所用的 TLB
+        self.block_size = 1024
+        self.page_table_levels = 1
+        self.tlb_time = 1.0  # 查快表耗时(ns)
+        self.memory_time = 100.0  # 访存一次耗时(ns)
+        self.backing_store = None  # 模拟磁盘时为回放所用的 BackingStore
+        self.prefetcher = None
+
+    @property
+    def hits(self):
+        return self.accesses - self.faults
+
+    @property
+    def hit_ratio(self):
+        return self.hits / self.accesses if self.accesses else 0.0
+
+    def report(self):
+        lines = [
+            f"访问次数: {self.accesses}",
+            f"缺页次数: {self.faults}",
+            f"写回次数: {self.writebacks}",
+            f"命中率: {self.hit_ratio:.4%}",
+            f"页表内存: {self.page_table_bytes} 字节",
+        ]
+        if self.tlb is not None:
+            tlb = self.tlb
+            eat = tlb.effective_access_time(self.tlb_time, self.memory_time, self.page_table_levels)
+            lines += [
+                f"快表: {tlb.entries} 项, {tlb.ways} 路组相联, {tlb.policy} 替换",
+                f"快表命中率: {tlb.hit_ratio:.4%}",
+                f"快表覆盖范围: {tlb.reach(self.block_size)} 字节",
+                f"有效访存时间: {eat:.2f} ns",
+            ]
+        if self.prefetcher is not None:
+            lines.append(self.prefetcher.report())
+        if self.backing_store is not None:
+            lines.append(self.backing_store.report())
+        return "\n".join(lines)
+
+
+def parse_line(line):
+    """解析一行文本记录，空行和注释返回 None"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split()
+    if len(fields) == 4:  # 序号 操作 页号 页内地址
+        fields = fields[1:]
+    if len(fields) != 3:
+        raise ValueError(f"无法解析的记录: {line!r}")
+    op, page, offset = fields
+    return op, int(page, 0), int(offset, 0)
+
+
+def read_trace(path, start=0, stop=None):
+    """逐条读取访问序列（文本或二进制）中下标 [start, stop) 的记录，生成 (操作, 页号, 页内地址)
+
+    二进制文件直接按下标定位，文本文件要从头数过去。
+    """
+    if path != "-" and is_binary_trace(path):
+        with PagingTrace(path) as trace:
+            yield from trace.records(start, stop)
+        return
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        records = (parse_line(line) for line in stream)
+        yield from islice((record for record in records if record is not None), start, stop)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def make_manager(job_blocks=4, block_size=1024, total_memory=None, job_id="job1",
+                 policy="FIFO", future=None, page_table="dict", tlb=None):
+    """创建一个只含单个作业、页面全部按需调入的 PagingManager
+
+    tlb 为 TLB 实例时在页表前模拟快表。
+    """
+    if total_memory is None:
+        # 额外预留示例中手动分配的 4 个块
+        total_memory = max(64 * 1024, (job_blocks + 4) * block_size)
+    manager = PagingManager(total_memory, block_size, job_blocks, policy, future, page_table)
+    manager.tlb = tlb
+    manager.create_job(job_id)
+    return manager
+
+
+def read_pages(path, start=0, stop=None):
+    """只取出访问序列中的页号，供 OPT 预先计算下次访问位置"""
+    return array("q", (page for _, page, _ in read_trace(path, start, stop)))
+
+
+def replay(records, job_blocks=4, block_size=1024, total_memory=None, job_id="job1",
+           policy="FIFO", future=None, page_table="dict", manager=None, checkpoint=None, step=0,
+           stats=None):
+    """把访问记录流逐条送入 PagingManager，返回汇总统计
+
+    policy 为 OPT 时 future 必须是与 records 一致的完整页号序列。
+    checkpoint 为 CheckpointWriter 时每 checkpoint.every 条记录存一份 (manager, 统计)
+    快照，step 为第一条记录在整个访问序列中的下标；从快照恢复时传入其中的 stats 接着累计。
+    """
+    if manager is None:
+        manager = make_manager(job_blocks, block_size, total_memory, job_id, policy, future,
+                               page_table)
+    if stats is None:
+        stats = ReplayStats()
+    page_table = manager.page_tables[job_id]
+    access_page = manager.access_page
+    add_page = manager.add_page
+    every = None
+    if checkpoint is not None:
+        every = checkpoint.every
+        records = iter(records)
+        checkpoint.save(step, _snapshot(manager, stats))
+    while True:
+        accesses = faults = 0
+        for op, page, offset in (records if every is None else islice(records, every)):
+            if page not in page_table:
+                add_page(page, None, job_id)
+            fault = access_page(job_id, page, op, offset)[1]
+            accesses += 1
+            if fault:
+                faults += 1
+        stats.accesses += accesses
+        stats.faults += faults
+        step += accesses
+        if every is None or accesses < every:
+            break
+        checkpoint.save(step, _snapshot(manager, stats))
+    if checkpoint is not None and accesses:
+        checkpoint.save(step, _snapshot(manager, stats))
+    return _finish(stats, manager)
+
+
+def read_columns(path, chunk=1 << 20, start=0, stop=None):
+    """按块读取访问序列 [start, stop) 段，每块生成 (页号, 页内地址, 操作码) 三个 numpy 数组"""
+    if path != "-" and is_binary_trace(path):
+        with PagingTrace(path) as trace:
+            start, stop, _ = slice(start, stop).indices(trace.count)
+            for first in range(start, stop, chunk):
+                yield trace.columns(first, min(first + chunk, stop))
+        return
+    records = read_trace(path, start, stop)
+    while True:
+        columns = records_to_arrays(islice(records, chunk))
+        if not len(columns[0]):
+            return
+        yield columns
+
+
+def replay_batch(columns, job_blocks=4, block_size=1024, total_memory=None, job_id="job1",
+                 policy="FIFO", future=None, page_table="dict", manager=None, checkpoint=None,
+                 step=0, stats=None):
+    """与 replay 相同，但按块批量变换地址（需要 numpy），缺页很少时更快（见 paging_batch）
+
+    checkpoint 不为 None 时每处理完一块存一份快照，块大小即检查点间隔。
+    """
+    if manager is None:
+        manager = make_manager(job_blocks, block_size, total_memory, job_id, policy, future,
+                               page_table)
+    if stats is None:
+        stats = ReplayStats()
+    if checkpoint is not None:
+        checkpoint.save(step, _snapshot(manager, stats))
+    for pages, offsets, ops in columns:
+        faults = access_batch(manager, job_id, pages, offsets, ops)[1]
+        stats.accesses += len(pages)
+        stats.faults += int(faults.sum())
+        step += len(pages)
+        if checkpoint is not None:
+            checkpoint.save(step, _snapshot(manager, stats))
+    return _finish(stats, manager)
+
+
+def _snapshot(manager, stats):
+    # 统计只存计数，快照中不出现本模块的类（本模块可能作为 __main__ 运行）
+    return manager, {"accesses": stats.accesses, "faults": stats.faults}
+
+
+def resume(checkpoint_path, trace, stop=None, origin=0, batch=False, job_id="job1"):
+    """从检查点文件中不晚于 stop 的最近快照恢复，只回放剩下的 [快照步数, stop) 段
+
+    返回 (快照步数, 统计)，统计与从头回放到 stop 的结果相同。origin 是写检查点时
+    回放的起始下标，OPT 据此重新读取 [origin, stop) 段的访问序列，与直接回放到
+    stop 时所见的序列一致。
+    """
+    with CheckpointReader(checkpoint_path) as reader:
+        if reader.kind != KIND_PAGING:
+            raise ValueError(f"{checkpoint_path} 不是分页回放的检查点")
+        found = reader.nearest(stop)
+    if found is None:
+        raise ValueError(f"{checkpoint_path} 中没有第 {stop} 步之前的检查点")
+    step, (manager, counts) = found
+    stats = ReplayStats()
+    stats.accesses = counts["accesses"]
+    stats.faults = counts["faults"]
+    policy = manager.job_policy[job_id]
+    if isinstance(policy, OPTPolicy):
+        end = origin + policy.end if stop is None else min(origin + policy.end, stop)
+        manager.attach_future(read_pages(trace, origin, end))
+    if batch:
+        stats = replay_batch(read_columns(trace, start=step, stop=stop), job_id=job_id,
+                             manager=manager, step=step, stats=stats)
+    else:
+        stats = replay(read_trace(trace, step, stop), job_id=job_id, manager=manager, step=step,
+                       stats=stats)
+    return step, stats
+
+
+def _finish(stats, manager):
+    if manager.backing_store is not None:
+        manager.backing_store.finish()  # 写出后台队列中剩余的脏页再统计
+    stats.writebacks = manager.writeback_count
+    stats.page_table_bytes = manager.page_table.memory_usage()
+    stats.tlb = manager.tlb
+    stats.backing_store = manager.backing_store
+    stats.prefetcher = manager.prefetcher
+    stats.block_size = manager.block_size
+    stats.page_table_levels = 2 if isinstance(manager.page_table, TwoLevelPageTable) else 1
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面回放分页访问序列")
+    parser.add_argument("trace", help="访问序列文件，- 表示标准输入")
+    parser.add_argument("--frames", type=int, default=4, help="作业分得的物理块数")
+    parser.add_argument("--block-size", type=int, default=1024, help="页面/块大小(字节)")
+    parser.add_argument("--memory", type=int, default=None, help="物理内存总量(字节)")
+    parser.add_argument("--policy", default="FIFO", type=str.upper, choices=list(POLICIES),
+                        help="页面置换策略")
+    parser.add_argument("--page-table", default="dict", choices=list(PAGE_TABLES),
+                        help="页表存储方式")
+    parser.add_argument("--start", type=int, default=0, help="从第几条记录开始回放")
+    parser.add_argument("--stop", type=int, default=None, help="回放到第几条记录为止（不含）")
+    parser.add_argument("--batch", action="store_true",
+                        help="按块批量变换地址（需要 numpy，启用快表时不起作用）")
+    parser.add_argument("--prefetch", choices=list(PREFETCHERS), default=None, help="缺页时的预取策略")
+    parser.add_argument("--prefetch-degree", type=int, default=4, help="每次最多预取的页数")
+    parser.add_argument("--prefetch-cold", action="store_true", help="没有空闲块时换出冷页来装预取页")
+    parser.add_argument("--writeback", choices=["sync", "async"], default=None,
+                        help="模拟换页磁盘: 同步写回或后台批量写回")
+    parser.add_argument("--writeback-batch", type=int, default=16, help="后台写回每批的页数")
+    parser.add_argument("--preclean", type=int, default=0, help="磁盘空闲时提前写回的脏页数")
+    parser.add_argument("--disk-latency", type=float, default=100.0, help="每次磁盘 I/O 的固定开销(us)")
+    parser.add_argument("--disk-seek", type=float, default=0.01, help="磁头每移动一个位置单位的寻道时间(us)")
+    parser.add_argument("--disk-transfer", type=float, default=20.0, help="每块的传输时间(us)")
+    parser.add_argument("--tlb-entries", type=int, default=0, help="快表项数，0 表示不模拟快表")
+    parser.add_argument("--tlb-ways", type=int, default=None, help="快表组相联路数，默认全相联")
+    parser.add_argument("--tlb-policy", default="LRU", type=str.upper, choices=["LRU", "RANDOM"],
+                        help="快表替换策略")
+    parser.add_argument("--tlb-time", type=float, default=1.0, help="查快表耗时(ns)")
+    parser.add_argument("--memory-time", type=float, default=100.0, help="访存一次耗时(ns)")
+    parser.add_argument("--checkpoint", default=None, help="回放时把模拟状态定期存入该检查点文件")
+    parser.add_argument("--checkpoint-every", type=int, default=1_000_000, help="每隔多少条记录存一份检查点")
+    parser.add_argument("--resume", default=None,
+                        help="从该检查点文件恢复到 --stop 之前最近的状态再回放剩余部分，"
+                             "页面置换、快表等设置取自检查点，--start 为写检查点时的起始下标")
+    parser.add_argument("--metrics", default=None, help="把运行指标写到该文件，- 表示标准输出")
+    parser.add_argument("--metrics-format", choices=list(EXPORT_FORMATS), default="json",
+                        help="运行指标的格式")
+    args = parser.parse_args(argv)
+    if args.checkpoint_every <= 0:
+        parser.error("检查点间隔必须大于 0")
+    if args.resume is not None:
+        if args.trace == "-":
+            parser.error("从检查点恢复需要按下标读取访问序列，不能从标准输入读取")
+        try:
+            step, stats = resume(args.resume, args.trace, args.stop, args.start, args.batch)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        print(f"从第 {step} 步的检查点恢复")
+        stats.tlb_time = args.tlb_time
+        stats.memory_time = args.memory_time
+        print(stats.report())
+        return 0
+
+    future = None
+    if args.policy == "OPT":
+        if args.trace == "-":
+            parser.error("OPT 需要两遍读取访问序列，不能从标准输入读取")
+        future = read_pages(args.trace, args.start, args.stop)
+    tlb = None
+    if args.tlb_entries:
+        try:
+            tlb = TLB(args.tlb_entries, args.tlb_ways, args.tlb_policy)
+        except ValueError as exc:
+            parser.error(str(exc))
+    manager = make_manager(args.frames, args.block_size, args.memory, policy=args.policy,
+                           future=future, page_table=args.page_table, tlb=tlb)
+    if args.prefetch is not None:
+        manager.prefetcher = make_prefetcher(args.prefetch, args.prefetch_degree, args.prefetch_cold)
+    if args.writeback is not None:
+        disk = Disk(args.disk_latency, args.disk_seek, transfer=args.disk_transfer)
+        manager.backing_store = BackingStore(disk, args.writeback == "async", args.writeback_batch,
+                                             args.preclean)
+    metrics = instrument_paging(manager) if args.metrics else None
+    checkpoint = None
+    if args.checkpoint is not None:
+        checkpoint = CheckpointWriter(args.checkpoint, KIND_PAGING, args.checkpoint_every)
+    try:
+        if args.batch:
+            chunk = args.checkpoint_every if checkpoint is not None else 1 << 20
+            stats = replay_batch(read_columns(args.trace, chunk, args.start, args.stop), manager=manager,
+                                 checkpoint=checkpoint, step=args.start)
+        else:
+            stats = replay(read_trace(args.trace, args.start, args.stop), manager=manager,
+                           checkpoint=checkpoint, step=args.start)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    stats.tlb_time = args.tlb_time
+    stats.memory_time = args.memory_time
+    print(stats.report())
+    if metrics is not None:
+        write_metrics(metrics, args.metrics, args.metrics_format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,102 +1,14 @@
+import math
 import tkinter as tk
-from tkinter import ttk
-from collections import deque
+from bisect import bisect_left, bisect_right
+from tkinter import filedialog, messagebox, ttk
 
-
-class PageTableEntry:
-    def __init__(self, page_number, disk_location):
-        self.page_number = page_number
-        self.present = False
-        self.frame_number = -1
-        self.modified = False
-        self.disk_location = disk_location
-
-
-class PagingManager:
-    def __init__(self, total_memory=64 * 1024, block_size=1024, job_blocks=4):
-        self.block_size = block_size
-        self.num_frames = total_memory // block_size
-        self.job_blocks = job_blocks
-
-        self.page_table = {}
-        initial_frames = {5, 8, 9, 1}
-        self.free_frames = deque(sorted(set(range(self.num_frames)) - initial_frames))
-        self.allocated_frames = {}
-        self.job_fifo = {}
-
-    def allocate_job(self, job_id, pages):
-        if job_id not in self.allocated_frames:
-            frames = [5, 8, 9, 1]  # 手动分配初始页
-            self.allocated_frames[job_id] = frames
-            self.job_fifo[job_id] = deque(frames)
-
-        disk_loc_map = {0: 0x10, 1: 0x12, 2: 0x13, 3: 0x21,
-                        4: 0x22, 5: 0x23, 6: 0x125}
-        frame_map = {0: 5, 1: 8, 2: 9, 3: 1}
-
-        for page in pages:
-            disk_loc = disk_loc_map.get(page, page * 1000)
-            entry = PageTableEntry(page, disk_loc)
-            if page in [0, 1, 2, 3]:
-                entry.present = True
-                entry.frame_number = frame_map[page]
-            self.page_table[page] = entry
-
-    def access_page(self, job_id, page_number, operation, offset):
-        entry = self.page_table[page_number]
-        if entry.present:
-            if operation in ["save", "存(save)"]:
-                entry.modified = True
-            physical = (entry.frame_number << 10) | offset
-            return physical, False, (None, None)
-        else:
-            victim_page, victim_frame = self.handle_page_fault(job_id, page_number)
-            entry.modified = (operation in ["save", "存(save)"])
-            physical = (entry.frame_number << 10) | offset
-            return physical, True, (victim_page, victim_frame)
-
-    def handle_page_fault(self, job_id, page_number):
-        """处理缺页中断的核心算法（FIFO页面置换）"""
-        #获取目标页表项和作业的帧资源
-        entry = self.page_table[page_number]#获取目标页表项和作业的帧资源
-        frames = self.allocated_frames[job_id]#获取目标页表项和作业的帧资源
-        fifo_queue = self.job_fifo[job_id]# 维护帧使用顺序的FIFO队列
-
-        # 查找空闲帧
-        for frame in frames:
-            if self.is_frame_free(frame):
-               # 维护帧使用顺序的FIFO队列
-                entry.frame_number = frame
-                entry.present = True  #维护帧使用顺序的FIFO队列
-                fifo_queue.append(frame)#维护帧使用顺序的FIFO队列
-                return (None, None)#维护帧使用顺序的FIFO队列
-
-        # FIFO置换，维护帧使用顺序的FIFO队列
-        victim_frame = fifo_queue.popleft()
-        # 精确查找被置换页
-        victim_page = None
-        for p, e in self.page_table.items():  # 遍历所有页表项
-            if e.frame_number == victim_frame and e.present:
-                victim_page = p #维护帧使用顺序的FIFO队列
-                break
-        # 如果被置换页曾被修改，需要写回磁盘
-        if self.page_table[victim_page].modified:
-            print(f"写回磁盘: 页{victim_page}")
-
-        # 更新被置换页的状态
-        self.page_table[victim_page].present = False#更新被置换页的状态
-        self.page_table[victim_page].frame_number = -1#更新被置换页的状态
-        # 更新被置换页的状态
-        entry.frame_number = victim_frame
-        entry.present = True
-        fifo_queue.append(victim_frame)
-        return (victim_page, victim_frame)
-
-    def is_frame_free(self, frame):
-          # 遍历所有页表项，检查是否有页占用该帧且处于内存中
-          # 遍历所有页表项，检查是否有页占用该帧且处于内存中
-        return not any(e.frame_number == frame and e.present
-                       for e in self.page_table.values())
+from access_log import ERROR, AccessLog
+from canvas_renderer import CanvasItems
+from checkpoint import MemoryCheckpoints
+from paging_core import PagingManager
+from paging_replay import read_trace
+from replacement import POLICIES
 
 
 class PagingVisualizer(tk.Toplevel):
@@ -104,17 +16,38 @@ class PagingVisualizer(tk.Toplevel):
         super().__init__(master)
         self.main_window = main_window  # 保存主窗口的引用
         # 其他初始化代码...
-        self.manager = PagingManager()
         self.instructions = [
             (0, "+", 0, 72), (1, "/", 1, 50), (2, "×", 2, 15),
             (3, "存(save)", 3, 26), (4, "取(load)", 0, 56), (5, "-", 6, 40),
             (6, "+", 4, 56), (7, "-", 5, 23), (8, "存(save)", 1, 37),
             (9, "+", 2, 78), (10, "-", 4, 1), (11, "存(save)", 6, 86)
         ]
+        self.policy_var = tk.StringVar(value="FIFO")  # 页面置换策略
+        self.speed_var = tk.DoubleVar(value=1.0)  # 执行速度（步/秒）
+        self.fast_forward_var = tk.IntVar(value=100)  # 快进步数
+        self.jump_var = tk.IntVar(value=0)  # 跳转的目标步数
+        # 每隔 1000 步保存一份 PagingManager 快照，跳转时从最近的快照重放
+        self.checkpoints = MemoryCheckpoints(every=1000)
+        self.step_index = 0  # 下一条要执行的指令
+        self.running = False
+        self.after_id = None
+        self.page_rows = {}  # 页号 → 页表 Treeview 中该行当前显示的内容
+        self.page_order = []  # 已显示的页号（有序），用于确定新行插入位置
+        self.access_log = AccessLog()
+        self.log_rows = 12  # 日志区可见行数
+        self.log_first = 0  # 可见窗口第一行在日志中的下标
+        self.log_follow = True  # 是否自动跟随最新一行
+        self.manager = self.create_manager()
         self.setup_gui()
-        self.manager.allocate_job("job1", [0, 1, 2, 3, 4, 5, 6])
         self.update_table()
 
+    def create_manager(self):
+        # OPT 需要预先知道整个指令序列的页号
+        future = [inst[2] for inst in self.instructions]
+        manager = PagingManager(policy=self.policy_var.get(), future=future)
+        manager.allocate_job("job1", [0, 1, 2, 3, 4, 5, 6])
+        return manager
+
     def setup_gui(self):
         self.title("请求式分页管理模拟器")
         self.geometry("1000x700")
@@ -138,105 +71,304 @@ class PagingVisualizer(tk.Toplevel):
         # 内存显示
         self.mem_canvas = tk.Canvas(top_frame, bg='white', bd=2, relief=tk.GROOVE)
         self.mem_canvas.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=10)
+        self.frame_items = CanvasItems(self.mem_canvas, "frame")  # 按帧号保存的图元
 
-        # 日志
-        self.tree_log = ttk.Treeview(main_frame,
+        # 日志: 只把可见窗口内的几行放进 Treeview，滚动条由日志长度换算
+        log_frame = ttk.Frame(main_frame)
+        log_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree_log = ttk.Treeview(log_frame,
                                      columns=("序号", "操作", "页号", "页内地址", "物理地址", "缺页", "置换"),
-                                     show="headings", height=12)
+                                     show="headings", height=self.log_rows)
         for col, width in [("序号", 60), ("操作", 80), ("页号", 60), ("页内地址", 80),
                            ("物理地址", 100), ("缺页", 60), ("置换", 100)]:
             self.tree_log.heading(col, text=col)
             self.tree_log.column(col, width=width, anchor='center')
+        self.log_scrollbar = ttk.Scrollbar(log_frame, orient=tk.VERTICAL, command=self.scroll_log)
+        self.log_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.tree_log.pack(fill=tk.BOTH, expand=True)
+        self.tree_log.bind("<MouseWheel>", lambda e: self.scroll_log("scroll", -e.delta // 120, "units"))
+        self.tree_log.bind("<Button-4>", lambda e: self.scroll_log("scroll", -1, "units"))
+        self.tree_log.bind("<Button-5>", lambda e: self.scroll_log("scroll", 1, "units"))
 
         # 控制按钮
         btn_frame = ttk.Frame(main_frame)
         btn_frame.pack(pady=10)
         ttk.Button(btn_frame, text="开始执行", command=self.start_animation).pack(side=tk.LEFT, padx=5)
+        self.pause_button = ttk.Button(btn_frame, text="暂停", command=self.toggle_pause)
+        self.pause_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="单步", command=self.single_step).pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="重置", command=self.reset).pack(side=tk.LEFT, padx=5)
+        ttk.Label(btn_frame, text="置换算法:").pack(side=tk.LEFT)
+        policy_menu = ttk.Combobox(btn_frame, textvariable=self.policy_var, values=list(POLICIES),
+                                   state="readonly", width=8)
+        policy_menu.pack(side=tk.LEFT, padx=5)
+        policy_menu.bind("<<ComboboxSelected>>", lambda e: self.reset())
         # 返回按钮（左）
         ttk.Button(btn_frame, text="返回主界面", command=self.return_to_main).pack(side=tk.LEFT)
-    def update_table(self):
-        self.tree_page.delete(*self.tree_page.get_children())
-        for page in sorted(self.manager.page_table):
-            entry = self.manager.page_table[page]
-            self.tree_page.insert("", "end", values=(
+
+        # 速度与快进
+        speed_frame = ttk.Frame(main_frame)
+        speed_frame.pack()
+        tk.Scale(speed_frame, label="速度(步/秒)", variable=self.speed_var, from_=0.5, to=50,
+                 resolution=0.5, orient=tk.HORIZONTAL, length=200).pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(speed_frame, textvariable=self.fast_forward_var, from_=1, to=10 ** 9,
+                    width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Button(speed_frame, text="快进", command=self.fast_forward).pack(side=tk.LEFT, padx=5)
+        ttk.Spinbox(speed_frame, textvariable=self.jump_var, from_=0, to=10 ** 9,
+                    width=10).pack(side=tk.LEFT, padx=5)
+        ttk.Button(speed_frame, text="跳转到第N步", command=self.jump_to_step).pack(side=tk.LEFT, padx=5)
+        ttk.Button(speed_frame, text="载入访问序列", command=self.load_trace).pack(side=tk.LEFT, padx=5)
+    def update_table(self, pages=None):
+        # 只改动内容变化的页表行，行以页号为 iid；pages 为 None 时比对整张页表
+        table = self.manager.page_table
+        if pages is None:
+            pages = sorted(table)
+            for page in [p for p in self.page_rows if p not in table]:
+                del self.page_rows[page]
+                del self.page_order[bisect_left(self.page_order, page)]
+                self.tree_page.delete(str(page))
+        for page in pages:
+            entry = table.get(page)
+            if entry is None:
+                continue
+            values = (
                 page,
                 "✓" if entry.present else "✗",
                 entry.frame_number if entry.frame_number != -1 else "-",
                 "✓" if entry.modified else "✗",
                 f"0x{entry.disk_location:04X}"
-            ))
+            )
+            old = self.page_rows.get(page)
+            if old == values:
+                continue
+            if old is None:
+                index = bisect_left(self.page_order, page)
+                self.page_order.insert(index, page)
+                self.tree_page.insert("", index, iid=str(page), values=values)
+            else:
+                self.tree_page.item(str(page), values=values)
+            self.page_rows[page] = values
+
+    def format_log_row(self, record):
+        step, op, page, offset, physical, fault, victim, frame = record
+        if fault == ERROR:
+            return (step + 1, op, page, "", "", "", "")
+        replace_info = f"页{victim}→页{frame}" if victim is not None else "-"  # 明确处理None
+        # 物理地址格式化
+        physical_str = f"{physical} (0x{physical:04X})" if not fault else "-"
+        # 修正地址显示格式
+        return (
+            step + 1,
+            op,
+            page,
+            f"{offset} (0x{offset:03X})",  # 同时显示十进制和十六进制
+            physical_str,
+            "是" if fault else "否",
+            replace_info  # 显示置换关系
+        )
+
+    def refresh_log(self):
+        # 只重新填充可见窗口内的日志行
+        total = len(self.access_log)
+        if self.log_follow:
+            self.log_first = max(total - self.log_rows, 0)
+        first = self.log_first
+        count = min(self.log_rows, total - first)
+        children = self.tree_log.get_children()
+        for i in range(count):
+            values = self.format_log_row(self.access_log[first + i])
+            if i < len(children):
+                self.tree_log.item(children[i], values=values)
+            else:
+                self.tree_log.insert("", "end", values=values)
+        if len(children) > count:
+            self.tree_log.delete(*children[count:])
+        if total:
+            self.log_scrollbar.set(first / total, (first + count) / total)
+        else:
+            self.log_scrollbar.set(0, 1)
+
+    def scroll_log(self, action, amount, unit=None):
+        total = len(self.access_log)
+        if action == "moveto":
+            first = int(float(amount) * total)
+        else:
+            step = self.log_rows if unit == "pages" else 1
+            first = self.log_first + int(amount) * step
+        last_page = max(total - self.log_rows, 0)
+        self.log_first = min(max(first, 0), last_page)
+        self.log_follow = self.log_first >= last_page
+        self.refresh_log()
 
     def draw_memory(self):
-        self.mem_canvas.delete("all")
         w, h = self.mem_canvas.winfo_width(), self.mem_canvas.winfo_height()
-        cols = 2
-        rows = 2
+        frames = self.manager.allocated_frames["job1"]
+        cols = max(math.ceil(math.sqrt(len(frames))), 1)
+        rows = max(math.ceil(len(frames) / cols), 1)
         size = min((w - 40) // cols, (h - 40) // rows)
-        spacing = 10
+        spacing = min(10, size // 10)
+
+        if size < 1:
+            # 块太多画不下时只显示一条汇总
+            used = sum(not self.manager.is_frame_free(frame) for frame in frames)
+            self.frame_items.update({"汇总": (
+                (20, h / 2 - 20, w - 20, h / 2 + 20), "#FF4444" if used else "#44FF44",
+                f"{used}/{len(frames)} 块使用中", (w / 2, h / 2), {"font": ('宋体', 10)})})
+            return
 
         start_x = (w - (cols * size + (cols - 1) * spacing)) // 2
         start_y = (h - (rows * size + (rows - 1) * spacing)) // 2
 
-        for idx, frame in enumerate(self.manager.allocated_frames["job1"]):
+        shapes = {}
+        for idx, frame in enumerate(frames):
             row = idx // cols
             col = idx % cols
             x = start_x + col * (size + spacing)
             y = start_y + row * (size + spacing)
 
-            used = any(e.frame_number == frame and e.present
-                       for e in self.manager.page_table.values())
+            used = not self.manager.is_frame_free(frame)
 
-            self.mem_canvas.create_rectangle(
-                x, y, x + size, y + size,
-                fill="#FF4444" if used else "#44FF44",
-                outline="black"
-            )
-            self.mem_canvas.create_text(
-                x + size / 2, y + size / 2,
-                text=f"块{frame}\n{'使用中' if used else '空闲'}",
-                font=('宋体', 10),
-                fill="white" if used else "black"
+            shapes[frame] = (
+                (x, y, x + size, y + size),
+                "#FF4444" if used else "#44FF44",
+                f"块{frame}\n{'使用中' if used else '空闲'}",
+                (x + size / 2, y + size / 2),
+                {"font": ('宋体', 10), "fill": "white" if used else "black"},
             )
+        self.frame_items.update(shapes)
 
     def start_animation(self):
-        for instruction in self.instructions:
-            self.process_instruction(instruction)
-            self.update()
-            self.after(1000)
+        # 由 after 定时驱动，每次只执行一步，不阻塞事件循环
+        if self.running:
+            return
+        self.running = True
+        self.pause_button.configure(text="暂停")
+        self.schedule_step()
+
+    def schedule_step(self):
+        delay = max(int(1000 / self.speed_var.get()), 1)
+        self.after_id = self.after(delay, self.run_scheduled_step)
+
+    def run_scheduled_step(self):
+        self.after_id = None
+        if not self.running:
+            return
+        if self.single_step():
+            self.schedule_step()
+        else:
+            self.stop_animation()
+
+    def stop_animation(self):
+        self.running = False
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+
+    def toggle_pause(self):
+        if self.running:
+            self.stop_animation()
+            self.pause_button.configure(text="继续")
+        elif self.step_index < len(self.instructions):
+            self.start_animation()
+
+    def single_step(self):
+        # 执行下一条指令并刷新界面，没有剩余指令时返回 False
+        if self.step_index >= len(self.instructions):
+            return False
+        if self.checkpoints.due(self.step_index):
+            self.checkpoints.save(self.step_index, self.manager)
+        self.process_instruction(self.instructions[self.step_index])
+        self.step_index += 1
+        return True
+
+    def fast_forward(self):
+        # 连续执行 N 步，中间不刷新页表和内存图，结束后只渲染最终状态
+        try:
+            count = self.fast_forward_var.get()
+        except tk.TclError:
+            messagebox.showerror("错误", "请输入有效的步数", parent=self)
+            return
+        self.run_to(min(self.step_index + count, len(self.instructions)))
+        self.update_table()
+        self.refresh_log()
+        self.draw_memory()
 
-    def process_instruction(self, inst):
+    def run_to(self, end):
+        # 不刷新界面地执行到第 end 条指令之前，途经检查点间隔的整数倍时保存快照
+        every = self.checkpoints.every
+        while self.step_index < end:
+            if self.checkpoints.due(self.step_index):
+                self.checkpoints.save(self.step_index, self.manager)
+            stop = min(end, (self.step_index // every + 1) * every)
+            for i in range(self.step_index, stop):
+                self.execute_instruction(self.instructions[i])
+            self.step_index = stop
+
+    def jump_to_step(self):
+        # 恢复不晚于目标步的最近快照，只重放之后的几步；目标在前方且没有更近的快照时直接往前执行
+        try:
+            target = self.jump_var.get()
+        except tk.TclError:
+            messagebox.showerror("错误", "请输入有效的步数", parent=self)
+            return
+        target = min(max(target, 0), len(self.instructions))
+        self.stop_animation()
+        self.pause_button.configure(text="暂停")
+        steps = self.checkpoints.steps
+        i = bisect_right(steps, target)
+        if target < self.step_index or (i and steps[i - 1] > self.step_index):
+            future = [inst[2] for inst in self.instructions]
+            found = self.checkpoints.nearest(target, future)
+            if found is None:
+                self.step_index, self.manager = 0, self.create_manager()
+            else:
+                self.step_index, self.manager = found
+            self.access_log.discard_from(self.step_index)
+            self.log_follow = True
+        self.run_to(target)
+        self.update_table()
+        self.refresh_log()
+        self.draw_memory()
+
+    def execute_instruction(self, inst):
+        # 只在 PagingManager 中执行一条指令并记入日志，返回内容可能变化的页
         step, op, page, offset = inst
         try:
+            if page not in self.manager.page_table:
+                self.manager.add_page(page)
             physical, fault, (victim, frame) = self.manager.access_page("job1", page, op, offset)
-            replace_info = f"页{victim}→页{frame}" if victim is not None else "-"  # 明确处理None
-
-            # 物理地址格式化
-            physical_str = f"{physical} (0x{physical:04X})" if not fault else "-"
+            self.access_log.append(step, op, page, offset, physical, fault, victim, frame)
+            return (page,) if victim is None else (page, victim)
+        except Exception as e:
+            self.access_log.append_error(step, str(e))
+            return ()
 
-            valid_physical = physical if not fault else None # 新增物理地址有效性检查
-            print(f":11页{victim} \n")
+    def process_instruction(self, inst):
+        self.update_table(self.execute_instruction(inst))
+        self.refresh_log()
+        self.draw_memory()
 
-            # 修正地址显示格式
-            self.tree_log.insert("", "end", values=(
-                step + 1,
-                op,
-                page,
-                f"{offset} (0x{offset:03X})",  # 同时显示十进制和十六进制
-                physical_str,
-                "是" if fault else "否",
-                replace_info  # 显示置换关系
-            ))
-            self.update_table()
-            self.draw_memory()
-        except Exception as e:
-            self.tree_log.insert("", "end", values=(step + 1, "错误", str(e), "", "", "", ""))
+    def load_trace(self):
+        path = filedialog.askopenfilename(parent=self, title="选择访问序列文件")
+        if not path:
+            return
+        try:
+            records = list(read_trace(path))
+        except (OSError, ValueError) as e:
+            messagebox.showerror("错误", str(e), parent=self)
+            return
+        self.instructions = [(i, op, page, offset) for i, (op, page, offset) in enumerate(records)]
+        self.reset()
 
     def reset(self):
-        self.manager = PagingManager()
-        self.manager.allocate_job("job1", [0, 1, 2, 3, 4, 5, 6])
-        self.tree_log.delete(*self.tree_log.get_children())
+        self.stop_animation()
+        self.pause_button.configure(text="暂停")
+        self.step_index = 0
+        self.manager = self.create_manager()
+        self.checkpoints.clear()
+        self.access_log.clear()
+        self.log_follow = True
+        self.refresh_log()
         self.update_table()
         self.draw_memory()
 
@@ -244,6 +376,7 @@ class PagingVisualizer(tk.Toplevel):
         self.protocol("WM_DELETE_WINDOW", self.return_to_main)
 
     def return_to_main(self):
+        self.stop_animation()
         self.main_window.deiconify()  # 显示主窗口
         self.destroy()  # 销毁当前窗口
 
@@ -0,0 +1,128 @@
+"""多进程参数扫描: 访问序列 × 页面大小 × 物理块数 × 置换策略
+
+每个组合是一次独立的 PagingManager 回放，分发给 ProcessPoolExecutor 的各个
+工作进程。访问序列先统一转换成二进制格式（见 trace_format），工作进程只接收
+文件路径，自行 mmap 打开，多个进程共享同一份页缓存而不必序列化整个序列。
+
+用法:
+    python paging_sweep.py a.txt b.trace --block-sizes 1024 4096 \\
+        --frames 4 8 16 --policies FIFO LRU CLOCK --workers 32 --csv report.csv
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+import time
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import product
+
+from paging_replay import read_trace, replay
+from replacement import POLICIES
+from trace_format import PagingTrace, is_binary_trace, write_paging_trace
+
+COLUMNS = ["trace", "block_size", "frames", "policy", "accesses", "faults",
+           "writebacks", "hit_ratio", "seconds"]
+
+
+def remap(records, source_block_size, block_size):
+    """把按 source_block_size 分页的记录换算成按 block_size 分页"""
+    for op, page, offset in records:
+        page, offset = divmod(page * source_block_size + offset, block_size)
+        yield op, page, offset
+
+
+def run_one(task):
+    """工作进程入口: 回放一个参数组合，返回一行结果"""
+    trace_path, name, block_size, frames, policy = task
+    started = time.perf_counter()
+    with PagingTrace(trace_path) as trace:
+        records = trace.records()
+        if trace.block_size != block_size:
+            records = remap(records, trace.block_size, block_size)
+        future = None
+        if policy == "OPT":
+            if trace.block_size != block_size:
+                pages = (page for _, page, _ in remap(trace.records(), trace.block_size, block_size))
+            else:
+                pages = trace.pages()
+            future = array("q", pages)
+        stats = replay(records, frames, block_size, policy=policy, future=future)
+    return {
+        "trace": name,
+        "block_size": block_size,
+        "frames": frames,
+        "policy": policy,
+        "accesses": stats.accesses,
+        "faults": stats.faults,
+        "writebacks": stats.writebacks,
+        "hit_ratio": stats.hit_ratio,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def prepare_traces(paths, workdir, block_size=1024):
+    """文本访问序列转换成二进制文件，返回 [(二进制路径, 显示名)]"""
+    prepared = []
+    for path in paths:
+        name = os.path.basename(path)
+        if is_binary_trace(path):
+            prepared.append((path, name))
+            continue
+        binary = os.path.join(workdir, f"{len(prepared)}_{name}.trace")
+        write_paging_trace(binary, read_trace(path), block_size)
+        prepared.append((binary, name))
+    return prepared
+
+
+def run_sweep(traces, block_sizes, frame_counts, policies, workers=None):
+    """并行回放所有参数组合，按参数顺序返回结果行
+
+    traces 为 [(二进制访问序列路径, 显示名)]。
+    """
+    tasks = [(path, name, block_size, frames, policy.upper())
+             for (path, name), block_size, frames, policy
+             in product(traces, block_sizes, frame_counts, policies)]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(run_one, tasks))
+
+
+def write_report(rows, path=None):
+    """合并后的结果写成 CSV，未给出路径时打印表格"""
+    if path:
+        with open(path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS)
+            writer.writeheader()
+            writer.writerows(rows)
+        return
+    print(f"{'访问序列':<16}{'页面大小':>8}{'块数':>6}{'策略':>8}{'访问次数':>12}"
+          f"{'缺页次数':>12}{'写回次数':>10}{'命中率':>10}")
+    for row in rows:
+        print(f"{row['trace']:<20}{row['block_size']:>12}{row['frames']:>8}{row['policy']:>10}"
+              f"{row['accesses']:>16}{row['faults']:>16}{row['writebacks']:>14}"
+              f"{row['hit_ratio']:>13.4%}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多进程扫描分页模拟参数")
+    parser.add_argument("traces", nargs="+", help="访问序列文件（文本或二进制）")
+    parser.add_argument("--block-sizes", type=int, nargs="+", default=[1024])
+    parser.add_argument("--frames", type=int, nargs="+", default=[4])
+    parser.add_argument("--policies", type=str.upper, nargs="+", default=["FIFO"],
+                        choices=list(POLICIES))
+    parser.add_argument("--trace-block-size", type=int, default=1024,
+                        help="文本访问序列中页号所依据的页面大小")
+    parser.add_argument("--workers", type=int, default=None, help="默认为 CPU 核数")
+    parser.add_argument("--csv", default=None, help="输出 CSV 文件，缺省时打印表格")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as workdir:
+        traces = prepare_traces(args.traces, workdir, args.trace_block_size)
+        rows = run_sweep(traces, args.block_sizes, args.frames, args.policies, args.workers)
+    write_report(rows, args.csv)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,596 @@
+"""动态分区存储管理的分配器核心，不依赖界面
+
+空闲分区表 FreeList 同时按两种顺序索引:
+
+- 按起始地址: treap（随机优先级的平衡二叉搜索树），每个结点记录子树中最大的
+  分区大小，最先适应沿树下降即可找到地址最低的足够大分区，O(log n)。
+- 按 (大小, 起始地址): 有序列表 + bisect，最佳适应是后继查询，最坏适应取最大值。
+
+三种算法选出的分区与逐个扫描地址有序表的结果完全一致（同样大小时取地址最低者）。
+
+另外用两个字典充当边界标记（起始地址 → 大小、结束地址 → 起始地址），归还分区时
+O(1) 找到紧邻的前后空闲分区，只与这两个邻居合并。
+
+PartitionAllocator 在可变分区（FitAllocator）、伙伴系统和 slab 之上维护 PID 与
+已分配分区表，MemoryManager 界面和 partition_replay 批量回放都通过它分配内存。
+可变分区方式下它还负责紧凑（搬移分区以合并空闲分区）。
+"""
+import random
+from bisect import bisect_left, insort
+
+
+class _Node:
+    __slots__ = ("start", "size", "priority", "left", "right", "max_size")
+
+    def __init__(self, start, size):
+        self.start = start
+        self.size = size
+        self.priority = random.random()
+        self.left = None
+        self.right = None
+        self.max_size = size
+
+
+def _update(node):
+    best = node.size
+    if node.left is not None and node.left.max_size > best:
+        best = node.left.max_size
+    if node.right is not None and node.right.max_size > best:
+        best = node.right.max_size
+    node.max_size = best
+
+
+def _split(node, key):
+    """按起始地址拆成 (< key, >= key) 两棵树"""
+    if node is None:
+        return None, None
+    if node.start < key:
+        node.right, right = _split(node.right, key)
+        _update(node)
+        return node, right
+    left, node.left = _split(node.left, key)
+    _update(node)
+    return left, node
+
+
+def _merge(left, right):
+    """合并两棵树，要求 left 中的地址都小于 right"""
+    if left is None:
+        return right
+    if right is None:
+        return left
+    if left.priority > right.priority:
+        left.right = _merge(left.right, right)
+        _update(left)
+        return left
+    right.left = _merge(left, right.left)
+    _update(right)
+    return right
+
+
+class FreeList:
+    """空闲分区表，元素为 (起始地址, 大小)，迭代时按地址递增"""
+
+    def __init__(self, holes=()):
+        self.clear()
+        for start, size in holes:
+            self.insert(start, size)
+
+    def clear(self):
+        self._root = None
+        self._sizes = []  # 按 (大小, 起始地址) 排序
+        self._holes = {}  # 起始地址 → 大小
+        self._ends = {}  # 结束地址 → 起始地址
+        self._total = 0  # 空闲总量，随插入删除增减
+
+    def __len__(self):
+        return len(self._holes)
+
+    def __getstate__(self):
+        # treap 按地址顺序存成空闲分区列表，恢复时重建
+        return list(self)
+
+    def __setstate__(self, holes):
+        self.__init__(holes)
+
+    def __iter__(self):
+        stack, node = [], self._root
+        while stack or node is not None:
+            while node is not None:
+                stack.append(node)
+                node = node.left
+            node = stack.pop()
+            yield node.start, node.size
+            node = node.right
+
+    def __contains__(self, start):
+        return start in self._holes
+
+    def size_of(self, start):
+        return self._holes[start]
+
+    def insert(self, start, size):
+        """登记一个空闲分区（不与相邻分区合并）"""
+        left, right = _split(self._root, start)
+        self._root = _merge(_merge(left, _Node(start, size)), right)
+        self._holes[start] = size
+        self._ends[start + size] = start
+        self._total += size
+        insort(self._sizes, (size, start))
+
+    def remove(self, start):
+        """删除起始地址为 start 的空闲分区，返回其大小"""
+        size = self._holes.pop(start)
+        del self._ends[start + size]
+        self._total -= size
+        left, rest = _split(self._root, start)
+        _, right = _split(rest, start + 1)
+        self._root = _merge(left, right)
+        del self._sizes[bisect_left(self._sizes, (size, start))]
+        return size
+
+    def take(self, start, size):
+        """从起始地址为 start 的空闲分区头部划出 size 大小，剩余部分留在表中"""
+        hole = self.remove(start)
+        if hole > size:
+            self.insert(start + size, hole - size)
+
+    def release(self, start, size):
+        """归还一个分区，并与紧邻的前后空闲分区合并"""
+        end = start + size
+        left = self._ends.get(start)
+        if left is not None:
+            size += self.remove(left)
+            start = left
+        if end in self._holes:
+            size += self.remove(end)
+        self.insert(start, size)
+
+    def first_fit(self, size):
+        """地址最低的、大小不小于 size 的空闲分区起始地址，没有则为 None"""
+        node = self._root
+        if node is None or node.max_size < size:
+            return None
+        while True:
+            if node.left is not None and node.left.max_size >= size:
+                node = node.left
+            elif node.size >= size:
+                return node.start
+            else:
+                node = node.right
+
+    def best_fit(self, size):
+        """大小不小于 size 的最小空闲分区起始地址，没有则为 None"""
+        i = bisect_left(self._sizes, (size, -1))
+        if i == len(self._sizes):
+            return None
+        return self._sizes[i][1]
+
+    def worst_fit(self, size):
+        """最大空闲分区的起始地址（同样大小取地址最低者），放不下则为 None"""
+        if not self._sizes or self._sizes[-1][0] < size:
+            return None
+        return self._sizes[bisect_left(self._sizes, (self._sizes[-1][0], -1))][1]
+
+    def largest(self):
+        """最大空闲分区的大小"""
+        return self._sizes[-1][0] if self._sizes else 0
+
+    def total(self):
+        """空闲总量"""
+        return self._total
+
+    def coalesce(self):
+        """把地址相邻的空闲分区合并"""
+        merged = []
+        for start, size in self:
+            if merged and merged[-1][0] + merged[-1][1] == start:
+                merged[-1] = (merged[-1][0], merged[-1][1] + size)
+            else:
+                merged.append((start, size))
+        if len(merged) != len(self._holes):
+            self.clear()
+            for start, size in merged:
+                self.insert(start, size)
+
+
+class BuddyAllocator:
+    """二进制伙伴系统
+
+    内存先按地址从 0 起划分成若干对齐的 2 的幂大小的块（如 800 = 512 + 256 + 32），
+    每个阶一张空闲表。分配时从够大的最小阶拆分，释放时用 地址 ^ 块大小 找伙伴，
+    伙伴空闲就合并，拆分和合并都是 O(log n)。
+    """
+
+    def __init__(self, total_size, min_block=1):
+        self.total_size = total_size
+        self.min_order = max(min_block - 1, 0).bit_length()
+        self.max_order = total_size.bit_length() - 1
+        self.free = [{} for _ in range(self.max_order + 1)]  # 阶 → {起始地址: None}
+        self.orders = {}  # 已分配块的起始地址 → 阶
+        start = 0
+        for order in range(self.max_order, self.min_order - 1, -1):
+            if start + (1 << order) <= total_size:
+                self.free[order][start] = None
+                start += 1 << order
+        self.free_size = start  # 空闲总量（不足最小块的尾部不计）
+
+    def order_of(self, size):
+        return max((size - 1).bit_length(), self.min_order)
+
+    def allocate(self, size):
+        """分配能容纳 size 的最小块，返回起始地址，没有则为 None"""
+        order = self.order_of(size)
+        for k in range(order, self.max_order + 1):
+            if self.free[k]:
+                break
+        else:
+            return None
+        start = next(iter(self.free[k]))
+        del self.free[k][start]
+        while k > order:
+            # 拆分: 后一半作为伙伴挂到低一阶的空闲表
+            k -= 1
+            self.free[k][start + (1 << k)] = None
+        self.orders[start] = order
+        self.free_size -= 1 << order
+        return start
+
+    def release(self, start, size=None):
+        order = self.orders.pop(start)
+        self.free_size += 1 << order
+        while order < self.max_order:
+            buddy = start ^ (1 << order)
+            if buddy not in self.free[order]:
+                break
+            del self.free[order][buddy]
+            start = min(start, buddy)
+            order += 1
+        self.free[order][start] = None
+
+    def block_size(self, start):
+        """已分配块实际占用的大小（含内部碎片）"""
+        return 1 << self.orders[start]
+
+    def free_blocks(self):
+        return sorted((start, 1 << order)
+                      for order, blocks in enumerate(self.free) for start in blocks)
+
+    def free_total(self):
+        return self.free_size
+
+    def largest_free(self):
+        # 只需检查 max_order + 1 个阶
+        for order in range(self.max_order, -1, -1):
+            if self.free[order]:
+                return 1 << order
+        return 0
+
+
+class _Slab:
+    __slots__ = ("start", "object_size", "free_slots")
+
+    def __init__(self, start, object_size, count):
+        self.start = start
+        self.object_size = object_size
+        self.free_slots = list(range(count - 1, -1, -1))
+
+
+class SlabAllocator:
+    """按大小分级的 slab 分配器
+
+    不超过最大级别的请求向上取整到某个级别，从该级别的 slab 中取一个空闲对象，O(1)；
+    slab 本身和更大的请求都按最先适应从后备的空闲分区表中划出。
+    slab 中的对象全部归还后，slab 整块还给后备分区表。
+    """
+
+    def __init__(self, total_size, size_classes=(8, 16, 32, 64), slab_size=128):
+        self.total_size = total_size
+        self.size_classes = sorted(size_classes)
+        self.slab_size = slab_size
+        self.backing = FreeList([(0, total_size)])
+        self.partial = {size: {} for size in self.size_classes}  # 级别 → {slab起始地址: slab}
+        self.slabs = {}  # slab 起始地址 → slab
+        self.owner = {}  # 对象地址 → 所属 slab
+        self.large = {}  # 直接从后备分区表分配的块: 起始地址 → 大小
+        self.slab_free = 0  # 各 slab 中空闲对象的总大小
+
+    def size_class(self, size):
+        """size 所属的级别，超过最大级别时为 None"""
+        i = bisect_left(self.size_classes, size)
+        return self.size_classes[i] if i < len(self.size_classes) else None
+
+    def allocate(self, size):
+        object_size = self.size_class(size)
+        if object_size is None:
+            start = self.backing.first_fit(size)
+            if start is not None:
+                self.backing.take(start, size)
+                self.large[start] = size
+            return start
+        partial = self.partial[object_size]
+        if partial:
+            slab = next(iter(partial.values()))
+        else:
+            start = self.backing.first_fit(self.slab_size)
+            if start is None:
+                return None
+            self.backing.take(start, self.slab_size)
+            slab = _Slab(start, object_size, self.slab_size // object_size)
+            self.slabs[start] = slab
+            partial[start] = slab
+            self.slab_free += len(slab.free_slots) * object_size
+        address = slab.start + slab.free_slots.pop() * object_size
+        self.slab_free -= object_size
+        if not slab.free_slots:
+            del partial[slab.start]
+        self.owner[address] = slab
+        return address
+
+    def release(self, start, size=None):
+        if start in self.large:
+            self.backing.release(start, self.large.pop(start))
+            return
+        slab = self.owner.pop(start)
+        slab.free_slots.append((start - slab.start) // slab.object_size)
+        self.slab_free += slab.object_size
+        capacity = self.slab_size // slab.object_size
+        if len(slab.free_slots) == capacity:
+            self.partial[slab.object_size].pop(slab.start, None)
+            del self.slabs[slab.start]
+            self.slab_free -= capacity * slab.object_size
+            self.backing.release(slab.start, self.slab_size)
+        else:
+            self.partial[slab.object_size][slab.start] = slab
+
+    def block_size(self, start):
+        if start in self.large:
+            return self.large[start]
+        return self.owner[start].object_size
+
+    def free_blocks(self):
+        """后备分区表中的空闲分区加上各 slab 中的空闲对象"""
+        blocks = list(self.backing)
+        for slab in self.slabs.values():
+            blocks.extend((slab.start + i * slab.object_size, slab.object_size)
+                          for i in slab.free_slots)
+        blocks.sort()
+        return blocks
+
+    def free_total(self):
+        return self.backing.total() + self.slab_free
+
+    def largest_free(self):
+        return self.backing.largest()
+
+
+class FitAllocator:
+    """可变分区分配: 最先/最佳/最坏适应共用一张空闲分区表，可随时切换算法"""
+
+    def __init__(self, total_size, algorithm="first"):
+        self.total_size = total_size
+        self.memory = FreeList([(0, total_size)])
+        self.algorithm = algorithm
+
+    def __getstate__(self):
+        return {"total_size": self.total_size, "memory": self.memory, "algorithm": self._algorithm}
+
+    def __setstate__(self, state):
+        self.total_size = state["total_size"]
+        self.memory = state["memory"]
+        self.algorithm = state["algorithm"]
+
+    @property
+    def algorithm(self):
+        return self._algorithm
+
+    @algorithm.setter
+    def algorithm(self, algorithm):
+        self._find = {"first": self.memory.first_fit,
+                      "best": self.memory.best_fit,
+                      "worst": self.memory.worst_fit}[algorithm]
+        self._algorithm = algorithm
+
+    def allocate(self, size):
+        start = self._find(size)
+        if start is not None:
+            self.memory.take(start, size)
+        return start
+
+    def release(self, start, size):
+        self.memory.release(start, size)
+
+    def free_blocks(self):
+        return self.memory
+
+    def free_total(self):
+        return self.memory.total()
+
+    def largest_free(self):
+        return self.memory.largest()
+
+
+FIT_ALGORITHMS = ("first", "best", "worst")
+ALGORITHMS = FIT_ALGORITHMS + ("buddy", "slab")
+# 紧凑时机: 不紧凑 / 分配失败时 / 分配失败或外部碎片率超过阈值时
+COMPACTION_MODES = ("off", "failure", "threshold")
+
+
+def make_backend(algorithm, total_size):
+    if algorithm in FIT_ALGORITHMS:
+        return FitAllocator(total_size, algorithm)
+    if algorithm == "buddy":
+        return BuddyAllocator(total_size)
+    if algorithm == "slab":
+        return SlabAllocator(total_size)
+    raise ValueError(f"未知的分配算法: {algorithm}")
+
+
+class PartitionAllocator:
+    """与界面无关的分区分配器
+
+    维护 PID 计数、已分配分区表 (PID → (起始地址, 大小)) 和分配统计，
+    具体的分区查找交给 FitAllocator / BuddyAllocator / SlabAllocator。
+
+    可变分区方式下可以开启紧凑: 空闲总量够但没有足够大的空闲分区时搬移部分分区，
+    凑出一块够大的空闲分区（compaction="failure"）；"threshold" 时另外在外部碎片率
+    超过 compaction_threshold 后把所有空闲分区合成一块。空闲总量和最大空闲分区
+    都随分配释放增量维护，判断是否需要紧凑不必扫描空闲分区表。
+    """
+
+    def __init__(self, total_size=800, algorithm="first", compaction="off", compaction_threshold=0.5):
+        if compaction not in COMPACTION_MODES:
+            raise ValueError(f"未知的紧凑方式: {compaction}")
+        self.total_size = total_size
+        self.algorithm = algorithm
+        self.backend = make_backend(algorithm, total_size)
+        self.allocated = {}
+        self.max_pid = 0
+        self.allocations = 0
+        self.failures = 0
+        self.releases = 0
+        self.compaction = compaction
+        self.compaction_threshold = compaction_threshold
+        self.compactions = 0
+        self.bytes_moved = 0  # 紧凑时搬移的分区总大小
+        self.metrics = None  # 运行指标（metrics.Metrics），由 metrics.instrument_partition 挂上
+
+    def __getstate__(self):
+        # 检查点只保存分区状态，不保存 metrics 挂上的计时包装
+        state = dict(self.__dict__)
+        for name in ("allocate", "release", "compact"):
+            state.pop(name, None)
+        state["metrics"] = None
+        return state
+
+    def set_algorithm(self, algorithm):
+        """切换分配算法，返回内存是否因此重新初始化
+
+        最先/最佳/最坏适应之间可以直接切换；伙伴系统、slab 的内存布局与之不相容，
+        进出这两种方式时清空所有分区。
+        """
+        if algorithm == self.algorithm:
+            return False
+        if algorithm in FIT_ALGORITHMS and self.algorithm in FIT_ALGORITHMS:
+            self.backend.algorithm = algorithm
+            self.algorithm = algorithm
+            return False
+        self.algorithm = algorithm
+        self.clear()
+        return True
+
+    def allocate(self, size, pid=None):
+        """分配 size 大小的分区，返回 PID，失败返回 None
+
+        size 不是正数或 pid 仍在使用中时抛出 ValueError，分配器状态不变。
+        """
+        if size <= 0:
+            raise ValueError(f"分区大小必须大于0: {size}")
+        if pid is not None and pid in self.allocated:
+            raise ValueError(f"进程 {pid} 已经分配了分区")
+        start = self.backend.allocate(size)
+        if start is None and self.compaction != "off" and self.compact(size):
+            start = self.backend.allocate(size)
+        if start is None:
+            self.failures += 1
+            return None
+        if pid is None:
+            self.max_pid += 1  # 递增最大PID
+            pid = self.max_pid
+        elif pid > self.max_pid:
+            self.max_pid = pid  # 重放指定的 PID 后，新分配的 PID 不与之重复
+        self.allocated[pid] = (start, size)
+        self.allocations += 1
+        self._check_fragmentation()
+        return pid
+
+    def release(self, pid):
+        """释放进程 pid 的分区，返回 (起始地址, 大小)，未找到返回 None"""
+        partition = self.allocated.pop(pid, None)
+        if partition is not None:
+            self.backend.release(*partition)
+            self.releases += 1
+            self._check_fragmentation()
+        return partition
+
+    def _check_fragmentation(self):
+        if self.compaction == "threshold" and self.external_fragmentation() > self.compaction_threshold:
+            self.compact()
+
+    def compaction_plan(self, size):
+        """为凑出不小于 size 的空闲分区，找出搬移量最少的一段连续地址
+
+        在按地址排列的空闲/已分配分区序列上用双指针找空闲量不小于 size、已分配量最小
+        的窗口，窗口内的分区依次向窗口起点滑动，空闲分区就在窗口末尾合成一块。
+        窗口两端都是空闲分区，窗口内每个分区都必须移动，已分配量即搬移量。
+        返回 [(PID, 原起始地址, 新起始地址, 大小)]；不是可变分区方式或空闲总量
+        不够时返回 None。
+        """
+        if not isinstance(self.backend, FitAllocator) or self.free_total() < size:
+            return None
+        items = [(start, length, None) for start, length in self.backend.free_blocks()]
+        items.extend((start, length, pid) for pid, (start, length) in self.allocated.items())
+        items.sort()
+        best = None
+        left = free = used = 0
+        for right, (_, length, pid) in enumerate(items):
+            if pid is None:
+                free += length
+            else:
+                used += length
+            # 左端是已分配分区，或去掉左端的空闲分区仍然够时右移左端
+            while left < right and (items[left][2] is not None or free - items[left][1] >= size):
+                if items[left][2] is None:
+                    free -= items[left][1]
+                else:
+                    used -= items[left][1]
+                left += 1
+            if free >= size and (best is None or used < best[0]):
+                best = (used, left, right)
+        if best is None:
+            return None
+        _, left, right = best
+        address = items[left][0]
+        moves = []
+        for start, length, pid in items[left:right + 1]:
+            if pid is not None:
+                if start != address:
+                    moves.append((pid, start, address, length))
+                address += length
+        return moves
+
+    def compact(self, size=None):
+        """按 compaction_plan 搬移分区，size 为 None 时把所有空闲分区合成一块
+
+        返回实际的搬移列表，不能紧凑时为空列表。
+        """
+        moves = self.compaction_plan(self.free_total() if size is None else size)
+        if not moves:
+            return []
+        memory = self.backend.memory
+        for pid, start, target, length in moves:
+            # 前面的分区已经挪走，[target, start) 正是一个空闲分区的开头，
+            # 归还后与它合并，再从头部重新划出
+            memory.release(start, length)
+            memory.take(target, length)
+            self.allocated[pid] = (target, length)
+            self.bytes_moved += length
+        self.compactions += 1
+        return moves
+
+    def clear(self):
+        """清空所有进程，内存恢复为初始状态"""
+        self.backend = make_backend(self.algorithm, self.total_size)
+        self.allocated = {}
+        self.max_pid = 0
+
+    def free_blocks(self):
+        return self.backend.free_blocks()
+
+    def free_total(self):
+        return self.backend.free_total()
+
+    def external_fragmentation(self):
+        """外部碎片率: 1 - 最大空闲块 / 空闲总量，两者都是增量维护的"""
+        free = self.free_total()
+        return 1 - self.backend.largest_free() / free if free else 0.0
@@ -0,0 +1,236 @@
+"""无界面批量回放分区分配/释放事件
+
+文本格式每行一个事件，以 # 开头的行为注释:
+
+    alloc <编号> <大小>
+    free <编号>
+
+编号由事件文件自己指定，分配成功后作为 PID 使用。逐条流式处理，
+只保存仍在使用中的分区，可以回放上百万条事件。也可以直接读取 trace_format
+定义的二进制分区事件文件，--start/--stop 只回放其中一段。
+--checkpoint 定期保存分配器状态，之后 --resume 可以从最近的检查点接着回放到 --stop。
+
+用法: python partition_replay.py events.txt --algorithm best --memory 1048576
+"""
+import argparse
+import sys
+import time
+from itertools import islice
+
+from checkpoint import CheckpointReader, CheckpointWriter
+from metrics import EXPORT_FORMATS, instrument_partition, write_metrics
+from partition_core import ALGORITHMS, COMPACTION_MODES, PartitionAllocator
+from trace_format import KIND_PARTITION, PartitionTrace, is_binary_trace
+
+ALLOC = "alloc"
+FREE = "free"
+
+
+class PartitionReplayStats:
+    def __init__(self):
+        self.events = 0
+        self.allocations = 0
+        self.failures = 0
+        self.releases = 0
+        self.invalid_frees = 0  # 释放了不存在（或分配失败）的编号
+        self.invalid_allocs = 0  # 大小不是正数，或编号仍在使用中的分配
+        self.seconds = 0.0
+        self.fragmentation_samples = 0
+        self.fragmentation_sum = 0.0
+        self.final_fragmentation = 0.0
+        self.final_free = 0
+        self.compactions = 0
+        self.bytes_moved = 0
+
+    @property
+    def throughput(self):
+        return self.events / self.seconds if self.seconds else 0.0
+
+    @property
+    def mean_fragmentation(self):
+        if not self.fragmentation_samples:
+            return self.final_fragmentation
+        return self.fragmentation_sum / self.fragmentation_samples
+
+    def report(self):
+        return "\n".join([
+            f"事件数: {self.events}",
+            f"分配成功: {self.allocations}",
+            f"分配失败: {self.failures}",
+            f"释放次数: {self.releases}",
+            f"无效分配: {self.invalid_allocs}",
+            f"无效释放: {self.invalid_frees}",
+            f"耗时: {self.seconds:.3f}s",
+            f"吞吐量: {self.throughput:,.0f} 事件/秒",
+            f"平均外部碎片率: {self.mean_fragmentation:.4%}",
+            f"结束时外部碎片率: {self.final_fragmentation:.4%}",
+            f"结束时空闲总量: {self.final_free}",
+            f"紧凑次数: {self.compactions}, 搬移总量: {self.bytes_moved}",
+        ])
+
+
+def parse_event(line):
+    """解析一行事件，空行和注释返回 None"""
+    line = line.strip()
+    if not line or line.startswith("#"):
+        return None
+    fields = line.split()
+    if fields[0] == ALLOC and len(fields) == 3:
+        return ALLOC, int(fields[1]), int(fields[2])
+    if fields[0] == FREE and len(fields) == 2:
+        return FREE, int(fields[1]), 0
+    raise ValueError(f"无法解析的事件: {line!r}")
+
+
+def read_events(path, start=0, stop=None):
+    """读取事件文件（文本或二进制）中下标 [start, stop) 的事件，生成 (事件, 编号, 大小)"""
+    if path != "-" and is_binary_trace(path):
+        with PartitionTrace(path) as trace:
+            yield from trace.records(start, stop)
+        return
+    stream = sys.stdin if path == "-" else open(path, encoding="utf-8")
+    try:
+        events = (parse_event(line) for line in stream)
+        yield from islice((event for event in events if event is not None), start, stop)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+# 检查点中保存的统计字段
+SNAPSHOT_FIELDS = ("events", "invalid_allocs", "invalid_frees", "seconds", "fragmentation_samples", "fragmentation_sum")
+
+
+def replay(events, total_size=800, algorithm="first", sample_every=1000, allocator=None,
+           checkpoint=None, step=0, stats=None):
+    """把事件流送入 PartitionAllocator，返回汇总统计
+
+    每 sample_every 个事件采样一次外部碎片率，为 0 时只在结束时统计。
+    checkpoint 为 CheckpointWriter 时每 checkpoint.every 个事件存一份 (allocator, 统计)
+    快照，step 为第一个事件在整个事件序列中的下标；从快照恢复时传入其中的 stats 接着累计。
+    """
+    if allocator is None:
+        allocator = PartitionAllocator(total_size, algorithm)
+    if stats is None:
+        stats = PartitionReplayStats()
+    allocate = allocator.allocate
+    release = allocator.release
+    every = None
+    if checkpoint is not None:
+        every = checkpoint.every
+        events = iter(events)
+        checkpoint.save(step, _snapshot(allocator, stats))
+    while True:
+        count = invalid = invalid_allocs = 0
+        started = time.perf_counter()
+        for kind, pid, size in (events if every is None else islice(events, every)):
+            count += 1
+            if kind == ALLOC:
+                # 与无效释放一样计数后跳过，不交给分配器
+                if size <= 0 or pid in allocator.allocated:
+                    invalid_allocs += 1
+                else:
+                    allocate(size, pid)
+            elif release(pid) is None:
+                invalid += 1
+            if sample_every and (step + count) % sample_every == 0:
+                stats.fragmentation_sum += allocator.external_fragmentation()
+                stats.fragmentation_samples += 1
+        stats.seconds += time.perf_counter() - started
+        stats.events += count
+        stats.invalid_frees += invalid
+        stats.invalid_allocs += invalid_allocs
+        step += count
+        if every is None or count < every:
+            break
+        checkpoint.save(step, _snapshot(allocator, stats))
+    if checkpoint is not None and count:
+        checkpoint.save(step, _snapshot(allocator, stats))
+    stats.allocations = allocator.allocations
+    stats.failures = allocator.failures
+    stats.releases = allocator.releases
+    stats.final_fragmentation = allocator.external_fragmentation()
+    stats.final_free = allocator.free_total()
+    stats.compactions = allocator.compactions
+    stats.bytes_moved = allocator.bytes_moved
+    return stats
+
+
+def _snapshot(allocator, stats):
+    # 统计只存字段值，快照中不出现本模块的类（本模块可能作为 __main__ 运行）
+    return allocator, {name: getattr(stats, name) for name in SNAPSHOT_FIELDS}
+
+
+def resume(checkpoint_path, events_path, stop=None, sample_every=1000):
+    """从检查点文件中不晚于 stop 的最近快照恢复，只回放剩下的 [快照步数, stop) 段
+
+    返回 (快照步数, 统计)，统计与从头回放到 stop 的结果相同。
+    """
+    with CheckpointReader(checkpoint_path) as reader:
+        if reader.kind != KIND_PARTITION:
+            raise ValueError(f"{checkpoint_path} 不是分区回放的检查点")
+        found = reader.nearest(stop)
+    if found is None:
+        raise ValueError(f"{checkpoint_path} 中没有第 {stop} 步之前的检查点")
+    step, (allocator, fields) = found
+    stats = PartitionReplayStats()
+    for name, value in fields.items():
+        setattr(stats, name, value)
+    return step, replay(read_events(events_path, step, stop), sample_every=sample_every,
+                        allocator=allocator, step=step, stats=stats)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="无界面批量回放分区分配/释放事件")
+    parser.add_argument("events", help="事件文件，- 表示标准输入")
+    parser.add_argument("--algorithm", default="first", choices=list(ALGORITHMS))
+    parser.add_argument("--memory", type=int, default=800, help="内存总量")
+    parser.add_argument("--sample-every", type=int, default=1000,
+                        help="每隔多少个事件采样一次外部碎片率，0 表示只在结束时统计")
+    parser.add_argument("--compaction", choices=list(COMPACTION_MODES), default="off",
+                        help="可变分区的紧凑时机: 不紧凑、分配失败时、或外部碎片率超过阈值时")
+    parser.add_argument("--compaction-threshold", type=float, default=0.5,
+                        help="触发紧凑的外部碎片率")
+    parser.add_argument("--start", type=int, default=0, help="从第几个事件开始回放")
+    parser.add_argument("--stop", type=int, default=None, help="回放到第几个事件为止（不含）")
+    parser.add_argument("--checkpoint", default=None, help="回放时把分配器状态定期存入该检查点文件")
+    parser.add_argument("--checkpoint-every", type=int, default=1_000_000, help="每隔多少个事件存一份检查点")
+    parser.add_argument("--resume", default=None,
+                        help="从该检查点文件恢复到 --stop 之前最近的状态再回放剩余部分，"
+                             "分配算法和紧凑设置取自检查点")
+    parser.add_argument("--metrics", default=None, help="把运行指标写到该文件，- 表示标准输出")
+    parser.add_argument("--metrics-format", choices=list(EXPORT_FORMATS), default="json",
+                        help="运行指标的格式")
+    args = parser.parse_args(argv)
+    if args.checkpoint_every <= 0:
+        parser.error("检查点间隔必须大于 0")
+    if args.resume is not None:
+        if args.events == "-":
+            parser.error("从检查点恢复需要按下标读取事件，不能从标准输入读取")
+        try:
+            step, stats = resume(args.resume, args.events, args.stop, args.sample_every)
+        except (OSError, ValueError) as exc:
+            parser.error(str(exc))
+        print(f"从第 {step} 步的检查点恢复")
+        print(stats.report())
+        return 0
+
+    allocator = PartitionAllocator(args.memory, args.algorithm, args.compaction, args.compaction_threshold)
+    metrics = instrument_partition(allocator) if args.metrics else None
+    checkpoint = None
+    if args.checkpoint is not None:
+        checkpoint = CheckpointWriter(args.checkpoint, KIND_PARTITION, args.checkpoint_every)
+    try:
+        stats = replay(read_events(args.events, args.start, args.stop), sample_every=args.sample_every,
+                       allocator=allocator, checkpoint=checkpoint, step=args.start)
+    finally:
+        if checkpoint is not None:
+            checkpoint.close()
+    print(stats.report())
+    if metrics is not None:
+        write_metrics(metrics, args.metrics, args.metrics_format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,20 @@ from tkinter import simpledialog, messagebox
 from tkinter import ttk
 import time
 
+from canvas_renderer import CanvasItems, layout_bars
+from checkpoint import MemoryCheckpoints
+from partition_core import PartitionAllocator
+
+# 界面上的算法名 → 分配器核心使用的算法名
+ALGORITHMS = {"最先适应": "first", "最佳适应": "best", "最坏适应": "worst",
+              "伙伴系统": "buddy", "Slab分配": "slab"}
+
 
 class MemoryManager(tk.Toplevel):  # 改为继承Toplevel
     def __init__(self, master=None):  # 修改构造函数
         super().__init__(master)
         self.title("动态分区存储管理模拟")
         self.geometry("800x600")
-        self.max_pid = 0  # 最大PID计数器
         # 添加返回按钮（绑定主窗口恢复）
         self.return_button = tk.Button(
             self,
@@ -20,20 +27,26 @@ class MemoryManager(tk.Toplevel):  # 改为继承Toplevel
 
         self.canvas = tk.Canvas(self, width=800, height=400, bg="white")
         self.canvas.pack()
+        # 分区图元按空闲区起始地址/PID保存，刷新时只改动变化的部分
+        self.partition_items = CanvasItems(self.canvas, "partition")
+        self.algorithm_text = self.canvas.create_text(400, 380, font=("Arial", 12))
 
-        self.memory = []  # 可用分区表
-        self.allocated = []  # 已分配分区表
-
-        # 初始化内存分区
-        self.init_memory()
+        self.algorithm_var = tk.StringVar(value="最先适应")  # 默认算法
+        # 分配器核心: 空闲分区表、已分配分区表和PID计数
+        self.allocator = PartitionAllocator(800, ALGORITHMS[self.algorithm_var.get()])
+        # 分配/释放历史 (事件, PID, 大小)，每 10 步保存一份分配器快照，用于跳转到任一步
+        self.history = []
+        self.step = 0  # 当前状态对应的历史步数，跳回之前的步后可以再跳回来
+        self.checkpoints = MemoryCheckpoints(every=10)
+        self.checkpoints.save(0, self.allocator)
 
         # 算法选择
-        self.algorithm_var = tk.StringVar(value="最先适应")  # 默认算法
         self.algorithm_label = tk.Label(self, text="选择分配算法:")
         self.algorithm_label.pack(side=tk.LEFT)
         self.algorithm_menu = ttk.Combobox(self, textvariable=self.algorithm_var,
-                                           values=["最先适应", "最佳适应", "最坏适应"])
+                                           values=list(ALGORITHMS))
         self.algorithm_menu.pack(side=tk.LEFT)
+        self.algorithm_menu.bind("<<ComboboxSelected>>", self.on_algorithm_change)
 
         # 请求内存按钮
         self.request_button = tk.Button(self, text="请求内存", command=self.request_memory)
@@ -47,27 +60,95 @@ class MemoryManager(tk.Toplevel):  # 改为继承Toplevel
         self.clear_button = tk.Button(self, text="清空所有进程", command=self.clear_all_processes)
         self.clear_button.pack(side=tk.LEFT)
 
+        # 紧凑开关: 空闲总量够但没有足够大的空闲区时搬移分区（仅可变分区方式）
+        self.compaction_var = tk.BooleanVar(value=False)
+        self.compaction_check = tk.Checkbutton(self, text="分配失败时紧凑", variable=self.compaction_var,
+                                               command=self.on_compaction_change)
+        self.compaction_check.pack(side=tk.LEFT)
+
+        # 跳转到历史中的某一步
+        self.jump_var = tk.IntVar(value=0)
+        self.jump_box = ttk.Spinbox(self, textvariable=self.jump_var, from_=0, to=10 ** 9, width=6)
+        self.jump_box.pack(side=tk.LEFT)
+        self.jump_button = tk.Button(self, text="跳转到第N步", command=self.jump_to_step)
+        self.jump_button.pack(side=tk.LEFT)
+
         # 绘制初始内存状态
         self.draw_memory()
 
     def init_memory(self):
         # 初始化内存分区
-        self.memory = [(0, 800)]  # 起始地址和大小
-        self.allocated = []  # 清空已分配分区表
+        self.allocator.clear()
+        self.reset_history()
+
+    def reset_history(self):
+        # 算法、紧凑方式改变或清空内存后从当前状态重新记录历史
+        self.history = []
+        self.step = 0
+        self.checkpoints.clear()
+        self.checkpoints.save(0, self.allocator)
+
+    def record(self, event, pid, size=0):
+        # 在当前步之后追加一个事件，跳回过去后再操作时丢弃原来的后续历史
+        if self.step < len(self.history):
+            del self.history[self.step:]
+            self.checkpoints.discard_after(self.step)
+        self.history.append((event, pid, size))
+        self.step += 1
+        if self.checkpoints.due(self.step):
+            self.checkpoints.save(self.step, self.allocator)
+
+    def jump_to_step(self):
+        # 恢复不晚于目标步的最近快照，再重放之后的分配/释放
+        try:
+            target = self.jump_var.get()
+        except tk.TclError:
+            messagebox.showerror("错误", "请输入有效的步数", parent=self)
+            return
+        target = min(max(target, 0), len(self.history))
+        step, self.allocator = self.checkpoints.nearest(target)
+        for event, pid, size in self.history[step:target]:
+            if event == "alloc":
+                self.allocator.allocate(size, pid)
+            else:
+                self.allocator.release(pid)
+        self.step = target
+        self.draw_memory()
+
+    def on_algorithm_change(self, event=None):
+        algorithm = ALGORITHMS.get(self.algorithm_var.get())
+        if algorithm is None:
+            return
+        # 伙伴系统、slab 与可变分区的内存布局互不相容，切换时重新初始化内存
+        had_processes = bool(self.allocator.allocated)
+        if self.allocator.set_algorithm(algorithm) and had_processes:
+            messagebox.showinfo("提示", "切换分配方式后内存已重新初始化", parent=self)
+        self.reset_history()
+        self.draw_memory()
+
+    def on_compaction_change(self):
+        self.allocator.compaction = "failure" if self.compaction_var.get() else "off"
+        self.reset_history()
 
     def draw_memory(self):
-        self.canvas.delete("all")
-        # 绘制空闲分区（绿色）
-        for start, size in self.memory:
-            self.canvas.create_rectangle(start, 100, start + size, 150,
-                                         fill="green")  # 左上角是（start，100），右下角是（start+size，150）
-            self.canvas.create_text(start + size / 2, 85, text=f"空闲:{size}KB")
-        # 绘制已分配分区（蓝色）
-        for start, size, pid in self.allocated:
-            self.canvas.create_rectangle(start, 230, start + size, 280, fill="blue")  # 调整垂直位置
-            self.canvas.create_text(start + size / 2, 215, text=f"P{pid}:{size}KB")  # 调整文本位置
+        scale = 800 / self.allocator.total_size  # 每KB对应的像素数
+        shapes = {}
+        # 空闲分区（绿色），不足1像素宽、彼此相距也不足1像素的合并成一条显示，
+        # 中间隔着的已分配分区在下面一行照常画出
+        free_blocks = ((("free", start), start, size) for start, size in self.allocator.free_blocks())
+        for key, x1, x2, count, size in layout_bars(free_blocks, scale, bridge=True):
+            text = f"空闲:{size}KB" if count == 1 else f"{count}个空闲区:{size}KB"
+            shapes[key] = ((x1, 100, x2, 150), "green", text, ((x1 + x2) / 2, 85), {})
+        # 已分配分区（蓝色），首尾相接的不足1像素宽的分区合并成一条显示
+        partitions = sorted((start, size, pid) for pid, (start, size) in self.allocator.allocated.items())
+        used_blocks = ((("pid", pid), start, size) for start, size, pid in partitions)
+        for key, x1, x2, count, size in layout_bars(used_blocks, scale):
+            text = f"P{key[1]}:{size}KB" if count == 1 and key[0] == "pid" else f"{count}个进程:{size}KB"
+            shapes[key] = ((x1, 230, x2, 280), "blue", text, ((x1 + x2) / 2, 215), {})
+        self.partition_items.update(shapes)
         # 显示当前选择的算法
-        self.canvas.create_text(400, 380, text=f"当前算法: {self.algorithm_var.get()}", font=("Arial", 12))
+        self.canvas.itemconfigure(self.algorithm_text, text=f"当前算法: {self.algorithm_var.get()}    "
+                                                            f"第 {self.step}/{len(self.history)} 步")
 
     def request_memory(self):
         size = simpledialog.askstring("请求内存", "请输入内存大小:", parent=self)  # 添加parent参数
@@ -87,138 +168,53 @@ class MemoryManager(tk.Toplevel):  # 改为继承Toplevel
             messagebox.showerror("错误", "请输入有效的整数", parent=self)
 
     def animate_block(self, block, size):
-        # 方块下落动画（优化动画逻辑）
+        # 提交请求时只分配一次，动画只展示结果: 成功时方块落到已分配区，失败时落出画面
+        moved = self.allocator.bytes_moved
+        pid = self.allocator.allocate(size)
+        if pid is not None:
+            self.record("alloc", pid, size)
+        bottom = 180 if pid is not None else 400  # 方块顶边最终的位置
+
         def _animate(y=0):
-            if y < 400:
+            if y < bottom:
                 self.canvas.move(block, 0, 2)
-                if self.check_allocation(block, size):
-                    return
                 self.after(10, _animate, y + 2)
-            else:
-                self.canvas.delete(block)
+                return
+            self.canvas.delete(block)
+            if pid is None:
                 messagebox.showinfo("提示", "没有足够的内存", parent=self)
+                return
+            self.draw_memory()
+            if self.allocator.bytes_moved != moved:
+                messagebox.showinfo("提示", f"已紧凑内存，搬移了 {self.allocator.bytes_moved - moved}KB",
+                                    parent=self)
 
         _animate()
 
-    def check_allocation(self, block, size):
-        # 检查当前方块是否与空闲区匹配
-        x1, y1, x2, y2 = self.canvas.coords(block)
-        algorithm = self.algorithm_var.get()
-
-        if algorithm == "最先适应":
-            return self.first_fit(block, size)
-        elif algorithm == "最佳适应":
-            return self.best_fit(block, size)
-        elif algorithm == "最坏适应":
-            return self.worst_fit(block, size)
-        else:
-            return False
-
-    def first_fit(self, block, size):
-        # 最先适应算法
-        for i, (start, s) in enumerate(self.memory):
-            if s >= size:
-                self.max_pid += 1  # 递增最大PID
-                # 分配内存
-                self.allocated.append((start, size,self.max_pid))
-                if s > size:
-                    self.memory[i] = (start + size, s - size)
-                else:
-                    del self.memory[i]
-                self.draw_memory()
-                self.canvas.delete(block)
-                return True
-        return False
-
-    def best_fit(self, block, size):
-        # 最佳适应算法
-        best_index = -1
-        best_size = float('inf')
-        for i, (start, s) in enumerate(self.memory):
-            if s >= size and s < best_size:
-                best_index = i
-                best_size = s
-        if best_index != -1:
-            self.max_pid += 1  # 递增最大PID
-            # 分配内存
-            self.allocated.append((self.memory[best_index][0], size, self.max_pid))
-            if self.memory[best_index][1] > size:
-                self.memory[best_index] = (self.memory[best_index][0] + size, self.memory[best_index][1] - size)
-            else:
-                del self.memory[best_index]
-            self.draw_memory()
-            self.canvas.delete(block)
-            return True
-        return False
-
-    def worst_fit(self, block, size):
-        # 最坏适应算法
-        worst_index = -1
-        worst_size = -1
-        for i, (start, s) in enumerate(self.memory):
-            if s >= size and s > worst_size:
-                worst_index = i
-                worst_size = s
-        if worst_index != -1:
-            self.max_pid += 1  # 递增最大PID
-            # 分配内存
-            self.allocated.append((self.memory[worst_index][0], size, self.max_pid))
-            if self.memory[worst_index][1] > size:
-                self.memory[worst_index] = (self.memory[worst_index][0] + size, self.memory[worst_index][1] - size)
-            else:
-                del self.memory[worst_index]
-            self.draw_memory()
-            self.canvas.delete(block)
-            return True
-        return False
-
     def release_memory(self):
         pid = simpledialog.askstring("释放内存", "请输入进程ID:", parent=self)
         if pid is None:  # 用户点击取消
             return
         try:
             pid = int(pid)
-            for i, (start, size, p) in enumerate(self.allocated):
-                if p == pid:
-                    # 释放内存
-                    self.memory.append((start, size))
-                    self.memory.sort()
-                    self.merge_memory()
-                    del self.allocated[i]
-                    self.draw_memory()
-                    return
-
-            messagebox.showerror("错误", "未找到该进程", parent=self)
+            # 释放内存，只与前后相邻的空闲分区合并
+            if self.allocator.release(pid) is None:
+                messagebox.showerror("错误", "未找到该进程", parent=self)
+                return
+            self.record("free", pid)
+            self.draw_memory()
         except ValueError:
             messagebox.showerror("错误", "请输入有效的整数", parent=self)
 
     def clear_all_processes(self):
         # 清空所有进程
-        if not self.allocated:
+        if not self.allocator.allocated:
             messagebox.showinfo("提示", "当前没有已分配的进程", parent=self)
             return
 
-        # 将所有已分配分区释放
-        for start, size, pid in self.allocated:
-            self.memory.append((start, size))
-        self.allocated = []  # 清空已分配分区表
-        self.max_pid = 0
-
-        # 合并所有空闲分区
-        self.memory.sort()
-        self.merge_memory()
+        # 所有分区都释放后内存恢复为一整块空闲区
+        self.init_memory()
 
         # 更新界面
         self.draw_memory()
         messagebox.showinfo("提示", "已清空所有进程", parent=self)
-
-    def merge_memory(self):
-        # 合并相邻的空闲分区
-        i = 0
-        while i < len(self.memory) - 1:
-            if self.memory[i][0] + self.memory[i][1] == self.memory[i + 1][0]:
-                self.memory[i] = (self.memory[i][0], self.memory[i][1] + self.memory[i + 1][1])
-                del self.memory[i + 1]
-            else:
-                i += 1
-
@@ -0,0 +1,121 @@
+"""缺页时的预调页
+
+缺页调入所需页之后，由预取器预测接下来可能用到的页，在同一次缺页处理中把它们
+一并调入作业的空闲块；允许占用冷块时，还可以换出置换策略下一批要淘汰的页来腾出块。
+预取来的页第一次被访问时也会触发一次预测，使顺序扫描能一直领先于访问。
+
+- ReadAhead: 固定窗口顺序预读，调入 page+1 .. page+window。
+- StridePrefetcher: 连续两次触发的页号差相同就认为是等步长访问，按步长预取。
+- HistoryPrefetcher: 记录每个页之后紧接着触发的页（一阶马尔可夫），预取出现最多的几个。
+
+预取器同时统计预取的页中有多少后来被用到、有多少直到被换出都没用过（浪费的 I/O）。
+"""
+from collections import Counter
+
+
+class Prefetcher:
+    name = ""
+
+    def __init__(self, degree=4, use_cold=False):
+        self.degree = degree  # 每次最多预取的页数
+        self.use_cold = use_cold  # 没有空闲块时是否换出冷页来装预取页
+        self.pending = set()  # 已预取、尚未被访问的 (作业, 页号)
+        self.issued = 0
+        self.useful = 0
+        self.wasted = 0
+        self.cold_evictions = 0
+
+    def predict(self, job_id, page_number):
+        """返回按优先级排列的待预取页号"""
+        raise NotImplementedError
+
+    def loaded(self, job_id, page_number):
+        self.pending.add((job_id, page_number))
+        self.issued += 1
+
+    def first_use(self, job_id, page_number):
+        """页面被访问时调用，若是预取来的页第一次被用到则返回 True"""
+        key = (job_id, page_number)
+        if key in self.pending:
+            self.pending.remove(key)
+            self.useful += 1
+            return True
+        return False
+
+    def unloaded(self, job_id, page_number):
+        key = (job_id, page_number)
+        if key in self.pending:
+            self.pending.remove(key)
+            self.wasted += 1
+
+    @property
+    def accuracy(self):
+        return self.useful / self.issued if self.issued else 0.0
+
+    def report(self):
+        return "\n".join([
+            f"预取策略: {self.name}, 每次至多 {self.degree} 页" + (", 可占用冷块" if self.use_cold else ""),
+            f"预取页数: {self.issued}, 被用到 {self.useful}, 未用即换出 {self.wasted}, "
+            f"尚未用到 {len(self.pending)}",
+            f"预取准确率: {self.accuracy:.2%}",
+            f"为预取换出的冷页: {self.cold_evictions}",
+        ])
+
+
+class ReadAhead(Prefetcher):
+    name = "readahead"
+
+    def predict(self, job_id, page_number):
+        return [page_number + i for i in range(1, self.degree + 1)]
+
+
+class StridePrefetcher(Prefetcher):
+    name = "stride"
+
+    def __init__(self, degree=4, use_cold=False):
+        super().__init__(degree, use_cold)
+        self.last = {}  # 作业 → (上次触发的页号, 上次的步长)
+
+    def predict(self, job_id, page_number):
+        last_page, last_stride = self.last.get(job_id, (None, None))
+        stride = None if last_page is None else page_number - last_page
+        self.last[job_id] = (page_number, stride)
+        if not stride or stride != last_stride:
+            return []
+        return [page_number + stride * i for i in range(1, self.degree + 1)]
+
+
+class HistoryPrefetcher(Prefetcher):
+    name = "history"
+
+    def __init__(self, degree=2, use_cold=False):
+        super().__init__(degree, use_cold)
+        self.previous = {}  # 作业 → 上次触发的页号
+        self.successors = {}  # (作业, 页号) → Counter(之后紧接着触发的页号)
+
+    def predict(self, job_id, page_number):
+        previous = self.previous.get(job_id)
+        if previous is not None:
+            key = (job_id, previous)
+            counter = self.successors.get(key)
+            if counter is None:
+                counter = self.successors[key] = Counter()
+            counter[page_number] += 1
+        self.previous[job_id] = page_number
+        counter = self.successors.get((job_id, page_number))
+        if counter is None:
+            return []
+        return [page for page, _ in counter.most_common(self.degree)]
+
+
+PREFETCHERS = {
+    "readahead": ReadAhead,
+    "stride": StridePrefetcher,
+    "history": HistoryPrefetcher,
+}
+
+
+def make_prefetcher(name, degree=4, use_cold=False):
+    if name not in PREFETCHERS:
+        raise ValueError(f"未知的预取策略: {name}")
+    return PREFETCHERS[name](degree, use_cold)
@@ -0,0 +1,357 @@
+"""页面置换策略
+
+所有策略都以帧号为单位工作，由 PagingManager 在以下时机调用:
+
+- admit(frame, page): 页面装入帧（预装或缺页调入）
+- access(frame, page): 帧中页面被访问（命中或刚调入后的那次访问）
+- access_run(frames, pages, counts, lasts, length): 一段连续 length 次命中的批量更新，
+  各帧按最后一次访问的先后排列，counts 为各帧的访问次数，lasts 为最后一次访问在该段中的位置
+- evict(): 选出并移除一个被置换帧
+- discard(frame): 帧被收回，不再参与置换
+- candidates(count): 不改变状态，按先后给出接下来最可能被淘汰的至多 count 个帧（供预清洗）
+"""
+import heapq
+from array import array
+from collections import OrderedDict, deque
+from itertools import islice
+
+
+class ReplacementPolicy:
+    name = ""
+
+    def admit(self, frame, page):
+        raise NotImplementedError
+
+    def access(self, frame, page):
+        pass
+
+    def access_run(self, frames, pages, counts, lasts, length):
+        # 只依赖访问次数和最后访问先后的策略，按此顺序逐次调用 access 与逐条访问等价
+        for frame, page, count in zip(frames, pages, counts):
+            for _ in range(count):
+                self.access(frame, page)
+
+    def evict(self):
+        raise NotImplementedError
+
+    def discard(self, frame):
+        raise NotImplementedError
+
+    def candidates(self, count):
+        return []
+
+    def __len__(self):
+        raise NotImplementedError
+
+
+class FIFOPolicy(ReplacementPolicy):
+    """先进先出: 按调入顺序排队"""
+    name = "FIFO"
+
+    def __init__(self):
+        self.queue = deque()
+
+    def admit(self, frame, page):
+        self.queue.append(frame)
+
+    def access_run(self, frames, pages, counts, lasts, length):
+        pass
+
+    def evict(self):
+        return self.queue.popleft()
+
+    def discard(self, frame):
+        self.queue.remove(frame)
+
+    def candidates(self, count):
+        return list(islice(self.queue, count))
+
+    def __len__(self):
+        return len(self.queue)
+
+
+class LRUPolicy(ReplacementPolicy):
+    """最近最久未使用: 有序哈希表，访问即移到队尾，O(1)"""
+    name = "LRU"
+
+    def __init__(self):
+        self.order = OrderedDict()
+
+    def admit(self, frame, page):
+        self.order[frame] = None
+
+    def access(self, frame, page):
+        self.order.move_to_end(frame)
+
+    def access_run(self, frames, pages, counts, lasts, length):
+        move_to_end = self.order.move_to_end
+        for frame in frames:
+            move_to_end(frame)
+
+    def evict(self):
+        return self.order.popitem(last=False)[0]
+
+    def discard(self, frame):
+        del self.order[frame]
+
+    def candidates(self, count):
+        return list(islice(self.order, count))
+
+    def __len__(self):
+        return len(self.order)
+
+
+class ClockPolicy(ReplacementPolicy):
+    """时钟（二次机会）: 帧排成环，指针扫过访问位为1的帧时清零"""
+    name = "CLOCK"
+
+    def __init__(self):
+        self.ring = []
+        self.slot = {}  # 帧号 → 在环中的位置
+        self.referenced = {}
+        self.hand = 0
+
+    def admit(self, frame, page):
+        if frame in self.slot:
+            # 新页装入刚被置换出的槽位，指针越过该槽
+            self.hand = (self.slot[frame] + 1) % len(self.ring)
+        else:
+            self.slot[frame] = len(self.ring)
+            self.ring.append(frame)
+        self.referenced[frame] = True
+
+    def access(self, frame, page):
+        self.referenced[frame] = True
+
+    def access_run(self, frames, pages, counts, lasts, length):
+        referenced = self.referenced
+        for frame in frames:
+            referenced[frame] = True
+
+    def evict(self):
+        ring, referenced = self.ring, self.referenced
+        while True:
+            frame = ring[self.hand]
+            if frame in referenced:
+                if not referenced[frame]:
+                    del referenced[frame]
+                    return frame
+                referenced[frame] = False
+            self.hand = (self.hand + 1) % len(ring)
+
+    def discard(self, frame):
+        index = self.slot.pop(frame)
+        self.referenced.pop(frame, None)
+        del self.ring[index]
+        for i in range(index, len(self.ring)):
+            self.slot[self.ring[i]] = i
+        if self.hand > index:
+            self.hand -= 1
+        if self.hand >= len(self.ring):
+            self.hand = 0
+
+    def candidates(self, count):
+        # 从指针处起访问位为 0 的帧会最先被淘汰
+        ring, referenced = self.ring, self.referenced
+        result = []
+        for i in range(len(ring)):
+            frame = ring[(self.hand + i) % len(ring)]
+            if frame in referenced and not referenced[frame]:
+                result.append(frame)
+                if len(result) == count:
+                    break
+        return result
+
+    def __len__(self):
+        return len(self.referenced)
+
+
+class LFUPolicy(ReplacementPolicy):
+    """最不经常使用: 按访问次数分桶，桶内按调入先后，O(1)"""
+    name = "LFU"
+
+    def __init__(self):
+        self.count = {}
+        self.buckets = {}  # 访问次数 → OrderedDict(帧号)
+        self.min_count = 0
+
+    def _bucket(self, count):
+        bucket = self.buckets.get(count)
+        if bucket is None:
+            bucket = self.buckets[count] = OrderedDict()
+        return bucket
+
+    def _unlink(self, frame):
+        count = self.count.pop(frame)
+        bucket = self.buckets[count]
+        del bucket[frame]
+        if not bucket:
+            del self.buckets[count]
+        return count
+
+    def admit(self, frame, page):
+        self.count[frame] = 0
+        self._bucket(0)[frame] = None
+        self.min_count = 0
+
+    def access(self, frame, page):
+        count = self._unlink(frame) + 1
+        self.count[frame] = count
+        self._bucket(count)[frame] = None
+        if self.min_count not in self.buckets:
+            self.min_count = count
+
+    def access_run(self, frames, pages, counts, lasts, length):
+        for frame, count in zip(frames, counts):
+            count += self._unlink(frame)
+            self.count[frame] = count
+            self._bucket(count)[frame] = None
+        if self.min_count not in self.buckets:
+            self.min_count = min(self.buckets)
+
+    def evict(self):
+        if self.min_count not in self.buckets:
+            self.min_count = min(self.buckets)
+        frame = next(iter(self.buckets[self.min_count]))
+        self._unlink(frame)
+        return frame
+
+    def discard(self, frame):
+        self._unlink(frame)
+
+    def candidates(self, count):
+        result = []
+        for frequency in sorted(self.buckets):
+            result.extend(islice(self.buckets[frequency], count - len(result)))
+            if len(result) == count:
+                break
+        return result
+
+    def __len__(self):
+        return len(self.count)
+
+
+def next_use_positions(pages):
+    """预计算访问序列中每个位置的页下次被访问的位置
+
+    返回 (next_use, first_use)，first_use 为每个页第一次被访问的位置。
+    不再被访问的位置记为 len(pages) + 位置，保证互不相同且大于所有真实位置。
+    """
+    n = len(pages)
+    next_use = array("q", bytes(8 * n))
+    seen = {}
+    for i in range(n - 1, -1, -1):
+        page = pages[i]
+        next_use[i] = seen.get(page, n + i)
+        seen[page] = i
+    return next_use, seen
+
+
+class OPTPolicy(ReplacementPolicy):
+    """最佳置换（Belady）: 淘汰下次访问最远的页
+
+    下次访问位置在构造时一次性算好，置换时用大根堆（惰性删除）取最远者，
+    每次 O(log n)。要求之后的每次访问都按 future 的顺序经过 access。
+    """
+    name = "OPT"
+
+    def __init__(self, future):
+        self.next_use, self.upcoming = next_use_positions(future)
+        self.end = len(future)
+        self.position = 0
+        self.key = {}  # 帧号 → 该帧页面的下次访问位置
+        self.heap = []
+
+    def __getstate__(self):
+        # next_use 可由访问序列重建，检查点中不保存
+        state = dict(self.__dict__)
+        state["next_use"] = None
+        return state
+
+    def attach_future(self, future):
+        """从检查点恢复后重新给出访问序列
+
+        future 可以比原序列短（只回放到更早的位置），此时按截短后的序列重算各页的
+        下次访问位置，状态与一开始就只给出这一段时相同。
+        """
+        if len(future) == self.end:
+            self.next_use = next_use_positions(future)[0]
+            return
+        if not self.position <= len(future) < self.end:
+            raise ValueError("访问序列与检查点不一致")
+        # 各页的下次访问位置互不相同，可由它反查驻留帧中的页
+        page_of = {key: page for page, key in self.upcoming.items()}
+        self.next_use, self.upcoming = next_use_positions(future)
+        self.end = len(future)
+        for i in range(self.position):
+            self.upcoming[future[i]] = self.next_use[i]
+        for frame, key in self.key.items():
+            self.key[frame] = self.upcoming.get(page_of.get(key), 2 * self.end)
+        self.heap = [(-k, f) for f, k in self.key.items()]
+        heapq.heapify(self.heap)
+
+    def _set(self, frame, key):
+        self.key[frame] = key
+        heapq.heappush(self.heap, (-key, frame))
+        if len(self.heap) > 2 * len(self.key) + 16:
+            # 过期项太多时重建，堆大小与帧数同阶
+            self.heap = [(-k, f) for f, k in self.key.items()]
+            heapq.heapify(self.heap)
+
+    def admit(self, frame, page):
+        self._set(frame, self.upcoming.get(page, 2 * self.end))
+
+    def access(self, frame, page):
+        if self.position < self.end:
+            key = self.next_use[self.position]
+            self.upcoming[page] = key
+            self._set(frame, key)
+        self.position += 1
+
+    def access_run(self, frames, pages, counts, lasts, length):
+        # 只有每页最后一次访问的下次访问位置决定之后的置换
+        base = self.position
+        for frame, page, last in zip(frames, pages, lasts):
+            if base + last < self.end:
+                key = self.next_use[base + last]
+                self.upcoming[page] = key
+                self._set(frame, key)
+        self.position += length
+
+    def evict(self):
+        heap, key = self.heap, self.key
+        while True:
+            neg, frame = heapq.heappop(heap)
+            if key.get(frame) == -neg:
+                del key[frame]
+                return frame
+
+    def discard(self, frame):
+        del self.key[frame]
+
+    def candidates(self, count):
+        return [frame for frame, _ in heapq.nlargest(count, self.key.items(), key=lambda item: item[1])]
+
+    def __len__(self):
+        return len(self.key)
+
+
+POLICIES = {
+    "FIFO": FIFOPolicy,
+    "LRU": LRUPolicy,
+    "CLOCK": ClockPolicy,
+    "LFU": LFUPolicy,
+    "OPT": OPTPolicy,
+}
+
+
+def make_policy(name, future=None):
+    """按名称创建置换策略，OPT 需要完整的页面访问序列 future"""
+    name = name.upper()
+    if name not in POLICIES:
+        raise ValueError(f"未知的置换策略: {name}")
+    if name == "OPT":
+        if future is None:
+            raise ValueError("OPT 置换需要预先给出完整的页面访问序列")
+        return OPTPolicy(future)
+    return POLICIES[name]()
@@ -0,0 +1,316 @@
+"""一遍扫描求出所有物理块数下的缺页率曲线（Mattson 栈算法）
+
+LRU 和 OPT 都是栈算法: c 个块时内存中的页总是 c+1 个块时的子集，因此只要
+求出每次访问的栈距离 d，c 个块下的缺页次数就是“首次访问次数 + d > c 的次数”。
+
+- LRU: 栈距离 = 上次访问以来访问过的不同页数 + 1，用树状数组按时间戳计数，
+  每次 O(log n)。时间戳用尽时按最近访问顺序重新编号，内存只与不同页数有关。
+- OPT: 按“下次访问越早优先级越高”维护优先级栈，需要完整的访问序列。
+  栈中只有台阶（下次访问位置的前缀最大值）上的页会移动，台阶按层号存成有序表，
+  每次访问用二分查找定位要顺延的一段，不再逐层比较。
+
+用法: python stack_distance.py trace.txt --policy LRU --csv curve.csv
+"""
+import argparse
+import csv
+import sys
+from bisect import bisect_left, bisect_right
+from itertools import compress
+from operator import gt
+
+from paging_replay import read_pages, read_trace
+from replacement import next_use_positions
+
+
+class FenwickTree:
+    """树状数组: 单点增减、前缀求和均为 O(log n)"""
+
+    def __init__(self, size, values=None):
+        self.size = size
+        tree = [0] * (size + 1)
+        if values is not None:
+            # O(n) 建树
+            tree[1:len(values) + 1] = values
+            for i in range(1, size + 1):
+                parent = i + (i & -i)
+                if parent <= size:
+                    tree[parent] += tree[i]
+        self.tree = tree
+
+    def add(self, index, delta):
+        tree, size = self.tree, self.size
+        index += 1
+        while index <= size:
+            tree[index] += delta
+            index += index & -index
+
+    def prefix(self, index):
+        """下标 [0, index) 的和"""
+        tree = self.tree
+        total = 0
+        while index > 0:
+            total += tree[index]
+            index -= index & -index
+        return total
+
+
+def lru_stack_distances(pages):
+    """依次生成每次访问的 LRU 栈距离，首次访问生成 0"""
+    last = {}  # 页号 → 最近一次访问的时间戳
+    capacity = 1024
+    tree = FenwickTree(capacity)
+    now = 0
+    for page in pages:
+        if now == capacity:
+            # 时间戳用尽: 按最近访问先后重新编号为 0..m-1
+            order = sorted(last, key=last.__getitem__)
+            last = {p: i for i, p in enumerate(order)}
+            now = len(order)
+            capacity = 2 * now + 1024
+            tree = FenwickTree(capacity, [1] * now)
+        stamp = last.get(page)
+        if stamp is None:
+            yield 0
+        else:
+            # 时间戳大于 stamp 的标记数即上次访问以来访问过的其他页数
+            yield len(last) - tree.prefix(stamp + 1) + 1
+            tree.add(stamp, -1)
+        last[page] = now
+        tree.add(now, 1)
+        now += 1
+
+
+class _Steps:
+    """优先级栈某一段里的台阶（下次访问位置的前缀最大值），按层号递增排列
+
+    每个台阶带着它到下一个台阶之间那一段的台阶表（gaps）及该段的最大值（tops）。
+    """
+    __slots__ = ("levels", "pages", "nexts", "gaps", "tops")
+
+    def __init__(self, levels=None, pages=None, nexts=None, gaps=None, tops=None):
+        self.levels = levels if levels is not None else []
+        self.pages = pages if pages is not None else []
+        self.nexts = nexts if nexts is not None else []
+        self.gaps = gaps if gaps is not None else []
+        self.tops = tops if tops is not None else []
+
+    def top(self):
+        """整段的最大值，即最后一个台阶的下次访问位置；空段为 -1"""
+        return self.nexts[-1] if self.nexts else -1
+
+    def cut(self, i):
+        """截下第 i 个台阶起的部分并返回"""
+        if i == 0:
+            tail = _Steps(self.levels, self.pages, self.nexts, self.gaps, self.tops)
+            self.levels, self.pages, self.nexts, self.gaps, self.tops = [], [], [], [], []
+            return tail
+        tail = _Steps(self.levels[i:], self.pages[i:], self.nexts[i:], self.gaps[i:], self.tops[i:])
+        del self.levels[i:], self.pages[i:], self.nexts[i:], self.gaps[i:], self.tops[i:]
+        return tail
+
+    def extend(self, other):
+        self.levels += other.levels
+        self.pages += other.pages
+        self.nexts += other.nexts
+        self.gaps += other.gaps
+        self.tops += other.tops
+
+    def insert(self, i, level, page, next_use, gap):
+        self.levels.insert(i, level)
+        self.pages.insert(i, page)
+        self.nexts.insert(i, next_use)
+        self.gaps.insert(i, gap)
+        self.tops.insert(i, gap.top())
+
+    def delete(self, i, j):
+        del self.levels[i:j], self.pages[i:j], self.nexts[i:j], self.gaps[i:j], self.tops[i:j]
+
+
+class PriorityStack:
+    """OPT 的优先级栈，access 返回被访问页原来的深度（栈顶为 1，不在栈中为 0）
+
+    栈顶为刚访问的页；其余各层由上一层淘汰下来的页与本层原有页比较，下次访问
+    更早的留在本层，另一个继续下沉，直到被访问页原来所在的层。被挤下去的页只在
+    “台阶”之间移动: 台阶指第 1 层起下次访问位置比上面各层都晚的层，移动的是
+    其中下次访问晚于原栈顶页、层号小于被访问页的连续一段，整段顺延一格只需一次
+    列表插入。台阶之间的层原地不动，它们按同样的方式递归地组织成台阶表，值变小
+    的台阶露出其下一段的台阶时，截下那张表的后半段接到上一层即可。
+
+    每次访问只做几次二分查找和列表拼接，不再逐层比较。
+    """
+
+    def __init__(self):
+        self.top = None
+        self.top_next = -1
+        self.size = 1  # 层数（含栈顶）
+        self.level = {}  # 不在最上层台阶表中的页 → 层号，这些页的层号不会变
+        self.steps = _Steps()  # 栈顶以下的台阶表
+
+    def _remove(self, steps, bottom):
+        """从台阶表 steps 中取走第 bottom 层的页，返回 bottom 之后那一段的台阶表
+
+        被访问页的下次访问位置是全栈最小的，因此它所在的段一定为空，
+        逐层找到它后，把沿途各表在 bottom 之后的部分由内向外依次拼接。
+        """
+        parts = []
+        parent = None
+        while True:
+            i = bisect_left(steps.levels, bottom)
+            parts.append(steps.cut(i))
+            if parent is not None:
+                parent.tops[-1] = steps.top()
+            if parts[-1].levels and parts[-1].levels[0] == bottom:
+                parts[-1].delete(0, 1)
+                break
+            parent, steps = steps, steps.gaps[i - 1]
+        tail = parts.pop()
+        while parts:
+            tail.extend(parts.pop())
+        return tail
+
+    def _raise(self, j):
+        """第 j 个台阶的值变小后，把其后一段中比它大的台阶提升到最上层"""
+        steps = self.steps
+        gap = steps.gaps[j]
+        raised = gap.cut(bisect_right(gap.nexts, steps.nexts[j]))
+        steps.tops[j] = gap.top()
+        for page in raised.pages:
+            del self.level[page]
+        steps.levels[j + 1:j + 1] = raised.levels
+        steps.pages[j + 1:j + 1] = raised.pages
+        steps.nexts[j + 1:j + 1] = raised.nexts
+        steps.gaps[j + 1:j + 1] = raised.gaps
+        steps.tops[j + 1:j + 1] = raised.tops
+
+    def access(self, page, next_use):
+        if page == self.top:
+            self.top_next = next_use
+            return 1
+        if self.top is None:
+            self.top, self.top_next = page, next_use
+            return 0
+        steps = self.steps
+        bottom = self.level.pop(page, None)
+        if bottom is not None:
+            depth = bottom + 1
+            j = bisect_left(steps.levels, bottom) - 1
+            tail = self._remove(steps.gaps[j], bottom)
+            steps.tops[j] = steps.gaps[j].top()
+        elif steps.pages and steps.pages[0] == page:
+            # 只有第 1 层的页才可能既是台阶又是下次访问最早的页
+            bottom, depth = 1, 2
+            tail = steps.gaps[0]
+            steps.delete(0, 1)
+        else:
+            bottom, depth = self.size, 0
+            self.size += 1
+            tail = _Steps()
+        carried, carried_next = self.top, self.top_next
+        self.top, self.top_next = page, next_use
+        first = bisect_right(steps.nexts, carried_next)
+        end = bisect_left(steps.levels, bottom)
+        if first < end:
+            # 台阶 first..end-1 上的页各下沉到下一个台阶，最后一个落到 bottom
+            steps.pages.insert(first, carried)
+            steps.nexts.insert(first, carried_next)
+            steps.levels.insert(end, bottom)
+            steps.gaps.insert(end, tail)
+            steps.tops.insert(end, tail.top())
+            raised = compress(range(first, end), map(gt, steps.tops[first:end], steps.nexts[first:end]))
+            for j in reversed(list(raised)):
+                self._raise(j)
+        else:
+            # 原栈顶页直接落到 bottom，其后值比它小的台阶被它挡住，并入它下面的一段
+            e = bisect_left(steps.nexts, carried_next, end)
+            if end < e:
+                sunk = _Steps(steps.levels[end:e], steps.pages[end:e], steps.nexts[end:e],
+                              steps.gaps[end:e], steps.tops[end:e])
+                self.level.update(zip(sunk.pages, sunk.levels))
+                tail.extend(sunk)
+                steps.delete(end, e)
+            steps.insert(end, bottom, carried, carried_next, tail)
+        return depth
+
+
+def opt_stack_distances(pages):
+    """依次生成每次访问的 OPT 栈距离，首次访问生成 0"""
+    next_use, _ = next_use_positions(pages)
+    stack = PriorityStack()
+    for i, page in enumerate(pages):
+        yield stack.access(page, next_use[i])
+
+
+def stack_distance_histogram(pages, policy="LRU"):
+    """统计栈距离分布，返回 (histogram, cold_misses, accesses)
+
+    histogram[d] 为栈距离恰为 d 的访问次数（下标 0 不用）。
+    """
+    policy = policy.upper()
+    if policy == "LRU":
+        distances = lru_stack_distances(pages)
+    elif policy == "OPT":
+        distances = opt_stack_distances(pages)
+    else:
+        raise ValueError(f"{policy} 不是栈算法，不能一遍求出缺页率曲线")
+    histogram = [0]
+    cold = accesses = 0
+    for d in distances:
+        accesses += 1
+        if d == 0:
+            cold += 1
+            continue
+        if d >= len(histogram):
+            histogram.extend([0] * (d + 1 - len(histogram)))
+        histogram[d] += 1
+    return histogram, cold, accesses
+
+
+def miss_ratio_curve(histogram, cold, accesses, max_frames=None):
+    """由栈距离分布求出 1..max_frames 块时的 (块数, 缺页次数, 缺页率)"""
+    if max_frames is None:
+        max_frames = max(len(histogram) - 1, 1)
+    misses = accesses  # 0 个块时全部缺页，每多一块减去栈距离恰为该块数的访问
+    rows = []
+    for frames in range(1, max_frames + 1):
+        if frames < len(histogram):
+            misses -= histogram[frames]
+        rows.append((frames, misses, misses / accesses if accesses else 0.0))
+    return rows
+
+
+def write_csv(rows, path):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["frames", "misses", "miss_ratio"])
+        for frames, misses, ratio in rows:
+            writer.writerow([frames, misses, f"{ratio:.6f}"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="一遍扫描求出各物理块数下的缺页率")
+    parser.add_argument("trace", help="访问序列文件，- 表示标准输入（仅 LRU）")
+    parser.add_argument("--policy", default="LRU", type=str.upper, choices=["LRU", "OPT"])
+    parser.add_argument("--max-frames", type=int, default=None, help="默认到最大栈距离为止")
+    parser.add_argument("--csv", default=None, help="输出 CSV 文件，缺省时打印表格")
+    args = parser.parse_args(argv)
+
+    if args.policy == "OPT":
+        if args.trace == "-":
+            parser.error("OPT 需要完整的访问序列，不能从标准输入读取")
+        pages = read_pages(args.trace)
+    else:
+        pages = (page for _, page, _ in read_trace(args.trace))
+    histogram, cold, accesses = stack_distance_histogram(pages, args.policy)
+    rows = miss_ratio_curve(histogram, cold, accesses, args.max_frames)
+
+    if args.csv:
+        write_csv(rows, args.csv)
+    else:
+        print(f"{'物理块数':>8} {'缺页次数':>12} {'缺页率':>10}")
+        for frames, misses, ratio in rows:
+            print(f"{frames:>12} {misses:>16} {ratio:>13.4%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""layout_bars: 不足1像素的块合并成汇总条"""
+from canvas_renderer import layout_bars
+from partition_core import PartitionAllocator
+
+
+def _blocks(spans):
+    return [(("b", start), start, size) for start, size in spans]
+
+
+def test_adjacent_small_blocks_merge():
+    bars = layout_bars(_blocks([(0, 2), (2, 2), (4, 2), (6, 40)]), 0.2)
+    assert [(bar[0], bar[3], bar[4]) for bar in bars] == [
+        (("合并", ("b", 0)), 3, 6), (("b", 6), 1, 40)]
+
+
+def test_gap_blocks_merge_only_with_bridge():
+    spans = [(0, 1), (3, 1), (6, 1), (9, 1), (200, 1)]
+    assert len(layout_bars(_blocks(spans), 0.1)) == len(spans)
+    bars = layout_bars(_blocks(spans), 0.1, bridge=True)
+    assert [(bar[0], bar[3], bar[4]) for bar in bars] == [
+        (("合并", ("b", 0)), 4, 4), (("b", 200), 1, 1)]
+    # 汇总条跨过中间的间隔
+    assert (bars[0][1], bars[0][2]) == (0.0, 1.0)
+
+
+def test_bridge_stops_at_wide_gap():
+    bars = layout_bars(_blocks([(0, 1), (2, 1), (50, 1), (52, 1)]), 0.1, bridge=True)
+    assert [bar[3] for bar in bars] == [2, 2]
+
+
+def test_fit_free_holes_summarised():
+    # 可变分区的空闲分区总被已分配分区隔开，只有跨过间隔才能合并
+    allocator = PartitionAllocator(8000, "first")
+    pids = [allocator.allocate(3) for _ in range(400)]
+    for pid in pids[::2]:
+        allocator.release(pid)
+    free = [(("free", start), start, size) for start, size in allocator.free_blocks()]
+    scale = 800 / allocator.total_size
+    assert all(bar[3] == 1 for bar in layout_bars(free, scale)[:-1])
+    assert any(bar[3] > 1 for bar in layout_bars(free, scale, bridge=True))
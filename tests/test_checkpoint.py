@@ -0,0 +1,45 @@
+"""从检查点恢复的回放与直接回放的结果必须一致"""
+import pytest
+
+from checkpoint import CheckpointWriter
+from paging_replay import make_manager, read_pages, read_trace, replay, resume
+from trace_format import KIND_PAGING, write_paging_trace
+from workloads import phase_pages
+
+START = 1000
+TOTAL = 12_000
+
+
+@pytest.fixture(params=["text", "binary"])
+def trace(request, tmp_path):
+    records = phase_pages(TOTAL, pages=256, phases=6, working_set=24, seed=3)
+    if request.param == "binary":
+        path = tmp_path / "trace.bin"
+        write_paging_trace(path, records)
+    else:
+        path = tmp_path / "trace.txt"
+        path.write_text("".join(f"{op} {page} {offset}\n" for op, page, offset in records))
+    return str(path)
+
+
+def _direct(trace, policy, stop):
+    future = read_pages(trace, START, stop) if policy == "OPT" else None
+    manager = make_manager(12, policy=policy, future=future)
+    return replay(read_trace(trace, START, stop), manager=manager)
+
+
+@pytest.mark.parametrize("stop", [4321, 8000, None])
+@pytest.mark.parametrize("policy", ["OPT", "LRU"])
+def test_resume_matches_direct_replay(trace, tmp_path, policy, stop):
+    # 检查点按整段访问序列写出，恢复时只回放到更早的 stop
+    future = read_pages(trace, START) if policy == "OPT" else None
+    manager = make_manager(12, policy=policy, future=future)
+    path = str(tmp_path / "ck.bin")
+    with CheckpointWriter(path, KIND_PAGING, every=1500) as checkpoint:
+        replay(read_trace(trace, START), manager=manager, checkpoint=checkpoint, step=START)
+
+    step, resumed = resume(path, trace, stop, START)
+    expected = _direct(trace, policy, stop)
+    assert step <= (TOTAL if stop is None else stop)
+    assert (resumed.accesses, resumed.faults, resumed.writebacks) == (
+        expected.accesses, expected.faults, expected.writebacks)
@@ -0,0 +1,104 @@
+"""紧凑: 搬移量最少的窗口、紧凑后的分区布局和增量维护的空闲统计"""
+import random
+
+import pytest
+
+from partition_core import FIT_ALGORITHMS, PartitionAllocator
+
+TOTAL = 2048
+
+
+def _layout(allocator):
+    """按地址排列的 (起始地址, 大小, PID)，空闲分区的 PID 为 None"""
+    items = [(start, size, None) for start, size in allocator.free_blocks()]
+    items.extend((start, size, pid) for pid, (start, size) in allocator.allocated.items())
+    return sorted(items)
+
+
+def _min_moved(allocator, size):
+    """逐个枚举连续窗口，空闲量不小于 size 的窗口中已分配量的最小值"""
+    items = _layout(allocator)
+    best = None
+    for left in range(len(items)):
+        free = used = 0
+        for _, length, pid in items[left:]:
+            if pid is None:
+                free += length
+            else:
+                used += length
+            if free >= size:
+                best = used if best is None else min(best, used)
+                break
+    return best
+
+
+def _check_layout(allocator):
+    items = _layout(allocator)
+    address = 0
+    for start, size, pid in items:
+        assert start == address  # 分区首尾相接，覆盖整个内存
+        address += size
+    assert address == TOTAL
+    for a, b in zip(items, items[1:]):
+        assert not (a[2] is None and b[2] is None)  # 没有相邻的空闲分区
+    holes = [size for _, size, pid in items if pid is None]
+    assert allocator.free_total() == sum(holes)
+    assert allocator.backend.largest_free() == max(holes, default=0)
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("compaction", ["failure", "threshold"])
+@pytest.mark.parametrize("algorithm", FIT_ALGORITHMS)
+def test_random_sequence(algorithm, compaction, seed):
+    rng = random.Random(seed)
+    allocator = PartitionAllocator(TOTAL, algorithm, compaction, compaction_threshold=0.6)
+    for _ in range(1500):
+        if allocator.allocated and rng.random() < 0.45:
+            allocator.release(rng.choice(list(allocator.allocated)))
+        else:
+            size = rng.randint(1, 160)
+            free = allocator.free_total()
+            moved = allocator.bytes_moved
+            expected = _min_moved(allocator, size)
+            pid = allocator.allocate(size)
+            # 空闲总量够就一定能通过紧凑分配成功，且搬移量是最少的
+            assert (pid is None) == (free < size)
+            if pid is not None and compaction == "failure":
+                assert allocator.bytes_moved - moved == expected
+        _check_layout(allocator)
+        if compaction == "threshold":
+            assert allocator.external_fragmentation() <= 0.6
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("algorithm", FIT_ALGORITHMS)
+def test_plan_is_minimal(algorithm, seed):
+    rng = random.Random(seed)
+    allocator = PartitionAllocator(TOTAL, algorithm)
+    for _ in range(600):
+        if allocator.allocated and rng.random() < 0.4:
+            allocator.release(rng.choice(list(allocator.allocated)))
+        else:
+            allocator.allocate(rng.randint(1, 96))
+        size = rng.randint(1, TOTAL // 4)
+        plan = allocator.compaction_plan(size)
+        if allocator.free_total() < size:
+            assert plan is None
+        else:
+            assert sum(length for _, _, _, length in plan) == _min_moved(allocator, size)
+
+    size = allocator.free_total()
+    moved = allocator.bytes_moved
+    expected = _min_moved(allocator, size)
+    allocator.compact()
+    assert allocator.bytes_moved - moved == expected
+    _check_layout(allocator)
+    assert len(allocator.free_blocks()) == (1 if size else 0)
+    assert allocator.external_fragmentation() == 0.0
+
+
+def test_plan_rejects_other_backends_and_oversize():
+    allocator = PartitionAllocator(TOTAL, "first")
+    allocator.allocate(100)
+    assert allocator.compaction_plan(TOTAL) is None
+    assert PartitionAllocator(TOTAL, "buddy").compaction_plan(1) is None
@@ -0,0 +1,52 @@
+"""三种页表存储方式对外的行为必须一致"""
+import random
+
+import pytest
+
+from page_tables import PAGE_TABLES, PageTableEntry, make_page_table
+
+
+def _snapshot(table):
+    return sorted((page, entry.present, entry.frame_number, entry.modified, entry.disk_location)
+                  for page, entry in table.items())
+
+
+def test_backends_agree():
+    rng = random.Random(0)
+    tables = [make_page_table(kind) for kind in sorted(PAGE_TABLES)]
+    pages = [rng.randrange(1 << 20) for _ in range(300)] + list(range(50))
+    for page in pages:
+        disk = rng.randrange(1 << 40)
+        for table in tables:
+            table.add(page, disk)
+    for page in rng.sample(pages, 100):
+        frame = rng.randrange(1024)
+        for table in tables:
+            entry = table[page]
+            entry.present = True
+            entry.frame_number = frame
+            entry.modified = frame % 2 == 0
+    expected = _snapshot(tables[0])
+    for table in tables:
+        assert len(table) == len(set(pages))
+        assert _snapshot(table) == expected
+
+
+@pytest.mark.parametrize("kind", sorted(PAGE_TABLES))
+def test_negative_page_rejected(kind):
+    table = make_page_table(kind)
+    for page in range(8):
+        table.add(page, page * 100)
+    before = _snapshot(table)
+
+    with pytest.raises(ValueError):
+        table.add(-1, 999)
+    with pytest.raises(ValueError):
+        table[-3] = PageTableEntry(-3, 999)
+    assert -1 not in table
+    assert table.get(-1) is None
+    with pytest.raises(KeyError):
+        table[-1]
+    # 负页号不能绕回到已有页表项上
+    assert _snapshot(table) == before
+    assert len(table) == 8
@@ -0,0 +1,58 @@
+"""批量地址变换与逐条回放的结果必须完全一致"""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from page_tables import PAGE_TABLES
+from paging_batch import access_batch, records_to_arrays
+from paging_replay import make_manager, replay, replay_batch
+from replacement import POLICIES
+from workloads import looping_pages, uniform_pages
+
+WORKLOADS = {
+    # 命中为主，连续命中的段大多走整段批量处理
+    "looping": looping_pages(20_000, pages=512, loop=12, noise=0.002, seed=1),
+    # 缺页频繁，短段逐条处理，后半段退回逐条路径
+    "uniform": uniform_pages(20_000, pages=48, seed=2),
+}
+
+
+def _columns(records, chunk):
+    for start in range(0, len(records), chunk):
+        yield records_to_arrays(records[start:start + chunk])
+
+
+@pytest.mark.parametrize("workload", sorted(WORKLOADS))
+@pytest.mark.parametrize("page_table", sorted(PAGE_TABLES))
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_batch_matches_scalar(policy, page_table, workload):
+    records = WORKLOADS[workload]
+    future = [page for _, page, _ in records] if policy == "OPT" else None
+    expected = replay(iter(records), job_blocks=16, policy=policy, future=future,
+                      page_table=page_table)
+    actual = replay_batch(_columns(records, 7_000), job_blocks=16, policy=policy, future=future,
+                          page_table=page_table)
+    assert actual.accesses == expected.accesses
+    assert actual.faults == expected.faults
+    assert actual.writebacks == expected.writebacks
+
+
+@pytest.mark.parametrize("policy", sorted(POLICIES))
+def test_batch_addresses_and_faults(policy):
+    records = WORKLOADS["looping"]
+    future = [page for _, page, _ in records] if policy == "OPT" else None
+    scalar = make_manager(16, policy=policy, future=future)
+    addresses, flags = [], []
+    for op, page, offset in records:
+        if page not in scalar.page_tables["job1"]:
+            scalar.add_page(page, None, "job1")
+        address, fault, _ = scalar.access_page("job1", page, op, offset)
+        addresses.append(address)
+        flags.append(fault)
+
+    batch = make_manager(16, policy=policy, future=future)
+    physical, faults = access_batch(batch, "job1", *records_to_arrays(records))
+    assert physical.tolist() == addresses
+    assert faults.tolist() == flags
+    modified = {page: entry.modified for page, entry in scalar.page_tables["job1"].items()}
+    assert {page: entry.modified for page, entry in batch.page_tables["job1"].items()} == modified
@@ -0,0 +1,97 @@
+"""空闲分区表与逐个扫描地址有序表的参考实现对照"""
+import random
+
+import pytest
+
+from partition_core import FIT_ALGORITHMS, FreeList
+
+TOTAL = 4096
+
+
+def _reference_fit(holes, size, algorithm):
+    """按地址有序的 [起始地址, 大小] 列表逐个扫描，同样大小时取地址最低者"""
+    fits = [(hole_start, hole_size) for hole_start, hole_size in holes if hole_size >= size]
+    if not fits:
+        return None
+    if algorithm == "first":
+        return fits[0][0]
+    if algorithm == "best":
+        return min(fits, key=lambda hole: (hole[1], hole[0]))[0]
+    return min(fits, key=lambda hole: (-hole[1], hole[0]))[0]
+
+
+def _reference_take(holes, start, size):
+    for i, (hole_start, hole_size) in enumerate(holes):
+        if hole_start == start:
+            if hole_size > size:
+                holes[i] = [start + size, hole_size - size]
+            else:
+                del holes[i]
+            return
+
+
+def _reference_release(holes, start, size):
+    holes.append([start, size])
+    holes.sort()
+    merged = []
+    for hole_start, hole_size in holes:
+        if merged and merged[-1][0] + merged[-1][1] == hole_start:
+            merged[-1][1] += hole_size
+        else:
+            merged.append([hole_start, hole_size])
+    holes[:] = merged
+
+
+def _check_invariants(free):
+    holes = list(free)
+    assert holes == sorted(holes)
+    for (start, size), (next_start, _) in zip(holes, holes[1:]):
+        assert start + size < next_start  # 不重叠且没有未合并的相邻空闲分区
+    assert free._sizes == sorted((size, start) for start, size in holes)
+    assert free._holes == dict(holes)
+    assert free._ends == {start + size: start for start, size in holes}
+    assert free.total() == sum(size for _, size in holes)
+    assert len(free) == len(holes)
+    assert free.largest() == max((size for _, size in holes), default=0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("algorithm", FIT_ALGORITHMS)
+def test_matches_reference(algorithm, seed):
+    rng = random.Random(seed)
+    free = FreeList([(0, TOTAL)])
+    find = {"first": free.first_fit, "best": free.best_fit, "worst": free.worst_fit}[algorithm]
+    holes = [[0, TOTAL]]
+    allocated = []
+    for _ in range(3000):
+        if allocated and rng.random() < 0.45:
+            start, size = allocated.pop(rng.randrange(len(allocated)))
+            free.release(start, size)
+            _reference_release(holes, start, size)
+        else:
+            size = rng.randint(1, 96)
+            start = find(size)
+            assert start == _reference_fit(holes, size, algorithm)
+            if start is not None:
+                free.take(start, size)
+                _reference_take(holes, start, size)
+                allocated.append((start, size))
+        assert list(free) == [tuple(hole) for hole in holes]
+        _check_invariants(free)
+
+    for start, size in allocated:
+        free.release(start, size)
+    assert list(free) == [(0, TOTAL)]
+    _check_invariants(free)
+
+
+def test_coalesce_and_pickle_state():
+    free = FreeList([(30, 10), (0, 10), (10, 5), (50, 5), (40, 5)])
+    free.coalesce()
+    assert list(free) == [(0, 15), (30, 15), (50, 5)]
+    _check_invariants(free)
+
+    restored = FreeList()
+    restored.__setstate__(free.__getstate__())
+    assert list(restored) == list(free)
+    _check_invariants(restored)
@@ -0,0 +1,48 @@
+"""一遍求出的缺页率曲线与 PagingManager 逐个块数回放的结果对照"""
+import pytest
+
+from paging_replay import make_manager, replay
+from stack_distance import miss_ratio_curve, stack_distance_histogram
+from workloads import looping_pages, uniform_pages, zipf_pages
+
+FRAMES = (1, 2, 3, 5, 8, 13, 21, 34)
+
+TRACES = {
+    "uniform": uniform_pages(3000, pages=48, seed=1),
+    "looping": looping_pages(3000, pages=200, loop=18, noise=0.05, seed=2),
+    "zipf": zipf_pages(3000, pages=300, s=1.1, seed=3),
+    # 远超 LRU 初始的 1024 个时间戳，要重新编号好几次
+    "long": zipf_pages(12_000, pages=600, s=0.8, seed=4),
+}
+
+
+def _replay_faults(records, policy, frames):
+    future = [page for _, page, _ in records] if policy == "OPT" else None
+    return replay(iter(records), job_blocks=frames, policy=policy, future=future).faults
+
+
+@pytest.mark.parametrize("name", sorted(TRACES))
+@pytest.mark.parametrize("policy", ["LRU", "OPT"])
+def test_curve_matches_replay(policy, name):
+    records = TRACES[name]
+    pages = [page for _, page, _ in records]
+    histogram, cold, accesses = stack_distance_histogram(pages, policy)
+    assert accesses == len(records)
+    assert cold == len(set(pages))
+    curve = miss_ratio_curve(histogram, cold, accesses, max(FRAMES))
+    for frames in FRAMES:
+        assert curve[frames - 1][1] == _replay_faults(records, policy, frames), frames
+
+
+def test_curve_flattens_at_cold_misses():
+    pages = [page for _, page, _ in TRACES["looping"]]
+    histogram, cold, accesses = stack_distance_histogram(pages, "OPT")
+    curve = miss_ratio_curve(histogram, cold, accesses)
+    assert len(curve) == len(histogram) - 1  # 默认到最大栈距离为止
+    assert curve[-1][1] == cold
+    assert all(a[1] >= b[1] for a, b in zip(curve, curve[1:]))
+
+
+def test_non_stack_policy_rejected():
+    with pytest.raises(ValueError):
+        stack_distance_histogram([1, 2, 1], "FIFO")
@@ -0,0 +1,72 @@
+"""快表（TLB）模拟
+
+组相联结构: 页号对组数取模选组，组内最多 ways 项，满了按 LRU 或随机淘汰。
+ways 等于总项数时即全相联。表项以 (作业, 页号) 为键，值为块号。
+"""
+import random
+from collections import OrderedDict
+
+
+class TLB:
+    def __init__(self, entries=16, ways=None, policy="LRU", seed=0):
+        ways = entries if ways is None else ways
+        if entries <= 0 or ways <= 0 or entries % ways:
+            raise ValueError("TLB 项数必须是组相联路数的正整数倍")
+        policy = policy.upper()
+        if policy not in ("LRU", "RANDOM"):
+            raise ValueError(f"未知的 TLB 替换策略: {policy}")
+        self.entries = entries
+        self.ways = ways
+        self.num_sets = entries // ways
+        self.policy = policy
+        self.sets = [OrderedDict() for _ in range(self.num_sets)]
+        self.random = random.Random(seed)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def lookup(self, job_id, page_number):
+        """查快表，命中返回块号，否则返回 None"""
+        entries = self.sets[page_number % self.num_sets]
+        key = (job_id, page_number)
+        frame = entries.get(key)
+        if frame is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        if self.policy == "LRU":
+            entries.move_to_end(key)
+        return frame
+
+    def insert(self, job_id, page_number, frame):
+        entries = self.sets[page_number % self.num_sets]
+        key = (job_id, page_number)
+        if key not in entries and len(entries) >= self.ways:
+            if self.policy == "LRU":
+                entries.popitem(last=False)
+            else:
+                del entries[self.random.choice(list(entries))]
+        entries[key] = frame
+
+    def invalidate(self, job_id, page_number):
+        """页面被换出时作废对应的快表项"""
+        if self.sets[page_number % self.num_sets].pop((job_id, page_number), None) is not None:
+            self.invalidations += 1
+
+    def flush(self):
+        for entries in self.sets:
+            entries.clear()
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def effective_access_time(self, tlb_time=1.0, memory_time=100.0, levels=1):
+        """有效访存时间: 命中时查快表+访存，未命中时还要逐级访问 levels 级页表"""
+        h = self.hit_ratio
+        return h * (tlb_time + memory_time) + (1 - h) * (tlb_time + (levels + 1) * memory_time)
+
+    def reach(self, block_size):
+        """快表覆盖的地址范围（字节）"""
+        return self.entries * block_size
@@ -0,0 +1,142 @@
+"""访问序列的导入导出
+
+- import-paging: 文本分页访问序列（paging_replay 的格式）→ 二进制
+- import-lackey: Valgrind lackey（--trace-mem=yes）输出的地址序列 → 二进制分页访问序列
+- import-partition: 文本分区事件（partition_replay 的格式）→ 二进制
+- export: 二进制 → 文本，可以只导出 [start, stop) 一段
+- info: 显示二进制文件的类型、页面大小和记录数
+
+用法: python trace_convert.py import-lackey lackey.log trace.bin --block-size 4096
+"""
+import argparse
+import sys
+
+from paging_replay import read_trace
+from partition_replay import read_events
+from trace_format import (KIND_PAGING, open_trace, read_header, write_paging_trace,
+                          write_partition_trace)
+
+
+def parse_lackey(lines, block_size=4096, instructions=True):
+    """解析 lackey 的访存记录，生成 (操作, 页号, 页内地址)
+
+    每行形如 ``I  04001c42,3``、`` L 1ffefff8a0,8``、`` S ...``、`` M ...``:
+    I 取指和 L 读按 load，S 写按 save，M 修改按先 load 后 save；以 == 开头的是
+    Valgrind 自己的输出，跳过。一次访问跨页时对后一页再记一次。
+    """
+    offset_bits = block_size.bit_length() - 1
+    mask = block_size - 1
+    for line in lines:
+        if not line.strip() or line.startswith("=="):
+            continue
+        fields = line.split()
+        if len(fields) != 2 or "," not in fields[1]:
+            raise ValueError(f"无法解析的 lackey 记录: {line.rstrip()!r}")
+        kind = fields[0]
+        address, size = fields[1].split(",")
+        address, size = int(address, 16), int(size)
+        if kind == "I":
+            if not instructions:
+                continue
+            ops = ("load",)
+        elif kind == "L":
+            ops = ("load",)
+        elif kind == "S":
+            ops = ("save",)
+        elif kind == "M":
+            ops = ("load", "save")
+        else:
+            raise ValueError(f"未知的 lackey 访问类型: {kind!r}")
+        page = address >> offset_bits
+        last_page = (address + max(size, 1) - 1) >> offset_bits
+        for op in ops:
+            yield op, page, address & mask
+            if last_page != page:
+                yield op, last_page, 0
+
+
+def export_text(path, out, start=0, stop=None):
+    """把二进制文件的 [start, stop) 段导出为文本，返回导出的条数"""
+    count = 0
+    with open_trace(path) as trace:
+        paging = trace.kind == KIND_PAGING
+        for record in trace.records(start, stop):
+            if paging:
+                out.write("%s %d %d\n" % record)
+            elif record[0] == "alloc":
+                out.write("alloc %d %d\n" % record[1:])
+            else:
+                out.write("free %d\n" % record[1])
+            count += 1
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="访问序列的导入导出")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("import-paging", help="文本分页访问序列 → 二进制")
+    command.add_argument("source", help="文本文件，- 表示标准输入")
+    command.add_argument("target")
+    command.add_argument("--block-size", type=int, default=1024, help="页面大小(字节)")
+
+    command = commands.add_parser("import-lackey", help="Valgrind lackey 地址序列 → 二进制")
+    command.add_argument("source", help="lackey 输出，- 表示标准输入")
+    command.add_argument("target")
+    command.add_argument("--block-size", type=int, default=4096, help="页面大小(字节)")
+    command.add_argument("--no-instructions", action="store_true", help="忽略取指访问")
+
+    command = commands.add_parser("import-partition", help="文本分区事件 → 二进制")
+    command.add_argument("source", help="文本文件，- 表示标准输入")
+    command.add_argument("target")
+
+    command = commands.add_parser("export", help="二进制 → 文本")
+    command.add_argument("source")
+    command.add_argument("target", nargs="?", default="-", help="文本文件，缺省输出到标准输出")
+    command.add_argument("--start", type=int, default=0, help="起始记录下标")
+    command.add_argument("--stop", type=int, default=None, help="结束记录下标（不含）")
+
+    command = commands.add_parser("info", help="显示二进制文件信息")
+    command.add_argument("source")
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "import-paging":
+            count = write_paging_trace(args.target, read_trace(args.source), args.block_size)
+        elif args.command == "import-lackey":
+            if args.block_size & (args.block_size - 1):
+                parser.error("页面大小必须是 2 的幂")
+            stream = sys.stdin if args.source == "-" else open(args.source, encoding="utf-8")
+            try:
+                records = parse_lackey(stream, args.block_size, not args.no_instructions)
+                count = write_paging_trace(args.target, records, args.block_size)
+            finally:
+                if stream is not sys.stdin:
+                    stream.close()
+        elif args.command == "import-partition":
+            count = write_partition_trace(args.target, read_events(args.source))
+        elif args.command == "export":
+            out = sys.stdout if args.target == "-" else open(args.target, "w", encoding="utf-8")
+            try:
+                count = export_text(args.source, out, args.start, args.stop)
+            finally:
+                if out is not sys.stdout:
+                    out.close()
+            if out is sys.stdout:
+                return 0
+        else:
+            header = read_header(args.source)
+            if header is None:
+                parser.error(f"{args.source} 不是访问序列文件")
+            kind, block_size, count = header
+            name = "分页访问序列" if kind == KIND_PAGING else "分区事件"
+            print(f"类型: {name}\n页面大小: {block_size}\n记录数: {count}")
+            return 0
+    except ValueError as exc:
+        parser.error(str(exc))
+    print(f"{count} 条记录")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
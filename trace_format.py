@@ -0,0 +1,239 @@
+"""定长二进制访问序列格式
+
+文件头 32 字节:
+
+    魔数 b"OSTR" | 版本 u16 | 类型 u16 | 页面大小 u32 | 保留 u32 | 记录数 u64 | 保留 8 字节
+
+类型为 KIND_PAGING 时是分页访问记录，每条 16 字节:
+页号 u64 | 页内地址 u32 | 操作码 u8 | 填充 3 字节。
+
+类型为 KIND_PARTITION 时是分区分配/释放事件，每条 16 字节（页面大小字段为 0）:
+编号 u64 | 大小 u32 | 事件码 u8 | 填充 3 字节，释放事件的大小为 0。
+
+全部小端序。读取时直接 mmap 整个文件，按记录下标切片，不复制数据，
+多个进程同时打开同一文件时共享操作系统的页缓存。
+"""
+import mmap
+import os
+import struct
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，只有 columns() 需要
+    np = None
+
+MAGIC = b"OSTR"
+VERSION = 1
+KIND_PAGING = 0
+KIND_PARTITION = 1
+
+HEADER = struct.Struct("<4sHHIIQ8x")
+PAGING_RECORD = struct.Struct("<QIB3x")
+PARTITION_RECORD = struct.Struct("<QIB3x")
+
+# 与 PAGING_RECORD 布局一致的 numpy 结构化类型
+PAGING_DTYPE = None if np is None else np.dtype(
+    [("page", "<u8"), ("offset", "<u4"), ("op", "u1"), ("pad", "V3")])
+
+# 操作码 → 操作名；"存(save)"/"取(load)" 按 save/load 存储
+OP_NAMES = ["load", "save", "+", "-", "×", "/"]
+OP_CODES = {name: code for code, name in enumerate(OP_NAMES)}
+OP_CODES.update({"取(load)": 0, "存(save)": 1, "*": 4})
+
+# 事件码 → 事件名，与 partition_replay 的文本格式一致
+EVENT_NAMES = ["alloc", "free"]
+EVENT_CODES = {name: code for code, name in enumerate(EVENT_NAMES)}
+
+
+def encode_op(op):
+    try:
+        return OP_CODES[op]
+    except KeyError:
+        raise ValueError(f"无法编码的操作: {op!r}") from None
+
+
+def encode_event(event):
+    try:
+        return EVENT_CODES[event]
+    except KeyError:
+        raise ValueError(f"无法编码的事件: {event!r}") from None
+
+
+def _write_trace(path, kind, block_size, packed):
+    """把逐条打包好的记录写成二进制文件，记录数在写完后回填到文件头"""
+    count = 0
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, kind, block_size, 0, 0))
+        buffer = []
+        for record in packed:
+            buffer.append(record)
+            count += 1
+            if len(buffer) >= 65536:
+                f.write(b"".join(buffer))
+                buffer.clear()
+        f.write(b"".join(buffer))
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, kind, block_size, 0, count))
+    return count
+
+
+def write_paging_trace(path, records, block_size=1024):
+    """把 (操作, 页号, 页内地址) 记录流写成二进制文件，返回记录数"""
+    pack = PAGING_RECORD.pack
+    return _write_trace(path, KIND_PAGING, block_size,
+                        (pack(page, offset, encode_op(op)) for op, page, offset in records))
+
+
+def write_partition_trace(path, events):
+    """把 (事件, 编号, 大小) 事件流写成二进制文件，返回事件数"""
+    pack = PARTITION_RECORD.pack
+    return _write_trace(path, KIND_PARTITION, 0,
+                        (pack(pid, size, encode_event(event)) for event, pid, size in events))
+
+
+class MappedTrace:
+    """以 mmap 方式打开的二进制记录文件，子类给出类型、记录结构和解码方式
+
+    trace[i] 取第 i 条记录，trace[start:stop] 得到共享同一映射的切片（不复制数据），
+    切片与原对象用法相同。切片要先于原对象关闭。
+    """
+    kind = None
+    record = None
+    description = ""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path} 不是访问序列文件")
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, kind, self.block_size, _, self.count = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC or kind != self.kind:
+            self._mmap.close()
+            raise ValueError(f"{path} 不是{self.description}文件")
+        if version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"不支持的访问序列版本: {version}")
+        if HEADER.size + self.count * self.record.size > size:
+            self._mmap.close()
+            raise ValueError(f"{path} 不完整: 文件头记录 {self.count} 条")
+        self.start = 0  # 切片在整个文件中的起始下标
+        self._owner = True
+        self._view = memoryview(self._mmap)[HEADER.size:HEADER.size + self.count * self.record.size]
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        return self.records()
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step != 1:
+                raise ValueError("只支持步长为 1 的切片")
+            stop = max(start, stop)
+            piece = object.__new__(type(self))
+            piece.__dict__.update(self.__dict__)
+            piece._owner = False
+            piece._view = self._view[start * self.record.size:stop * self.record.size]
+            piece.start = self.start + start
+            piece.count = stop - start
+            return piece
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self._decode(*self.record.unpack_from(self._view, index * self.record.size))
+
+    def _decode(self, *fields):
+        raise NotImplementedError
+
+    def records(self, start=0, stop=None):
+        """按下标区间 [start, stop) 逐条生成解码后的记录"""
+        start, stop, _ = slice(start, stop).indices(self.count)
+        size = self.record.size
+        decode = self._decode
+        for fields in self.record.iter_unpack(self._view[start * size:stop * size]):
+            yield decode(*fields)
+
+    def close(self):
+        self._view.release()
+        if self._owner:
+            self._mmap.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PagingTrace(MappedTrace):
+    """二进制分页访问序列，记录为 (操作, 页号, 页内地址)"""
+    kind = KIND_PAGING
+    record = PAGING_RECORD
+    description = "分页访问序列"
+
+    def _decode(self, page, offset, code):
+        return OP_NAMES[code], page, offset
+
+    def columns(self, start=0, stop=None):
+        """把下标区间 [start, stop) 的记录转换成 (页号, 页内地址, 操作码) 三个 numpy 数组
+
+        转换时复制出新数组，不持有 mmap 的引用，之后仍可正常 close()。
+        """
+        if np is None:
+            raise RuntimeError("columns() 需要安装 numpy")
+        start, stop, _ = slice(start, stop).indices(self.count)
+        size = PAGING_RECORD.size
+        view = np.frombuffer(self._view[start * size:stop * size], dtype=PAGING_DTYPE)
+        try:
+            return (view["page"].astype(np.int64), view["offset"].astype(np.int64),
+                    view["op"].copy())
+        finally:
+            del view
+
+    def pages(self):
+        """只生成页号"""
+        for page, _, _ in PAGING_RECORD.iter_unpack(self._view):
+            yield page
+
+
+class PartitionTrace(MappedTrace):
+    """二进制分区分配/释放事件，记录为 (事件, 编号, 大小)"""
+    kind = KIND_PARTITION
+    record = PARTITION_RECORD
+    description = "分区事件"
+
+    def _decode(self, pid, size, code):
+        return EVENT_NAMES[code], pid, size
+
+
+TRACE_TYPES = {KIND_PAGING: PagingTrace, KIND_PARTITION: PartitionTrace}
+
+
+def read_header(path):
+    """读取文件头，返回 (类型, 页面大小, 记录数)；不是本格式的文件返回 None"""
+    with open(path, "rb") as f:
+        data = f.read(HEADER.size)
+    if len(data) < HEADER.size:
+        return None
+    magic, _, kind, block_size, _, count = HEADER.unpack(data)
+    if magic != MAGIC:
+        return None
+    return kind, block_size, count
+
+
+def open_trace(path):
+    """按文件头中的类型打开二进制文件"""
+    header = read_header(path)
+    if header is None or header[0] not in TRACE_TYPES:
+        raise ValueError(f"{path} 不是访问序列文件")
+    return TRACE_TYPES[header[0]](path)
+
+
+def is_binary_trace(path):
+    with open(path, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
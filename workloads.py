@@ -0,0 +1,120 @@
+"""可复现的合成负载
+
+所有生成器都接受 seed，同样的参数总是生成同样的序列。
+
+分页访问序列生成 (操作, 页号, 页内地址) 记录，write_ratio 为写操作的比例:
+
+- uniform: 在 pages 个页中均匀随机
+- zipf: 按 Zipf 分布（第 k 热的页概率与 1/k^s 成正比）随机，热页号随机打散
+- sequential: 从 0 到 pages-1 反复顺序扫描
+- looping: 反复循环访问 loop 个页，循环之间插入少量随机访问
+- phase: 分成若干阶段，每个阶段在一个随机位置的工作集内均匀访问
+
+分区事件生成 (事件, 编号, 大小)，活跃分区数在 live 附近波动:
+
+- uniform: 大小在 [1, max_size] 中均匀
+- small: 大多数是小块，偶尔有大块
+- bimodal: 小块和大块各占一半
+- exponential: 大小服从指数分布
+"""
+import random
+from bisect import bisect_left
+from itertools import accumulate
+
+
+def _record(rng, page, block_size, write_ratio):
+    op = "save" if rng.random() < write_ratio else "load"
+    return op, page, rng.randrange(block_size)
+
+
+def uniform_pages(count, pages=1024, seed=0, block_size=1024, write_ratio=0.3):
+    rng = random.Random(seed)
+    return [_record(rng, rng.randrange(pages), block_size, write_ratio) for _ in range(count)]
+
+
+def zipf_pages(count, pages=1024, s=1.0, seed=0, block_size=1024, write_ratio=0.3):
+    rng = random.Random(seed)
+    weights = list(accumulate(1.0 / (rank ** s) for rank in range(1, pages + 1)))
+    total = weights[-1]
+    ranked = list(range(pages))
+    rng.shuffle(ranked)  # 第 k 热的页的页号
+    records = []
+    for _ in range(count):
+        rank = min(bisect_left(weights, rng.random() * total), pages - 1)
+        records.append(_record(rng, ranked[rank], block_size, write_ratio))
+    return records
+
+
+def sequential_pages(count, pages=1024, seed=0, block_size=1024, write_ratio=0.3):
+    rng = random.Random(seed)
+    return [_record(rng, i % pages, block_size, write_ratio) for i in range(count)]
+
+
+def looping_pages(count, pages=1024, loop=64, noise=0.05, seed=0, block_size=1024, write_ratio=0.3):
+    rng = random.Random(seed)
+    records = []
+    for i in range(count):
+        page = rng.randrange(pages) if rng.random() < noise else i % loop
+        records.append(_record(rng, page, block_size, write_ratio))
+    return records
+
+
+def phase_pages(count, pages=1024, phases=8, working_set=32, seed=0, block_size=1024,
+                write_ratio=0.3):
+    rng = random.Random(seed)
+    length = max(1, count // phases)
+    records = []
+    base = 0
+    for i in range(count):
+        if i % length == 0:
+            base = rng.randrange(max(1, pages - working_set))
+        records.append(_record(rng, base + rng.randrange(working_set), block_size, write_ratio))
+    return records
+
+
+PAGE_WORKLOADS = {
+    "uniform": uniform_pages,
+    "zipf": zipf_pages,
+    "sequential": sequential_pages,
+    "looping": looping_pages,
+    "phase": phase_pages,
+}
+
+
+def _size_sampler(distribution, max_size):
+    if distribution == "uniform":
+        return lambda rng: rng.randint(1, max_size)
+    if distribution == "small":
+        small = max(1, max_size // 16)
+        return lambda rng: rng.randint(1, small) if rng.random() < 0.9 else rng.randint(1, max_size)
+    if distribution == "bimodal":
+        small = max(1, max_size // 16)
+        large = max(1, max_size // 2)
+        return lambda rng: rng.randint(1, small) if rng.random() < 0.5 else rng.randint(large, max_size)
+    if distribution == "exponential":
+        mean = max(1.0, max_size / 8)
+        return lambda rng: min(max_size, 1 + int(rng.expovariate(1 / mean)))
+    raise ValueError(f"未知的大小分布: {distribution}")
+
+
+def alloc_free_events(count, distribution="uniform", max_size=64, live=256, seed=0):
+    """生成分配/释放事件，活跃分区多于 live 时释放的概率变大"""
+    rng = random.Random(seed)
+    sample = _size_sampler(distribution, max_size)
+    events = []
+    active = []
+    next_pid = 1
+    for _ in range(count):
+        if active and rng.random() < len(active) / (2 * live):
+            # 随机释放一个活跃分区
+            index = rng.randrange(len(active))
+            active[index], active[-1] = active[-1], active[index]
+            events.append(("free", active.pop(), 0))
+        else:
+            events.append(("alloc", next_pid, sample(rng)))
+            active.append(next_pid)
+            next_pid += 1
+    return events
+
+
+SIZE_DISTRIBUTIONS = ("uniform", "small", "bimodal", "exponential")